@@ -1,22 +1,103 @@
+import atexit
+import hashlib
+import hmac
 import os
+import sqlite3
+import time
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+import cv2
+import numpy as np
 
-from services.detection_service import DetectionService
+from models.bundle import apply_offline_env
+from services.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    admission_enabled,
+    draining_rejected,
+    is_inference_path,
+)
+from services.compact_format import (
+    COMPACT_SCHEMA_VERSION,
+    NotAcceptableError,
+    compact_payload,
+    compact_response,
+    negotiate,
+)
+from services.backends import create_detection_service, create_ocr_service, describe_backends
 from services.crop_service import CropService
-from services.ocr_service import OCRService
-from services.utils import ensure_directories
+from services.image_io import (
+    ImageTooLargeError,
+    InMemoryUploadRequest,
+    decode_image_buffer,
+    get_upload_limits,
+    ingest_upload,
+    load_image_with_scale,
+    persist_buffer,
+    persist_image,
+    read_upload_buffer,
+    scale_boxes,
+    should_persist_uploads,
+)
+from services.image_quality import ImageQualityError, check_image_quality
+from services.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    ERRORS,
+    IN_FLIGHT,
+    REGISTRY,
+    REQUEST_LATENCY,
+    REQUESTS,
+    InstrumentedJSONProvider,
+)
+from services.memory_watchdog import MemoryWatchdog
+from services.model_registry import ModelRouter, warm_detector, warm_ocr
+from services.inference_workers import InferenceProcessPool
+from services.orientation import detect_upright
+from services.pipeline import CardPipeline
+from services.result_store import (
+    EXPORT_FORMATS,
+    ResultStore,
+    image_sha256,
+    result_store_enabled,
+)
+from services.runtime_config import get_runtime_config
+from services.frame_stream import FrameStreamService
+from services.session_store import SessionStore
+from services.sheet_service import SheetService
+from services.tracing import (
+    TRACE_HEADER,
+    TRACE_QUERY_PARAM,
+    end_trace,
+    parse_trace_mode,
+    start_trace,
+    tracing_enabled,
+)
+from services.utils import ensure_directories, env_flag
 
 
-def create_app() -> Flask:
+def create_app(enable_admission: bool = True) -> Flask:
+    """
+    Build the Flask app. When enable_admission is False the caller (e.g. the
+    ASGI front-end in asgi.py) is responsible for admission control.
+    """
     # Load .env once at startup so services see env vars
     load_dotenv()
+    # Must run before torch/huggingface_hub/paddle are imported
+    apply_offline_env()
+    runtime = get_runtime_config()
     app = Flask(__name__, static_folder="static", static_url_path="/static")
+    # Record JSON serialization time for every response
+    app.json = InstrumentedJSONProvider(app)
+    # Keep multipart uploads in memory so images are decoded from the request buffer
+    app.request_class = InMemoryUploadRequest
+    max_upload_bytes, _ = get_upload_limits()
+    # Allow some headroom for multipart boundaries and form fields
+    app.config["MAX_CONTENT_LENGTH"] = max_upload_bytes + 1024 * 1024
     
     # Enable CORS for all routes and origins
     CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"]}})
@@ -24,27 +105,428 @@ def create_app() -> Flask:
     # Static paths
     app.config["UPLOAD_FOLDER"] = os.path.join("static", "uploads")
     app.config["CROPS_FOLDER"] = os.path.join("static", "crops")
+    app.config["TRACE_FOLDER"] = os.environ.get("TRACE_DIR", "traces")
 
     ensure_directories([app.config["UPLOAD_FOLDER"], app.config["CROPS_FOLDER"]])
 
     # Initialize services
     # Note: OCRService uses lazy loading to avoid memory issues at startup
     try:
-        detection_service = DetectionService()
+        detection_service = create_detection_service()
         crop_service = CropService(crops_dir=app.config["CROPS_FOLDER"])
-        ocr_service = OCRService()  # Models will load on first use
+        ocr_service = create_ocr_service()  # Models will load on first use
     except Exception as e:
         print(f"Warning: Service initialization error: {str(e)}")
         print("Services will be initialized on first use (lazy loading)")
         # Still create the service, but it will fail gracefully on first use
-        detection_service = DetectionService()
+        detection_service = create_detection_service()
         crop_service = CropService(crops_dir=app.config["CROPS_FOLDER"])
-        ocr_service = OCRService()
+        ocr_service = create_ocr_service()
+
+    print(f"Runtime config: {runtime.describe()}")
+    print(f"Model backends: {describe_backends()}")
+
+    # Import torch and load the detector off the startup path so the HTTP
+    # server is listening (and /api/health answers) within a second
+    model_load_mode = os.environ.get("MODEL_LOAD_MODE", "background").strip().lower()
+    if model_load_mode == "background":
+        detection_service.start_background_load()
+
+    # Route model calls through versioned routers so new detector/OCR versions
+    # can be loaded, canaried and switched at runtime via /admin/models
+    detection_service = ModelRouter(
+        "detector",
+        detection_service,
+        factory=lambda spec: create_detection_service(weights_path=spec.get("weights_path")),
+        warm=warm_detector,
+        timed_methods=("detect", "detect_batch"),
+        version=os.environ.get("DETECTOR_VERSION", "initial"),
+    )
+    ocr_service = ModelRouter(
+        "ocr",
+        ocr_service,
+        factory=lambda spec: create_ocr_service(model_overrides=spec.get("models")),
+        warm=warm_ocr,
+        timed_methods=("process_crops", "run_ocr"),
+        version=os.environ.get("OCR_VERSION", "initial"),
+    )
+    model_routers = {"detector": detection_service, "ocr": ocr_service}
+
+    # Expose services so launchers (gunicorn.conf.py, asgi.py) can warm them up
+    app.extensions["idocr_services"] = {
+        "detection": detection_service,
+        "crop": crop_service,
+        "ocr": ocr_service,
+    }
+
+    # In-memory state for the multi-step detect -> crop -> OCR flow
+    session_store = SessionStore()
+    # Crop previews of one-shot /upload and /ocr_only calls live in their own,
+    # smaller store so API traffic cannot evict interactive sessions
+    preview_store = SessionStore(
+        max_sessions=int(os.environ.get("PREVIEW_MAX_ENTRIES", "16")),
+        ttl_seconds=float(os.environ.get("PREVIEW_TTL_SECONDS", "300")),
+        name="preview",
+    )
+
+    # Opt-in store of past results for lookup, export and duplicate detection
+    result_store = ResultStore() if result_store_enabled() else None
+
+    # Overlaps decode/detect/crop/OCR across the cards of a batch; the worker
+    # threads start on the first /api/batch request. With
+    # PIPELINE_INFERENCE_PROCESSES > 0, detection and OCR for batches run in
+    # worker processes and images/crops are handed over via shared memory
+    inference_processes = int(os.environ.get("PIPELINE_INFERENCE_PROCESSES", "0"))
+    inference_pool = InferenceProcessPool(inference_processes) if inference_processes > 0 else None
+    if inference_pool is not None:
+        atexit.register(inference_pool.close)
+        pipeline = CardPipeline(inference_pool, crop_service, inference_pool)
+    else:
+        pipeline = CardPipeline(detection_service, crop_service, ocr_service)
+    app.extensions["idocr_pipeline"] = pipeline
+
+    # Scanned pages with several cards: locate, batch-detect and OCR each card
+    sheet_service = SheetService(detection_service, crop_service, ocr_service)
+
+    # Kiosk camera streams: cheap per-frame scoring, crop + OCR on the best frame
+    stream_service = FrameStreamService(detection_service, crop_service, ocr_service)
+
+    # Samples RSS/allocator stats; at MEMORY_RSS_LIMIT_MB it drains this worker
+    # and hands it back to gunicorn/uvicorn to be replaced
+    memory_watchdog = MemoryWatchdog(in_flight=IN_FLIGHT.get)
+    if env_flag("MEMORY_WATCHDOG", "1"):
+        memory_watchdog.sample()
+        memory_watchdog.start()
+    app.extensions["idocr_memory_watchdog"] = memory_watchdog
+
+    @app.before_request
+    def start_request_metrics() -> None:
+        g.request_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response: Response) -> Response:
+        endpoint = request.endpoint or "unknown"
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+        if response.status_code >= 400:
+            error_type = g.get("error_type") or f"http_{response.status_code}"
+            ERRORS.inc(endpoint=endpoint, type=error_type)
+        if "request_start" in g:
+            REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+        return response
+
+    # Bound concurrent inference; excess requests queue briefly or get 429/503
+    admission = AdmissionController() if enable_admission and admission_enabled() else None
+
+    @app.before_request
+    def admit_request() -> Any:
+        if not is_inference_path(request.path):
+            return None
+        if admission is None and not memory_watchdog.draining:
+            return None
+        try:
+            if memory_watchdog.draining:
+                raise draining_rejected()
+            admission.acquire()
+        except AdmissionRejected as rejected:
+            g.error_type = "admission_rejected"
+            response = jsonify(rejected.to_dict())
+            response.status_code = rejected.status
+            response.headers["Retry-After"] = str(rejected.retry_after)
+            return response
+        g.admitted = True
+        return None
+
+    @app.teardown_request
+    def release_admission(_: Any) -> None:
+        if admission is not None and g.pop("admitted", False):
+            admission.release()
+
+    @app.teardown_request
+    def finish_request_metrics(_: Any) -> None:
+        if g.pop("request_start", None) is not None:
+            IN_FLIGHT.dec()
+        # Drop any trace left behind by a request that failed before
+        # after_request, stopping its profiler so it does not stay enabled
+        # on this worker thread
+        trace = end_trace()
+        if trace is not None:
+            trace.stop_profiling(app.config["TRACE_FOLDER"])
+
+    @app.before_request
+    def start_request_trace() -> None:
+        if not tracing_enabled():
+            return
+        mode = parse_trace_mode(
+            request.headers.get(TRACE_HEADER) or request.args.get(TRACE_QUERY_PARAM)
+        )
+        if mode:
+            start_trace(request.endpoint or request.path, mode)
+
+    @app.after_request
+    def attach_request_trace(response: Response) -> Response:
+        trace = end_trace()
+        if trace is None:
+            return response
+        trace.stop_profiling(app.config["TRACE_FOLDER"])
+        response.headers["X-Trace-Id"] = trace.trace_id
+
+        # Inline (default) adds a "trace" key to JSON responses; "chrome" or
+        # "otlp" write the trace file to TRACE_DIR instead. Writing files needs
+        # the admin token, so clients cannot fill the disk; the file is named
+        # after X-Trace-Id and its path is never returned.
+        output = (
+            request.headers.get("X-Trace-Output") or request.args.get("trace_output") or "inline"
+        ).lower()
+        if output in ("chrome", "otlp") and _check_admin() is None:
+            trace.write(app.config["TRACE_FOLDER"], output)
+        elif response.is_json:
+            data = response.get_json(silent=True)
+            if isinstance(data, dict):
+                data["trace"] = trace.to_dict()
+                response.set_data(app.json.dumps(data))
+        return response
+
+    @app.errorhandler(413)
+    def request_too_large(_: Any) -> Any:
+        return jsonify({"error": f"Upload exceeds limit of {max_upload_bytes} bytes"}), 413
+
+    @app.errorhandler(NotAcceptableError)
+    def not_acceptable(e: NotAcceptableError) -> Any:
+        return jsonify({"error": str(e)}), 406
+
+    # Endpoints whose body depends on Accept (JSON, MessagePack or CBOR)
+    negotiated_endpoints = {"upload", "detect_only", "ocr_only", "batch", "sheet"}
+
+    @app.after_request
+    def vary_on_accept(response: Response) -> Response:
+        # Every response, JSON and errors included, so a shared cache never
+        # hands one format to a client that asked for another
+        if request.endpoint in negotiated_endpoints:
+            response.vary.add("Accept")
+        return response
+
+    def _models_ready() -> bool:
+        # In lazy mode the detector loads on the first request, so only a failure counts
+        if model_load_mode == "lazy":
+            return detection_service.status != "failed"
+        return detection_service.status == "ready"
+
+    def _check_admin() -> Any:
+        # Admin API is disabled unless ADMIN_TOKEN is set
+        token = os.environ.get("ADMIN_TOKEN", "")
+        if not token:
+            return jsonify({"error": "Admin API is disabled (ADMIN_TOKEN not set)"}), 404
+        auth = request.headers.get("Authorization", "")
+        supplied = auth[len("Bearer "):] if auth.startswith("Bearer ") else request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8")):
+            return jsonify({"error": "Invalid admin token"}), 401
+        return None
+
+    def _upload_path(filename: str) -> str:
+        # Ensure unique filename to avoid collisions
+        unique_name = f"{uuid.uuid4().hex}_{secure_filename(filename)}"
+        return os.path.join(app.config["UPLOAD_FOLDER"], unique_name)
+
+    def _crop_urls(session: Any) -> Dict[str, str]:
+        # Previews are rendered by crop_preview only when a client fetches them
+        return {label: f"/api/crops/{session.session_id}/{label}" for label in session.crop_boxes}
+
+    def _quality_rejection(image: Any, scale: float) -> Any:
+        """422 response if the image fails the quality gate, else None."""
+        try:
+            check_image_quality(image, scale)
+        except ImageQualityError as e:
+            g.error_type = "quality_rejected"
+            return jsonify(e.to_dict()), 422
+        return None
+
+    def _static_urls(crop_map: Dict[str, str]) -> Dict[str, str]:
+        # Web paths for crop files under static/crops (session-less fallback)
+        urls: Dict[str, str] = {}
+        for key, path in crop_map.items():
+            rel = path.replace("\\", "/")
+            idx = rel.find("static/crops/")
+            urls[key] = "/" + rel[idx:] if idx != -1 else f"/static/crops/{os.path.basename(rel)}"
+        return urls
+
+    def _recognize(
+        image: np.ndarray, scale: float, image_hash: Optional[str], source: str
+    ) -> Tuple[
+        np.ndarray, Dict[str, str], Dict[str, float], Dict[str, Any], List[str], Optional[Dict[str, Any]]
+    ]:
+        """
+        Detect, crop and OCR one card, or reuse the stored result for the same
+        image bytes and model versions. Returns (image the boxes refer to,
+        result, confidences, detections in working coordinates, cropped
+        labels, store record info).
+        """
+        # Pin one version per model for the whole request, so the stored
+        # record and the reuse lookup name the version that actually ran
+        # (the active one or a canary)
+        with detection_service.pinned() as detector, ocr_service.pinned() as ocr_model:
+            versions = (detector.version, ocr_model.version)
+            if result_store is not None and image_hash:
+                cached = result_store.find_reusable(image_hash, *versions)
+                if cached is not None:
+                    record = {
+                        "id": cached["id"],
+                        "reused": True,
+                        "national_id_records": result_store.count_national_id(cached["fields"].get("Num1")),
+                    }
+                    if cached["rotation"] == 180:
+                        image = cv2.rotate(image, cv2.ROTATE_180)
+                    # OCR ran on exactly the cropped labels, so they have confidences
+                    return (
+                        image,
+                        cached["fields"],
+                        cached["confidences"],
+                        scale_boxes(cached["boxes"], 1.0 / scale),
+                        list(cached["confidences"]),
+                        record,
+                    )
+
+            upright, detections = detect_upright(detection_service, image)
+            crops = crop_service.crop_arrays(upright, detections)
+            confidences: Dict[str, float] = {}
+            result: Dict[str, str] = ocr_service.process_crops(crops, confidences)
+
+            record = None
+            if result_store is not None:
+                try:
+                    record_id = result_store.record(
+                        result,
+                        confidences,
+                        scale_boxes(detections, scale),
+                        image_hash=image_hash,
+                        detector_version=versions[0],
+                        ocr_version=versions[1],
+                        source=source,
+                        rotation=0 if upright is image else 180,
+                    )
+                    record = {
+                        "id": record_id,
+                        "reused": False,
+                        "national_id_records": result_store.count_national_id(result.get("Num1")),
+                    }
+                except sqlite3.Error as e:
+                    # Never fail a request because the audit store is unavailable
+                    print(f"Warning: Failed to record result: {str(e)}")
+            return upright, result, confidences, detections, list(crops), record
 
     @app.route("/api/health", methods=["GET"])
     def health() -> Any:
-        """Health check endpoint."""
-        return jsonify({"status": "ok", "message": "PaddleOCR backend is running"}), 200
+        """Health check endpoint; also reports model readiness."""
+        return jsonify({
+            "status": "ok",
+            "message": "PaddleOCR backend is running",
+            "ready": _models_ready(),
+            "models": {
+                "detector": detection_service.status,
+                "ocr": ocr_service.loaded_models,
+            },
+            "memory": memory_watchdog.stats(),
+        }), 200
+
+    @app.route("/api/ready", methods=["GET"])
+    def ready() -> Any:
+        """Readiness probe: 503 until the detector has loaded (or if it failed) and while draining."""
+        if memory_watchdog.draining:
+            return jsonify({"ready": False, "draining": True, "reason": memory_watchdog.recycle_reason}), 503
+        if _models_ready():
+            return jsonify({"ready": True}), 200
+        body = {"ready": False, "detector": detection_service.status}
+        if detection_service.load_error:
+            body["error"] = detection_service.load_error
+        return jsonify(body), 503
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics() -> Any:
+        """Prometheus metrics endpoint."""
+        # Fresh memory figures for the scrape rather than the last periodic sample
+        memory_watchdog.sample()
+        return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+    @app.route("/admin/models", methods=["GET"])
+    def admin_models() -> Any:
+        """Active, candidate and previous versions of each model."""
+        denied = _check_admin()
+        if denied:
+            return denied
+        return jsonify({kind: router.describe() for kind, router in model_routers.items()}), 200
+
+    @app.route("/admin/models/<kind>/<action>", methods=["POST"])
+    def admin_model_action(kind: str, action: str) -> Any:
+        """
+        load:     {"version": "v2", "weights_path": "..."} for the detector, or
+                  {"version": "v2", "models": {"ar": {...PaddleOCR model args}}} for OCR
+        canary:   {"percent": 10}
+        promote:  switch traffic to the ready candidate
+        rollback: drop the candidate, or return to the previous version
+        """
+        denied = _check_admin()
+        if denied:
+            return denied
+        router = model_routers.get(kind)
+        if router is None:
+            return jsonify({"error": f"Unknown model '{kind}', expected one of {list(model_routers)}"}), 404
+        if inference_pool is not None:
+            # Batch worker processes load their own models and would keep
+            # serving the old version, so model changes would only half apply
+            return jsonify({
+                "error": "Model changes are disabled while PIPELINE_INFERENCE_PROCESSES > 0; "
+                "restart the workers with the new models instead"
+            }), 409
+        data = request.get_json(silent=True) or {}
+        try:
+            if action == "load":
+                version = str(data.get("version") or "").strip()
+                if not version:
+                    return jsonify({"error": "Missing 'version'"}), 400
+                spec = {k: v for k, v in data.items() if k != "version"}
+                router.load_candidate(version, spec)
+                return jsonify(router.describe()), 202
+            if action == "canary":
+                router.set_canary(float(data.get("percent", 0)))
+            elif action == "promote":
+                router.promote()
+            elif action == "rollback":
+                router.rollback()
+            else:
+                return jsonify({"error": f"Unknown action '{action}'"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify(router.describe()), 200
+
+    @app.route("/api/crops/<session_id>/<label>", methods=["GET"])
+    def crop_preview(session_id: str, label: str) -> Any:
+        """Render a crop preview from the session's source image and box."""
+        store = preview_store if session_id in preview_store else session_store
+        session = store.get(session_id)
+        if session is None:
+            return jsonify({"error": f"Session not found or expired: {session_id}"}), 404
+        box = session.crop_boxes.get(label)
+        if box is None:
+            return jsonify({"error": f"Unknown crop label: {label}"}), 404
+        
+        # Same session, box and encoding settings always produce the same bytes
+        etag = hashlib.sha1(
+            f"{session_id}:{label}:{tuple(box)}:{crop_service.preview_format}:"
+            f"{crop_service.preview_quality}:{crop_service.preview_max_size}".encode("utf-8")
+        ).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            preview = session.previews.get(label)
+            if preview is None:
+                preview = crop_service.render_preview(session.image, box)
+                session.previews[label] = preview
+            data, mimetype = preview
+            response = Response(data, mimetype=mimetype)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = int(store.ttl_seconds)
+        return response
 
     @app.route("/api/detect", methods=["POST"])
     def detect() -> Any:
@@ -52,43 +534,75 @@ def create_app() -> Flask:
         try:
             # Support both file upload and image_path
             image_path = None
+            image = None
+            buffer = None
+            filename = None
+            orientation: Dict[str, Any] = {}
             
             if "image" in request.files:
-                # Handle file upload
+                # Handle file upload: decode straight from the request buffer
                 file = request.files["image"]
                 if file.filename == "":
                     return jsonify({"error": "Empty filename"}), 400
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                upload_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_name)
-                file.save(upload_path)
-                image_path = upload_path
+                try:
+                    image, scale, buffer = ingest_upload(file, orientation)
+                except ImageTooLargeError as e:
+                    return jsonify({"error": str(e)}), 413
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                rejected = _quality_rejection(image, scale)
+                if rejected is not None:
+                    return rejected
+                filename = file.filename
             else:
                 # Handle image_path in JSON/form data
                 data = request.form or request.json or {}
                 image_path = data.get("image_path")
+                if not image_path:
+                    return jsonify({"error": "Missing 'image' file or 'image_path' parameter"}), 400
+                if not os.path.exists(image_path):
+                    return jsonify({"error": f"Image file not found: {image_path}"}), 400
+                image, scale = load_image_with_scale(image_path, correction=orientation)
+                rejected = _quality_rejection(image, scale)
+                if rejected is not None:
+                    return rejected
+                filename = os.path.basename(image_path)
             
-            if not image_path:
-                return jsonify({"error": "Missing 'image' file or 'image_path' parameter"}), 400
+            # Run detection on the normalized working image (retried upside down
+            # if needed; the session keeps whichever image the boxes refer to)
+            upright, detections = detect_upright(detection_service, image)
+            orientation["flipped"] = upright is not image
             
-            if not os.path.exists(image_path):
-                return jsonify({"error": f"Image file not found: {image_path}"}), 400
+            # The follow-up steps and the frontend overlay use the image at
+            # image_path, so it must be the one the boxes refer to. A corrected
+            # image is saved as is and its boxes are in its own pixels.
+            if orientation["rotation"] or orientation["skew"] or orientation["flipped"]:
+                image_path = _upload_path(os.path.splitext(filename)[0] + "_upright.jpg")
+                persist_image(upright, image_path)
+                scale = 1.0
+            elif buffer is not None:
+                image_path = _upload_path(filename)
+                persist_buffer(buffer, image_path)
             
-            # Run detection
-            detections = detection_service.detect(image_path)
+            # Keep the decoded image so later steps never re-read it from disk
+            session = session_store.create(upright, scale, os.path.abspath(image_path))
+            session.boxes = detections
             
-            # Convert boxes to serializable format
-            boxes = {label: list(box) for label, box in detections.items()}
+            # Convert boxes to serializable format in image_path's coordinates
+            boxes = {label: list(box) for label, box in scale_boxes(detections, scale).items()}
             
             return jsonify({
                 "boxes": boxes,
                 "image_path": image_path,
-                "image_url": "/" + image_path.replace("\\", "/")
+                "image_url": "/" + image_path.replace("\\", "/"),
+                "orientation": orientation,
+                "session_id": session.session_id,
             }), 200
             
         except ValueError as e:
             return jsonify({"error": f"Detection failed: {str(e)}"}), 400
         except Exception as e:
+            g.error_type = type(e).__name__
             return jsonify({"error": f"Detection error: {str(e)}"}), 500
 
     @app.route("/api/crop", methods=["POST"])
@@ -98,59 +612,73 @@ def create_app() -> Flask:
             data = request.form or request.json or {}
             image_path = data.get("image_path")
             boxes = data.get("boxes")
+            session_id = data.get("session_id")
+            session = session_store.get(session_id)
             
-            if not image_path:
-                return jsonify({"error": "Missing 'image_path' parameter"}), 400
-            
-            # Convert relative paths to absolute if needed
-            if not os.path.isabs(image_path):
-                image_path = os.path.abspath(image_path)
+            if session is None:
+                if session_id and not image_path:
+                    return jsonify({"error": f"Session not found or expired: {session_id}"}), 404
+                
+                if not image_path:
+                    return jsonify({"error": "Missing 'image_path' or 'session_id' parameter"}), 400
+                
+                # Convert relative paths to absolute if needed
+                if not os.path.isabs(image_path):
+                    image_path = os.path.abspath(image_path)
+                
+                if not os.path.exists(image_path):
+                    return jsonify({"error": f"Image file not found: {image_path}"}), 400
             
-            if not os.path.exists(image_path):
-                return jsonify({"error": f"Image file not found: {image_path}"}), 400
-            
-            if not boxes:
+            if not boxes and session is not None:
+                # Default to every box found by /api/detect
+                detections = dict(session.boxes)
+            elif not boxes:
                 return jsonify({"error": "Missing 'boxes' parameter. Expected dict of label -> [x1, y1, x2, y2]"}), 400
+            else:
+                detections = {label: tuple(box) for label, box in boxes.items()}
+            
+            if session is not None:
+                # Reuse the decoded image from /api/detect
+                image, scale, image_path = session.image, session.scale, session.image_path
+            else:
+                # /api/detect hands out the image its boxes refer to (already
+                # rotated, deskewed or flipped), so do not correct it again
+                image, scale = load_image_with_scale(image_path, correct=False)
             
-            # Convert boxes from list format back to tuple format
-            detections = {label: tuple(box) for label, box in boxes.items()}
+            # Client boxes are in image_path's coordinates; map them onto the working image
+            if boxes:
+                detections = scale_boxes(detections, 1.0 / scale)
             
             # Run cropping
-            crop_map = crop_service.crop_regions(image_path, detections)
+            crops = crop_service.crop_arrays(image, detections)
+            if session is None:
+                # Register the source so preview URLs can be rendered later
+                session = session_store.create(image, scale, image_path)
+            session.crops = crops
+            session.set_crop_boxes({label: detections[label] for label in crops})
             
-            # Ensure all paths in crop_map are absolute
-            crop_map_absolute = {}
-            for key, path in crop_map.items():
-                if not os.path.isabs(path):
-                    crop_map_absolute[key] = os.path.abspath(path)
-                else:
-                    crop_map_absolute[key] = path
+            if crop_service.writes_to_disk:
+                # Absolute paths so clients can pass crop_map back to /api/ocr
+                crop_map = {
+                    key: os.path.abspath(path)
+                    for key, path in crop_service.save_crops(crops, session.session_id).items()
+                }
+            else:
+                # Memory mode: crop_map only names the crops held by the session
+                crop_map = _crop_urls(session)
+            session.crop_map = crop_map
             
-            # Convert to web URLs - ensure paths are relative to static folder
-            crops_web: Dict[str, str] = {}
-            for key, path in crop_map_absolute.items():
-                # Convert to forward slashes
-                rel = path.replace("\\", "/")
-                # Extract relative path from static folder
-                if "static/crops" in rel:
-                    # Get the part after static/crops
-                    idx = rel.find("static/crops/")
-                    if idx != -1:
-                        crops_web[key] = "/" + rel[idx:]
-                    else:
-                        crops_web[key] = "/static/crops/" + os.path.basename(path)
-                elif rel.startswith("/"):
-                    crops_web[key] = rel
-                else:
-                    crops_web[key] = "/" + rel
+            response_data = {
+                "crop_map": crop_map,
+                "crops": _crop_urls(session),
+                "image_path": image_path,
+                "session_id": session.session_id,
+            }
             
-            return jsonify({
-                "crop_map": crop_map_absolute,
-                "crops": crops_web,
-                "image_path": image_path
-            }), 200
+            return jsonify(response_data), 200
             
         except Exception as e:
+            g.error_type = type(e).__name__
             return jsonify({"error": f"Cropping failed: {str(e)}"}), 500
 
     @app.route("/api/ocr", methods=["POST"])
@@ -159,39 +687,53 @@ def create_app() -> Flask:
         try:
             data = request.form or request.json or {}
             crop_map = data.get("crop_map")
-            
-            if not crop_map:
-                return jsonify({"error": "Missing 'crop_map' parameter. Expected dict of label -> image_path"}), 400
-            
-            # Validate that all image paths exist and are valid
-            validation_errors = []
-            for label, path in crop_map.items():
-                if not path or not isinstance(path, str):
-                    validation_errors.append(f"Invalid path for {label}: {path}")
-                    continue
-                if not os.path.exists(path):
-                    validation_errors.append(f"Image file not found for {label}: {path}")
-                    continue
-                # Check file size
-                try:
-                    file_size = os.path.getsize(path)
-                    if file_size == 0:
-                        validation_errors.append(f"Image file is empty for {label}: {path}")
-                except Exception as e:
-                    validation_errors.append(f"Cannot access file for {label}: {str(e)}")
-            
-            if validation_errors:
-                return jsonify({"error": "Image validation failed", "details": validation_errors}), 400
+            session_id = data.get("session_id")
+            session = session_store.get(session_id)
             
             # Prepare image list in order: [Add1, Add2, Name1, Name2, Num1, Num2]
             image_order = ["Add1", "Add2", "Name1", "Name2", "Num1", "Num2"]
             image_list = []
-            for label in image_order:
-                if label in crop_map:
-                    image_list.append(crop_map[label])
-                else:
-                    # If a required label is missing, add empty string or skip
-                    return jsonify({"error": f"Missing required crop: {label}"}), 400
+            
+            if session is not None and session.crops:
+                # Use the in-memory crops from /api/crop; no file access needed
+                crop_map = session.crop_map
+                for label in image_order:
+                    if label not in session.crops:
+                        return jsonify({"error": f"Missing required crop: {label}"}), 400
+                    image_list.append(session.crops[label])
+            else:
+                if session_id and not crop_map:
+                    return jsonify({"error": f"Session not found or has no crops: {session_id}"}), 404
+                
+                if not crop_map:
+                    return jsonify({"error": "Missing 'crop_map' parameter. Expected dict of label -> image_path"}), 400
+                
+                # Validate that all image paths exist and are valid
+                validation_errors = []
+                for label, path in crop_map.items():
+                    if not path or not isinstance(path, str):
+                        validation_errors.append(f"Invalid path for {label}: {path}")
+                        continue
+                    if not os.path.exists(path):
+                        validation_errors.append(f"Image file not found for {label}: {path}")
+                        continue
+                    # Check file size
+                    try:
+                        file_size = os.path.getsize(path)
+                        if file_size == 0:
+                            validation_errors.append(f"Image file is empty for {label}: {path}")
+                    except Exception as e:
+                        validation_errors.append(f"Cannot access file for {label}: {str(e)}")
+                
+                if validation_errors:
+                    return jsonify({"error": "Image validation failed", "details": validation_errors}), 400
+                
+                for label in image_order:
+                    if label in crop_map:
+                        image_list.append(crop_map[label])
+                    else:
+                        # If a required label is missing, add empty string or skip
+                        return jsonify({"error": f"Missing required crop: {label}"}), 400
             
             # Run OCR with better error handling
             try:
@@ -201,6 +743,7 @@ def create_app() -> Flask:
             except FileNotFoundError as fe:
                 return jsonify({"error": f"File not found: {str(fe)}"}), 404
             except Exception as ocr_e:
+                g.error_type = type(ocr_e).__name__
                 return jsonify({"error": f"OCR processing failed: {str(ocr_e)}", "type": type(ocr_e).__name__}), 500
             
             # Always return result, even if empty
@@ -208,29 +751,251 @@ def create_app() -> Flask:
                 "result": ocr_result,
                 "crop_map": crop_map
             }
+            if session is not None:
+                response_data["session_id"] = session.session_id
             
-            # Also include crops URLs if available from crop service
-            # (crops are already in crop_map, but we can add web URLs)
-            crops_web: Dict[str, str] = {}
-            for key, path in crop_map.items():
-                # Extract relative path for web
-                rel = path.replace("\\", "/")
-                if "static/crops" in rel:
-                    idx = rel.find("static/crops/")
-                    if idx != -1:
-                        crops_web[key] = "/" + rel[idx:]
-                    else:
-                        crops_web[key] = f"/static/crops/{os.path.basename(path)}"
-                else:
-                    crops_web[key] = f"/static/crops/{os.path.basename(path)}"
+            # Also include crop preview URLs
+            if session is not None and session.crop_boxes:
+                crops_web = _crop_urls(session)
+            else:
+                crops_web = _static_urls(crop_map)
             
             response_data["crops"] = crops_web
             
             return jsonify(response_data), 200
             
         except Exception as e:
+            g.error_type = type(e).__name__
             return jsonify({"error": f"OCR processing failed: {str(e)}", "type": type(e).__name__}), 500
 
+    @app.route("/api/batch", methods=["POST"])
+    def batch() -> Any:
+        """
+        OCR several cards in one request (form-data field "images", repeated).
+        Cards move through the stage pipeline, so detection of one card
+        overlaps OCR of another. Results are returned in upload order.
+        """
+        compact = negotiate(request.accept_mimetypes)
+        files = [f for f in request.files.getlist("images") if f.filename]
+        if not files:
+            return jsonify({"error": "Missing 'images' files in form-data"}), 400
+
+        max_bytes, _ = get_upload_limits()
+        try:
+            buffers = [read_upload_buffer(f, max_bytes) for f in files]
+        except ImageTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+
+        start = time.perf_counter()
+        futures = pipeline.map(buffers)
+        cards = []
+        for file, future in zip(files, futures):
+            try:
+                card = future.result()
+            except ImageQualityError as e:
+                card = {**e.to_dict(), "type": type(e).__name__}
+            except Exception as e:
+                card = {"error": str(e), "type": type(e).__name__}
+            card["filename"] = file.filename
+            cards.append(card)
+        elapsed_ms = round(1000.0 * (time.perf_counter() - start), 2)
+
+        if compact:
+            return compact_response(
+                {
+                    "v": COMPACT_SCHEMA_VERSION,
+                    "cards": [
+                        compact_payload(card["fields"], card["confidences"], card["boxes"])
+                        if "error" not in card
+                        else {"error": card["error"]}
+                        for card in cards
+                    ],
+                },
+                compact,
+            )
+        return jsonify({"cards": cards, "count": len(cards), "elapsed_ms": elapsed_ms}), 200
+
+    @app.route("/api/sheet", methods=["POST"])
+    def sheet() -> Any:
+        """
+        OCR every ID card on a scanned page (form-data field "image").
+        Cards are located on the page and warped upright, field detection for
+        all of them runs as one batch, and results are returned in reading
+        order. Each card's "quad" is its corners on the original page; its
+        boxes are relative to the warped card ("size").
+        """
+        compact = negotiate(request.accept_mimetypes)
+        file = request.files.get("image")
+        if file is None or file.filename == "":
+            return jsonify({"error": "Missing 'image' file in form-data"}), 400
+
+        max_bytes, max_pixels = get_upload_limits()
+        try:
+            buffer = read_upload_buffer(file, max_bytes)
+            # Higher working resolution than single cards, and no whole-page
+            # rotation/deskew: each card is straightened on its own
+            page, scale = decode_image_buffer(
+                buffer,
+                max_pixels,
+                max_size=int(os.environ.get("SHEET_WORKING_MAX_SIZE", "3600")),
+                correct=False,
+            )
+        except ImageTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        start = time.perf_counter()
+        cards = sheet_service.process(page, scale)
+        elapsed_ms = round(1000.0 * (time.perf_counter() - start), 2)
+        if not cards:
+            return jsonify({"error": "No ID cards found on the page", "cards": []}), 422
+
+        if compact:
+            return compact_response(
+                {
+                    "v": COMPACT_SCHEMA_VERSION,
+                    "cards": [
+                        {**compact_payload(card["fields"], card["confidences"], card["boxes"]), "quad": card["quad"]}
+                        if "error" not in card
+                        else {"error": card["error"], "quad": card["quad"]}
+                        for card in cards
+                    ],
+                },
+                compact,
+            )
+        return jsonify({"cards": cards, "count": len(cards), "elapsed_ms": elapsed_ms}), 200
+
+    @app.route("/api/stream", methods=["POST"])
+    def stream_open() -> Any:
+        """Open a camera stream; frames are then posted to /api/stream/<id>/frames."""
+        stream = stream_service.create()
+        return jsonify({
+            "stream_id": stream.stream_id,
+            "accept_score": stream_service.accept_score,
+            "max_frames": stream_service.max_frames,
+            "ttl_seconds": stream_service.ttl_seconds,
+        }), 201
+
+    @app.route("/api/stream/<stream_id>/frames", methods=["POST"])
+    def stream_frames(stream_id: str) -> Any:
+        """
+        Score one or more frames, in order: form-data "frame"/"frames" (repeat
+        the field to send several), or a raw image body. Returns a report per
+        frame; once a frame is good enough the stream is done and "result"
+        holds the OCR of the best frame. Frames after that are ignored.
+        """
+        stream = stream_service.get(stream_id)
+        if stream is None:
+            return jsonify({"error": "Unknown or expired stream"}), 404
+
+        max_bytes, max_pixels = get_upload_limits()
+        files = [f for f in request.files.getlist("frames") + request.files.getlist("frame") if f.filename]
+        try:
+            if files:
+                buffers = [read_upload_buffer(f, max_bytes) for f in files]
+            elif request.mimetype.startswith("image/"):
+                body = request.get_data(cache=False)
+                if len(body) > max_bytes:
+                    raise ImageTooLargeError(f"Frame is {len(body)} bytes, limit is {max_bytes} bytes")
+                buffers = [memoryview(body)]
+            else:
+                return jsonify({"error": "Send frames as form-data 'frame'/'frames' or an image/* body"}), 400
+        except ImageTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+
+        reports = []
+        for buffer in buffers:
+            try:
+                image, scale = decode_image_buffer(buffer, max_pixels, correct=False)
+            except ValueError as e:
+                # Includes ImageTooLargeError: earlier frames already changed
+                # the stream, so report this one instead of failing the request
+                reports.append({"error": str(e)})
+                continue
+            report = stream_service.add_frame(stream, image, scale)
+            reports.append(report)
+            if report.get("done"):
+                break
+        body = {"stream_id": stream_id, "frames": reports, "best": stream.best(), "done": stream.done}
+        if stream.done:
+            body["result"] = stream.result
+        return jsonify(body), 200
+
+    @app.route("/api/stream/<stream_id>/finish", methods=["POST"])
+    def stream_finish(stream_id: str) -> Any:
+        """OCR the best frame so far (if the stream is not done yet) and close the stream."""
+        stream = stream_service.get(stream_id)
+        if stream is None:
+            return jsonify({"error": "Unknown or expired stream"}), 404
+        result = stream_service.finish(stream)
+        stream_service.close(stream_id)
+        if result is None:
+            return jsonify({
+                "error": "No usable frame: every frame was blurry, glared, or had no card fields",
+                "frames_seen": stream.frames,
+            }), 422
+        return jsonify({"stream_id": stream_id, **result}), 200
+
+    @app.route("/api/pipeline/stats", methods=["GET"])
+    def pipeline_stats() -> Any:
+        stats = pipeline.stats()
+        if inference_pool is not None:
+            stats["transport"] = inference_pool.stats()
+        return jsonify(stats), 200
+
+    @app.route("/api/results", methods=["GET"])
+    def find_results() -> Any:
+        """Look up stored results by national_id (Num1) or image sha256."""
+        denied = _check_admin()
+        if denied is not None:
+            return denied
+        if result_store is None:
+            return jsonify({"error": "Result store is disabled (RESULT_STORE_ENABLED=0)"}), 404
+        try:
+            limit = min(max(int(request.args.get("limit", "50")), 1), 500)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        national_id = request.args.get("national_id")
+        image_hash = request.args.get("image_hash")
+        if national_id:
+            records = result_store.find_by_national_id(national_id, limit)
+        elif image_hash:
+            records = result_store.find_by_image_hash(image_hash, limit)
+        else:
+            return jsonify({"error": "Pass national_id or image_hash", **result_store.stats()}), 400
+        return jsonify({"records": records, "count": len(records)}), 200
+
+    @app.route("/api/results/<int:record_id>", methods=["GET"])
+    def get_result(record_id: int) -> Any:
+        denied = _check_admin()
+        if denied is not None:
+            return denied
+        record = result_store.get(record_id) if result_store is not None else None
+        if record is None:
+            return jsonify({"error": "Record not found"}), 404
+        return jsonify(record), 200
+
+    @app.route("/api/results/export", methods=["GET"])
+    def export_results() -> Any:
+        """Stream every stored result as JSON lines (default) or CSV."""
+        denied = _check_admin()
+        if denied is not None:
+            return denied
+        if result_store is None:
+            return jsonify({"error": "Result store is disabled (RESULT_STORE_ENABLED=0)"}), 404
+        fmt = request.args.get("format", "jsonl").lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+        try:
+            since = float(request.args["since"]) if request.args.get("since") else None
+        except ValueError:
+            return jsonify({"error": "since must be a Unix timestamp"}), 400
+        mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = Response(stream_with_context(result_store.export(fmt, since)), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename=results.{fmt}"
+        return response
+
     @app.route("/upload_only", methods=["POST"])  # returns saved image path/url
     def upload_only() -> Any:
         if "image" not in request.files:
@@ -238,29 +1003,44 @@ def create_app() -> Flask:
         file = request.files["image"]
         if file.filename == "":
             return jsonify({"error": "Empty filename"}), 400
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid.uuid4().hex}_{filename}"
-        upload_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_name)
+        upload_path = _upload_path(file.filename)
         file.save(upload_path)
         web_url = "/" + upload_path.replace("\\", "/")
         return jsonify({"image_path": upload_path, "image_url": web_url}), 200
 
     @app.route("/detect_only", methods=["POST"])  # run detection and return boxes
     def detect_only() -> Any:
+        # Pick the response format before doing any work (406 if unsupported)
+        compact = negotiate(request.accept_mimetypes)
         data = request.form or request.json or {}
         image_path = data.get("image_path")
         if not image_path or not os.path.exists(image_path):
             return jsonify({"error": "Invalid or missing image_path"}), 400
-        detections = detection_service.detect(image_path)
+        orientation: Dict[str, Any] = {}
+        image, scale = load_image_with_scale(image_path, correction=orientation)
+        rejected = _quality_rejection(image, scale)
+        if rejected is not None:
+            return rejected
+        upright, detections = detect_upright(detection_service, image)
+        orientation["flipped"] = upright is not image
+        detections = scale_boxes(detections, scale)
+        if compact:
+            return compact_response(compact_payload(boxes=detections), compact)
+        # Boxes are in the corrected image; `orientation` says how it differs from image_url
         return (
             jsonify(
-                {"boxes": detections, "image_url": "/" + image_path.replace("\\", "/")}
+                {
+                    "boxes": detections,
+                    "image_url": "/" + image_path.replace("\\", "/"),
+                    "orientation": orientation,
+                }
             ),
             200,
         )
 
     @app.route("/ocr_only", methods=["POST"])  # run full OCR on existing image
     def ocr_only() -> Any:
+        compact = negotiate(request.accept_mimetypes)
         try:
             data = request.form or request.json or {}
             image_path = data.get("image_path")
@@ -269,25 +1049,40 @@ def create_app() -> Flask:
             if not os.path.exists(image_path):
                 return jsonify({"error": f"Image file not found: {image_path}"}), 400
             
-            detections = detection_service.detect(image_path)
-            crop_map = crop_service.crop_regions(image_path, detections)
-            result: Dict[str, str] = ocr_service.process_crops(crop_map)
-            crops_web: Dict[str, str] = {}
-            for key, path in crop_map.items():
-                rel = path.replace("\\", "/")
-                crops_web[key] = "/" + rel if not rel.startswith("/") else rel
-            return (
-                jsonify(
-                    {
-                        "result": result,
-                        "crops": crops_web,
-                        "image_url": "/" + image_path.replace("\\", "/"),
-                        "boxes": detections,
-                    }
-                ),
-                200,
+            # Decode once; detection and cropping share the working image
+            orientation: Dict[str, Any] = {}
+            image, scale = load_image_with_scale(image_path, correction=orientation)
+            rejected = _quality_rejection(image, scale)
+            if rejected is not None:
+                return rejected
+            source_image = image
+            image_hash = None
+            if result_store is not None:
+                with open(image_path, "rb") as fh:
+                    image_hash = image_sha256(fh.read())
+            image, result, confidences, detections, cropped, record = _recognize(
+                image, scale, image_hash, source="ocr_only"
             )
+            if compact:
+                return compact_response(
+                    compact_payload(result, confidences, scale_boxes(detections, scale)), compact
+                )
+            # Keep only the source image and boxes; previews are rendered on request
+            session = preview_store.create(image, scale, os.path.abspath(image_path))
+            session.boxes = detections
+            session.set_crop_boxes({label: detections[label] for label in cropped})
+            payload: Dict[str, Any] = {
+                "result": result,
+                "crops": _crop_urls(session),
+                "image_url": "/" + image_path.replace("\\", "/"),
+                "boxes": scale_boxes(detections, scale),
+                "orientation": {**orientation, "flipped": image is not source_image},
+            }
+            if record is not None:
+                payload["record"] = record
+            return jsonify(payload), 200
         except Exception as exc:
+            g.error_type = type(exc).__name__
             return jsonify({"error": f"OCR processing failed: {str(exc)}"}), 500
 
     @app.route("/upload", methods=["POST"])  # POST /upload
@@ -298,48 +1093,79 @@ def create_app() -> Flask:
         file = request.files["image"]
         if file.filename == "":
             return jsonify({"error": "Empty filename"}), 400
+        compact = negotiate(request.accept_mimetypes)
 
-        filename = secure_filename(file.filename)
-        # Ensure unique filename to avoid collisions
-        unique_name = f"{uuid.uuid4().hex}_{filename}"
-        upload_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_name)
-        file.save(upload_path)
+        # Decode once from the request buffer; all stages share this array
+        try:
+            image, scale, buffer = ingest_upload(file)
+        except ImageTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        rejected = _quality_rejection(image, scale)
+        if rejected is not None:
+            return rejected
+
+        if should_persist_uploads():
+            persist_buffer(buffer, _upload_path(file.filename))
 
         try:
-            # 1) Detect regions
-            detections = detection_service.detect(upload_path)
-
-            # 2) Crop regions
-            crop_map = crop_service.crop_regions(upload_path, detections)
-
-            # 3) OCR the cropped regions and build final JSON
-            result: Dict[str, str] = ocr_service.process_crops(crop_map)
-
-            # Also return crop URLs for frontend preview
-            # Convert filesystem paths to web paths under /static
-            crops_web: Dict[str, str] = {}
-            for key, path in crop_map.items():
-                # Normalize to forward slashes for URLs
-                rel = path.replace("\\", "/")
-                if rel.startswith("static/"):
-                    crops_web[key] = "/" + rel
-                else:
-                    # attempt to find '/static/' segment
-                    idx = rel.find("static/")
-                    crops_web[key] = "/" + rel[idx:] if idx != -1 else rel
-
-            payload: Dict[str, Dict[str, str]] = {
+            # Detect, crop and OCR in memory (or reuse a stored result for
+            # the same image bytes), then build the final JSON
+            image_hash = image_sha256(buffer) if result_store is not None else None
+            image, result, confidences, detections, cropped, record = _recognize(
+                image, scale, image_hash, source="upload"
+            )
+            if compact:
+                # Machine clients: fields, confidences and boxes only
+                return compact_response(
+                    compact_payload(result, confidences, scale_boxes(detections, scale)), compact
+                )
+
+            # Also return crop URLs for frontend preview, rendered on request
+            session = preview_store.create(image, scale)
+            session.boxes = detections
+            session.set_crop_boxes({label: detections[label] for label in cropped})
+
+            payload: Dict[str, Any] = {
                 "result": result,
-                "crops": crops_web,
+                "crops": _crop_urls(session),
             }
+            if record is not None:
+                payload["record"] = record
 
             return jsonify(payload), 200
         except Exception as exc:  # pylint: disable=broad-except
+            g.error_type = type(exc).__name__
             return jsonify({"error": str(exc)}), 500
 
     return app
 
 
+def warm_up(app: Flask) -> None:
+    """
+    Load the active detector and OCR models and run one tiny prediction on
+    each, so the first real request does not pay start-up cost.
+    """
+    services = app.extensions.get("idocr_services", {})
+    ocr_service = services.get("ocr")
+    if ocr_service is None:
+        return
+    start = time.perf_counter()
+    detection_service = services.get("detection")
+    if detection_service is not None:
+        try:
+            # Waits for the background load if one is in progress
+            warm_detector(detection_service.active.service)
+        except Exception as e:
+            print(f"Warning: Detector warm-up failed: {str(e)}")
+    try:
+        warm_ocr(ocr_service.active.service)
+    except Exception as e:
+        print(f"Warning: OCR warm-up failed: {str(e)}")
+    print(f"Models warmed up in {time.perf_counter() - start:.1f}s")
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8000"))
     app = create_app()
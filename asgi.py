@@ -0,0 +1,221 @@
+"""ASGI entry point: uvicorn asgi:app --host 0.0.0.0 --port 8000"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import create_app, warm_up
+from services.admission import (
+    AdmissionRejected,
+    AsyncAdmissionController,
+    admission_enabled,
+    is_inference_path,
+)
+from services.utils import env_flag
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the request body was complete."""
+
+
+def preload_models_enabled() -> bool:
+    return env_flag("PRELOAD_MODELS", "1")
+
+
+class AsgiFrontend:
+    """Minimal ASGI -> WSGI bridge with admission control for inference routes."""
+
+    def __init__(
+        self,
+        wsgi_app: Callable,
+        admission: Optional[AsyncAdmissionController] = None,
+        light_workers: Optional[int] = None,
+    ) -> None:
+        self.wsgi_app = wsgi_app
+        self.admission = admission
+        max_in_flight = admission.max_in_flight if admission else int(
+            os.environ.get("ADMISSION_MAX_IN_FLIGHT", "2")
+        )
+        self.inference_executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="inference"
+        )
+        self.light_executor = ThreadPoolExecutor(
+            max_workers=light_workers or int(os.environ.get("ASGI_LIGHT_WORKERS", "4")),
+            thread_name_prefix="http",
+        )
+        self.max_body = int(getattr(wsgi_app, "config", {}).get("MAX_CONTENT_LENGTH") or 0)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        inference = is_inference_path(scope["path"])
+        if inference and self.admission is not None and self.admission.saturated():
+            # Reject before reading the body when the queue is already full
+            await self._reject(send, self.admission.queue_full())
+            return
+
+        try:
+            body = await self._read_body(receive)
+        except ClientDisconnected:
+            # Nobody is left to answer; never run inference on a truncated upload
+            return
+        if body is None:
+            await self._send_json(send, 413, {"error": "Request body too large"})
+            return
+
+        if not inference:
+            await self._run(scope, body, send, self.light_executor)
+            return
+        if self.admission is None:
+            await self._run(scope, body, send, self.inference_executor)
+            return
+
+        try:
+            await self.admission.acquire()
+        except AdmissionRejected as rejected:
+            await self._reject(send, rejected)
+            return
+        try:
+            await self._run(scope, body, send, self.inference_executor)
+        finally:
+            await self.admission.release()
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if preload_models_enabled():
+                    # Warm up on the inference pool before accepting traffic
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(self.inference_executor, warm_up, self.wsgi_app)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Let in-flight inference finish before the process exits
+                self.inference_executor.shutdown(wait=True)
+                self.light_executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """Whole request body, or None if it exceeds MAX_CONTENT_LENGTH."""
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnected()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if self.max_body and size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _run(
+        self, scope: Dict[str, Any], body: bytes, send: Callable, executor: ThreadPoolExecutor
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        environ = self._build_environ(scope, body)
+        status, headers, payload = await loop.run_in_executor(executor, self._call_wsgi, environ)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    def _call_wsgi(self, environ: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+            return lambda data: None
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            payload = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], payload
+
+    @staticmethod
+    def _build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ: Dict[str, Any] = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": str(server[0]),
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": str(client[0]),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+            elif name == "CONTENT_LENGTH":
+                continue
+            else:
+                key = f"HTTP_{name}"
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    async def _reject(self, send: Callable, rejected: AdmissionRejected) -> None:
+        await self._send_json(
+            send,
+            rejected.status,
+            rejected.to_dict(),
+            [("retry-after", str(rejected.retry_after))],
+        )
+
+    @staticmethod
+    async def _send_json(
+        send: Callable, status: int, data: Dict[str, Any], extra_headers: Optional[List] = None
+    ) -> None:
+        payload = json.dumps(data).encode("utf-8")
+        headers = [("content-type", "application/json"), ("content-length", str(len(payload)))]
+        headers.extend(extra_headers or [])
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+
+def create_asgi_app() -> AsgiFrontend:
+    # Admission is enforced here, on the event loop, rather than in Flask
+    flask_app = create_app(enable_admission=False)
+    admission = AsyncAdmissionController() if admission_enabled() else None
+    return AsgiFrontend(flask_app, admission)
+
+
+app = create_asgi_app()
@@ -0,0 +1 @@
+# Benchmark harness for the detection/crop/OCR pipeline
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Cold-start profile: time-to-health of a fresh process and the slowest imports."""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+# Runs inside the child interpreter; prints one JSON line of timings in seconds
+_CHILD_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app()
+t2 = time.perf_counter()
+status = flask_app.test_client().get("/api/health").status_code
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "create_app_s": t2 - t1,
+                  "first_health_s": t3 - t2, "time_to_health_s": t3 - t0,
+                  "health_status": status}))
+"""
+
+
+def measure_startup() -> Dict[str, Any]:
+    """
+    Start a fresh interpreter and return its startup timings. Model loading
+    follows MODEL_LOAD_MODE, so with the default background load this shows
+    that health answers while torch is still being imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD_SCRIPT],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    # The app prints start-up messages; the timings are the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(module: str = "app", top: int = 15) -> List[Dict[str, Any]]:
+    """
+    Import cost per root package pulled in by `module` (largest cumulative
+    time of any of its entries in `python -X importtime`), slowest first.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    totals: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time:      self [us] |      cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        root = name.strip().split(".")[0]
+        if root == module:
+            continue
+        totals[root] = max(totals.get(root, 0), int(cumulative_us))
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000.0, 2)} for name, us in ranked]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile backend cold start")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes to time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    for i, run in enumerate(runs, 1):
+        print(
+            f"run {i}: import={run['import_s'] * 1000:.0f}ms "
+            f"create_app={run['create_app_s'] * 1000:.0f}ms "
+            f"time_to_health={run['time_to_health_s'] * 1000:.0f}ms (HTTP {run['health_status']})"
+        )
+    imports = import_breakdown(top=args.top)
+    print("\nSlowest imports by package (cumulative):")
+    for entry in imports:
+        print(f"  {entry['module']:<28} {entry['cumulative_ms']:>9.1f} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"runs": runs, "imports": imports}, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
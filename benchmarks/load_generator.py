@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Open-loop load generator for the serving layer.
+
+    python -m benchmarks.load_generator --in-process --rate 50 --endpoint upload,detect
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.run_benchmarks import _read_bytes, percentile  # noqa: E402
+from benchmarks.synthetic import generate_corpus, load_corpus  # noqa: E402
+
+ENDPOINTS = {"upload": "/upload", "detect": "/api/detect", "batch": "/api/batch"}
+REJECTED_STATUSES = (429, 503)
+
+# (endpoint name, list of (filename, bytes)) -> HTTP status
+Sender = Callable[[str, List[Tuple[str, bytes]]], int]
+
+
+def _http_sender(url: str, timeout: float) -> Sender:
+    import requests
+
+    base = url.rstrip("/")
+    local = threading.local()
+
+    def send(endpoint: str, files: List[Tuple[str, bytes]]) -> int:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        field = "images" if endpoint == "batch" else "image"
+        payload = [(field, (name, data, "image/jpeg")) for name, data in files]
+        return session.post(base + ENDPOINTS[endpoint], files=payload, timeout=timeout).status_code
+
+    return send
+
+
+def _in_process_sender() -> Sender:
+    # Stubs unless the caller explicitly chose real backends
+    os.environ.setdefault("DETECTION_BACKEND", "stub")
+    os.environ.setdefault("OCR_BACKEND", "stub")
+    from app import create_app
+
+    app = create_app()
+    local = threading.local()
+
+    def send(endpoint: str, files: List[Tuple[str, bytes]]) -> int:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        field = "images" if endpoint == "batch" else "image"
+        data = {field: [(io.BytesIO(body), name) for name, body in files]}
+        return client.post(ENDPOINTS[endpoint], data=data).status_code
+
+    return send
+
+
+class LoadRun:
+    """Collects per-request outcomes for one load level."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, status: int, latency: float) -> None:
+        with self.lock:
+            self.statuses[status] += 1
+            if status == 200:
+                self.latencies.append(latency)
+
+    def summary(
+        self, mode: str, level: float, duration: float, wall: float, cards_per_request: float
+    ) -> Dict[str, Any]:
+        """Rates over `duration` (the sending window); `wall` includes draining the tail."""
+        ms = [v * 1000.0 for v in self.latencies]
+        total = sum(self.statuses.values())
+        ok = self.statuses.get(200, 0)
+        rejected = sum(self.statuses.get(s, 0) for s in REJECTED_STATUSES)
+        return {
+            "mode": mode,
+            "level": level,
+            "requests": total,
+            "ok": ok,
+            "rejected": rejected,
+            "errors": total - ok - rejected,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "wall_s": round(wall, 3),
+            "offered_rps": round(total / duration, 3),
+            "goodput_rps": round(ok / wall, 3) if wall > 0 else 0.0,
+            "cards_per_sec": round(ok * cards_per_request / wall, 3) if wall > 0 else 0.0,
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "max_ms": round(max(ms), 3) if ms else 0.0,
+        }
+
+
+def _request_plan(
+    endpoints: Sequence[str], items: List[Tuple[str, bytes]], batch_size: int
+) -> Callable[[int], Tuple[str, List[Tuple[str, bytes]]]]:
+    def plan(i: int) -> Tuple[str, List[Tuple[str, bytes]]]:
+        endpoint = endpoints[i % len(endpoints)]
+        if endpoint == "batch":
+            return endpoint, [items[(i + k) % len(items)] for k in range(batch_size)]
+        return endpoint, [items[i % len(items)]]
+
+    return plan
+
+
+def _issue(send: Sender, run: LoadRun, endpoint: str, files: List[Tuple[str, bytes]], scheduled: float) -> None:
+    try:
+        status = send(endpoint, files)
+    except Exception as e:
+        print(f"  error: {type(e).__name__}: {e}", file=sys.stderr)
+        status = 0
+    run.record(status, time.perf_counter() - scheduled)
+
+
+def open_loop(
+    send: Sender, plan: Callable[[int], Tuple[str, List[Tuple[str, bytes]]]],
+    rate: float, duration: float, max_in_flight: int,
+) -> Tuple[LoadRun, float]:
+    """Issue `rate` requests/sec for `duration` seconds regardless of replies."""
+    run = LoadRun()
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        i = 0
+        while True:
+            scheduled = start + i * interval
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint, files = plan(i)
+            pool.submit(_issue, send, run, endpoint, files, scheduled)
+            i += 1
+    return run, time.perf_counter() - start
+
+
+def closed_loop(
+    send: Sender, plan: Callable[[int], Tuple[str, List[Tuple[str, bytes]]]],
+    concurrency: int, duration: float,
+) -> Tuple[LoadRun, float]:
+    """`concurrency` clients each sending their next request as soon as the last returns."""
+    run = LoadRun()
+    counter = iter(range(sys.maxsize))
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client() -> None:
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            endpoint, files = plan(i)
+            _issue(send, run, endpoint, files, time.perf_counter())
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return run, time.perf_counter() - start
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate load against the ID OCR service")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000", help="Server URL")
+    target.add_argument("--in-process", action="store_true",
+                        help="Drive create_app() through the Flask test client (stub backends)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rate", default="10", help="Open loop: comma-separated requests/sec levels")
+    load.add_argument("--concurrency", help="Closed loop: comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per level")
+    parser.add_argument("--endpoint", default="upload",
+                        help=f"Comma-separated mix of {','.join(ENDPOINTS)} (round-robin)")
+    parser.add_argument("--batch-size", type=int, default=4, help="Cards per /api/batch request")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Open loop: cap on outstanding requests in the generator")
+    parser.add_argument("--timeout", type=float, default=60.0, help="HTTP request timeout")
+    parser.add_argument("--corpus", default=os.path.join(BENCH_DIR, "corpus"),
+                        help="Directory of card images (generated if missing or empty)")
+    parser.add_argument("--cards", type=int, default=16, help="Synthetic cards to generate")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for synthetic cards")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoint.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown or not endpoints:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown)) or '(none)'}")
+
+    if os.path.isdir(args.corpus) and load_corpus(args.corpus):
+        paths = load_corpus(args.corpus)
+    else:
+        paths = generate_corpus(args.corpus, args.cards, args.seed)
+    items = _read_bytes(paths)
+    plan = _request_plan(endpoints, items, args.batch_size)
+    cards_per_request = sum(args.batch_size if e == "batch" else 1 for e in endpoints) / len(endpoints)
+
+    send = _in_process_sender() if args.in_process else _http_sender(args.url, args.timeout)
+    target_name = "in-process" if args.in_process else args.url
+    print(f"Target: {target_name}; endpoints: {','.join(endpoints)}; corpus: {len(items)} images")
+
+    # Untimed warm-up so lazy model loading does not land in the first level
+    for endpoint in endpoints:
+        _issue(send, LoadRun(), *plan(endpoints.index(endpoint)), time.perf_counter())
+
+    results: List[Dict[str, Any]] = []
+    if args.concurrency:
+        for level in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            run, wall = closed_loop(send, plan, level, args.duration)
+            results.append(run.summary("closed", level, args.duration, wall, cards_per_request))
+    else:
+        for level in [float(r) for r in args.rate.split(",") if r.strip()]:
+            run, wall = open_loop(send, plan, level, args.duration, args.max_in_flight)
+            results.append(run.summary("open", level, args.duration, wall, cards_per_request))
+
+    for r in results:
+        label = "rate" if r["mode"] == "open" else "clients"
+        print(
+            f"[{label}={r['level']:<6}] offered={r['offered_rps']}/s goodput={r['goodput_rps']}/s "
+            f"cards/s={r['cards_per_sec']} p50={r['p50_ms']}ms p95={r['p95_ms']}ms "
+            f"p99={r['p99_ms']}ms rejected={r['rejected']} errors={r['errors']}"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "target": target_name,
+                "endpoints": endpoints,
+                "duration_s": args.duration,
+                "env": {k: v for k, v in os.environ.items() if k.startswith(("STUB_", "DETECTION_BACKEND", "OCR_BACKEND"))},
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Benchmark harness for the Egyptian ID OCR pipeline.
+
+    python -m benchmarks.run_benchmarks --scenarios detection,ocr,upload --concurrency 1,2,4
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import generate_corpus, load_corpus  # noqa: E402
+
+SCENARIOS = ("detection", "ocr", "upload", "http", "pipeline", "startup")
+STARTUP_RUNS = 3
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (pct / 100.0) * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_load(
+    fn: Callable[[Any], None], items: Sequence[Any], concurrency: int, repeat: int
+) -> Tuple[List[float], int, float]:
+    """
+    Call fn on every item `repeat` times using `concurrency` threads.
+    Returns (latencies in seconds, error count, wall time in seconds).
+    """
+    work = list(items) * repeat
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(item: Any) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            fn(item)
+            ok = True
+        except Exception as e:
+            print(f"  error: {type(e).__name__}: {e}", file=sys.stderr)
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, work))
+    return latencies, errors, time.perf_counter() - wall_start
+
+
+def summarize(
+    scenario: str, concurrency: int, latencies: List[float], errors: int, wall: float
+) -> Dict[str, Any]:
+    ms = [v * 1000.0 for v in latencies]
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "cards": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "cards_per_sec": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def _read_bytes(paths: Sequence[str]) -> List[Tuple[str, bytes]]:
+    out = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            out.append((os.path.basename(path), fh.read()))
+    return out
+
+
+def build_detection(paths: Sequence[str]) -> Tuple[Callable[[Any], None], List[Any]]:
+    from services.backends import create_detection_service
+    from services.image_io import load_image_with_scale
+
+    service = create_detection_service()
+    # Decode up front so only the detector is measured
+    images = [load_image_with_scale(p)[0] for p in paths]
+    return service.detect, images
+
+
+def build_ocr(paths: Sequence[str]) -> Tuple[Callable[[Any], None], List[Any]]:
+    from services.backends import create_detection_service, create_ocr_service
+    from services.crop_service import CropService
+    from services.image_io import load_image_with_scale
+
+    detector = create_detection_service()
+    ocr = create_ocr_service()
+    cropper = CropService(crops_dir=tempfile.mkdtemp(prefix="idocr_bench_crops_"))
+    crop_maps = []
+    # Crops are computed once so only OCR is measured; each card's files get
+    # their own prefix, so one directory holds them all
+    for path in paths:
+        image, _ = load_image_with_scale(path)
+        crop_maps.append(cropper.crop_regions(image, detector.detect(image)))
+    return ocr.process_crops, crop_maps
+
+
+def build_upload(paths: Sequence[str]) -> Tuple[Callable[[Any], None], List[Any]]:
+    from app import create_app
+
+    app = create_app()
+    local = threading.local()
+
+    def post(item: Tuple[str, bytes]) -> None:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        name, data = item
+        resp = client.post("/upload", data={"image": (io.BytesIO(data), name)})
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+
+    return post, _read_bytes(paths)
+
+
+def build_http(paths: Sequence[str], url: str) -> Tuple[Callable[[Any], None], List[Any]]:
+    import requests
+
+    endpoint = url.rstrip("/") + "/upload"
+    local = threading.local()
+
+    def post(item: Tuple[str, bytes]) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        name, data = item
+        resp = session.post(endpoint, files={"image": (name, data, "image/jpeg")}, timeout=300)
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+
+    return post, _read_bytes(paths)
+
+
+def build_pipeline(paths: Sequence[str]) -> Tuple[Callable[[Any], None], List[Any]]:
+    from services.backends import create_detection_service, create_ocr_service
+    from services.crop_service import CropService
+    from services.pipeline import CardPipeline
+
+    pipeline = CardPipeline(
+        create_detection_service(), CropService(crops_dir=tempfile.mkdtemp(prefix="idocr_bench_crops_")), create_ocr_service()
+    )
+
+    def run(item: Tuple[str, bytes]) -> None:
+        pipeline.submit(item[1]).result()
+
+    return run, _read_bytes(paths)
+
+
+def build_startup(paths: Sequence[str]) -> Tuple[Callable[[Any], None], List[Any]]:
+    from benchmarks.import_profile import measure_startup
+
+    def start(_: Any) -> None:
+        result = measure_startup()
+        if result["health_status"] != 200:
+            raise RuntimeError(f"/api/health returned HTTP {result['health_status']}")
+
+    # Each item is one cold start; the corpus is not used
+    return start, list(range(STARTUP_RUNS))
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compare results to a baseline run. A regression is throughput dropping or
+    p95 latency rising by more than `tolerance` (fraction).
+    """
+    base_index = {
+        (r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])
+    }
+    regressions = []
+    print("\nComparison against baseline:")
+    print(f"  {'scenario':<10} {'conc':>4} {'cards/s':>18} {'p95 ms':>22}")
+    for r in results:
+        base = base_index.get((r["scenario"], r["concurrency"]))
+        if not base:
+            continue
+        tput_delta = (
+            (r["cards_per_sec"] - base["cards_per_sec"]) / base["cards_per_sec"]
+            if base["cards_per_sec"]
+            else 0.0
+        )
+        p95_delta = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        print(
+            f"  {r['scenario']:<10} {r['concurrency']:>4} "
+            f"{base['cards_per_sec']:>7.2f} -> {r['cards_per_sec']:>7.2f} ({tput_delta:+.1%}) "
+            f"{base['p95_ms']:>8.1f} -> {r['p95_ms']:>8.1f} ({p95_delta:+.1%})"
+        )
+        if tput_delta < -tolerance:
+            regressions.append(
+                f"{r['scenario']}@{r['concurrency']}: throughput {tput_delta:+.1%}"
+            )
+        if p95_delta > tolerance:
+            regressions.append(f"{r['scenario']}@{r['concurrency']}: p95 {p95_delta:+.1%}")
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ID OCR pipeline")
+    parser.add_argument("--scenarios", default="detection,ocr,upload",
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,2,4",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--corpus", default=os.path.join(BENCH_DIR, "corpus"),
+                        help="Directory of card images (generated if missing or empty)")
+    parser.add_argument("--cards", type=int, default=16, help="Synthetic cards to generate")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for synthetic cards")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per level")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed calls before measuring")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server URL for http scenario")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Also write results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed regression as a fraction (default 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if the baseline comparison finds regressions")
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    if os.path.isdir(args.corpus) and load_corpus(args.corpus):
+        paths = load_corpus(args.corpus)
+    else:
+        paths = generate_corpus(args.corpus, args.cards, args.seed)
+    print(f"Corpus: {len(paths)} images from {args.corpus}")
+
+    results: List[Dict[str, Any]] = []
+    for scenario in scenarios:
+        print(f"\n[{scenario}] preparing...")
+        try:
+            if scenario == "detection":
+                fn, items = build_detection(paths)
+            elif scenario == "ocr":
+                fn, items = build_ocr(paths)
+            elif scenario == "upload":
+                fn, items = build_upload(paths)
+            elif scenario == "pipeline":
+                fn, items = build_pipeline(paths)
+            elif scenario == "startup":
+                fn, items = build_startup(paths)
+            else:
+                fn, items = build_http(paths, args.url)
+        except Exception as e:
+            print(f"[{scenario}] skipped: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+
+        # Warm-up covers lazy model loading and first-call allocations
+        for item in items[: args.warmup]:
+            try:
+                fn(item)
+            except Exception as e:
+                print(f"[{scenario}] warm-up error: {e}", file=sys.stderr)
+
+        for level in levels:
+            latencies, errors, wall = run_load(fn, items, level, args.repeat)
+            summary = summarize(scenario, level, latencies, errors, wall)
+            results.append(summary)
+            print(
+                f"[{scenario}] concurrency={level:<3} cards/s={summary['cards_per_sec']:<8} "
+                f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms "
+                f"p99={summary['p99_ms']}ms errors={errors}"
+            )
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": os.path.abspath(args.corpus),
+            "corpus_size": len(paths),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            if args.fail_on_regression:
+                return 1
+        else:
+            print("\nNo regressions beyond tolerance.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
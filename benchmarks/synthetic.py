@@ -0,0 +1,67 @@
+"""Deterministic synthetic ID-card images for benchmarking."""
+
+import os
+from typing import List
+
+import cv2
+import numpy as np
+
+
+CARD_SIZE = (1012, 638)  # width, height (ID-1 aspect ratio at ~300 DPI)
+
+
+def make_card(index: int, size=CARD_SIZE, seed: int = 1234) -> np.ndarray:
+    """Draw a single synthetic card as a BGR array."""
+    rng = np.random.default_rng(seed + index)
+    width, height = size
+
+    # Paper-like background with mild noise
+    base = np.array([200, 215, 225], dtype=np.int16) + rng.integers(-10, 10, 3)
+    card = np.full((height, width, 3), base, dtype=np.int16)
+    card += rng.integers(-6, 6, (height, width, 1), dtype=np.int16)
+    card = np.clip(card, 0, 255).astype(np.uint8)
+
+    # Photo block on the left
+    cv2.rectangle(card, (40, 120), (300, 460), (120, 110, 100), -1)
+    cv2.circle(card, (170, 250), 70, (170, 160, 150), -1)
+
+    # Text lines laid out like Name1, Name2, Add1, Add2, Num1, Num2
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    lines = [
+        (f"NAME {index:04d}", (380, 160), 1.2),
+        (f"FAMILY {rng.integers(1000, 9999)}", (380, 220), 1.2),
+        (f"STREET {rng.integers(1, 200)} BLOCK {rng.integers(1, 50)}", (380, 300), 1.0),
+        (f"DISTRICT {rng.integers(1, 30)}", (380, 350), 1.0),
+        ("".join(str(d) for d in rng.integers(0, 10, 14)), (380, 500), 1.4),
+        ("".join(str(d) for d in rng.integers(0, 10, 6)), (60, 590), 0.9),
+    ]
+    for text, origin, scale in lines:
+        cv2.putText(card, text, origin, font, scale, (20, 20, 20), 2, cv2.LINE_AA)
+
+    # Place the card on a darker background, like a phone photo of a card
+    margin = 60
+    canvas = np.full((height + 2 * margin, width + 2 * margin, 3), 60, dtype=np.uint8)
+    canvas[margin:margin + height, margin:margin + width] = card
+    return canvas
+
+
+def generate_corpus(directory: str, count: int, seed: int = 1234) -> List[str]:
+    """Write `count` JPEG cards to directory (reusing existing files) and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"card_{seed}_{i:04d}.jpg")
+        if not os.path.exists(path):
+            cv2.imwrite(path, make_card(i, seed=seed), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        paths.append(path)
+    return paths
+
+
+def load_corpus(directory: str) -> List[str]:
+    """Return sorted image paths from an existing corpus directory."""
+    exts = (".jpg", ".jpeg", ".png", ".webp")
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(exts)
+    )
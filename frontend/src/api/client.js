@@ -47,7 +47,7 @@ class ApiClient {
     });
   }
 
-  async crop(imagePath, boxes) {
+  async crop(imagePath, boxes, sessionId = null) {
     return this.request('/api/crop', {
       method: 'POST',
       headers: {
@@ -56,11 +56,12 @@ class ApiClient {
       body: JSON.stringify({
         image_path: imagePath,
         boxes: boxes,
+        session_id: sessionId,
       }),
     });
   }
 
-  async ocr(cropMap) {
+  async ocr(cropMap, sessionId = null) {
     return this.request('/api/ocr', {
       method: 'POST',
       headers: {
@@ -68,6 +69,7 @@ class ApiClient {
       },
       body: JSON.stringify({
         crop_map: cropMap,
+        session_id: sessionId,
       }),
     });
   }
@@ -14,6 +14,7 @@ export const AppProvider = ({ children }) => {
   const [imageFile, setImageFile] = useState(null);
   const [imageUrl, setImageUrl] = useState(null);
   const [imagePath, setImagePath] = useState(null);
+  const [sessionId, setSessionId] = useState(null);
   const [boxes, setBoxes] = useState({});
   const [selectedBoxes, setSelectedBoxes] = useState(new Set());
   const [cropMap, setCropMap] = useState({});
@@ -26,6 +27,7 @@ export const AppProvider = ({ children }) => {
     setImageFile(null);
     setImageUrl(null);
     setImagePath(null);
+    setSessionId(null);
     setBoxes({});
     setSelectedBoxes(new Set());
     setCropMap({});
@@ -40,6 +42,7 @@ export const AppProvider = ({ children }) => {
     imageFile,
     imageUrl,
     imagePath,
+    sessionId,
     boxes,
     selectedBoxes,
     cropMap,
@@ -51,6 +54,7 @@ export const AppProvider = ({ children }) => {
     setImageFile,
     setImageUrl,
     setImagePath,
+    setSessionId,
     setBoxes,
     setSelectedBoxes,
     setCropMap,
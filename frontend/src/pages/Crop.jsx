@@ -12,6 +12,7 @@ export default function Crop() {
   const {
     crops,
     cropMap,
+    sessionId,
     loading,
     setOcrResult,
     setLoading,
@@ -33,7 +34,7 @@ export default function Crop() {
     setLocalError(null);
 
     try {
-      const result = await apiClient.ocr(cropMap);
+      const result = await apiClient.ocr(cropMap, sessionId);
       setOcrResult(result.result);
       navigate('/result');
     } catch (err) {
@@ -13,6 +13,7 @@ export default function Detect() {
   const {
     imageUrl,
     imagePath,
+    sessionId,
     boxes,
     selectedBoxes,
     setSelectedBoxes,
@@ -91,7 +92,7 @@ export default function Detect() {
         }
       });
 
-      const result = await apiClient.crop(imagePath, filteredBoxes);
+      const result = await apiClient.crop(imagePath, filteredBoxes, sessionId);
       
       setCropMap(result.crop_map);
       setCrops(result.crops);
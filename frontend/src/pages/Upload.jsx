@@ -7,7 +7,7 @@ import Loading from '../components/Loading';
 
 export default function Upload() {
   const navigate = useNavigate();
-  const { imageFile, setImageFile, setImageUrl, setImagePath, setBoxes, setLoading, setError, reset } = useApp();
+  const { imageFile, setImageFile, setImageUrl, setImagePath, setSessionId, setBoxes, setLoading, setError, reset } = useApp();
   const [preview, setPreview] = useState(null);
   const [localError, setLocalError] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
@@ -46,6 +46,7 @@ export default function Upload() {
     try {
       const result = await apiClient.detect(imageFile);
       setImagePath(result.image_path);
+      setSessionId(result.session_id || null);
       setImageUrl(result.image_url || `/static/uploads/${result.image_path.split('/').pop()}`);
       setBoxes(result.boxes || {});
       navigate('/detect');
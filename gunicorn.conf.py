@@ -0,0 +1,71 @@
+"""Gunicorn configuration (POSIX only).
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+"""
+
+import os
+
+_max_in_flight = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "2"))
+_max_queue = int(os.environ.get("ADMISSION_MAX_QUEUE", "8"))
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+
+# Each worker holds its own detector and PaddleOCR models, so keep this low
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# Queued requests hold a thread in WSGI mode; leave room for health checks too
+threads = int(os.environ.get("GUNICORN_THREADS", str(_max_in_flight + _max_queue + 2)))
+
+timeout = int(os.environ.get("WORKER_TIMEOUT", "120"))
+# On SIGTERM/recycle, in-flight OCR jobs get this long to finish
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "60"))
+
+# Recycle workers periodically to bound PaddleOCR memory growth
+max_requests = int(os.environ.get("MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "100"))
+
+# Models are loaded per worker after fork; forking with initialized
+# torch/paddle thread pools is not safe
+preload_app = False
+
+accesslog = os.environ.get("ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    """Give each worker a stable slot so CPU_AFFINITY=auto reuses core sets after recycling."""
+    used = {getattr(w, "cpu_slot", None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+
+def post_fork(server, worker):
+    from services.runtime_config import pin_worker
+
+    # The master replaces exited workers, so the memory watchdog may recycle
+    os.environ["MEMORY_WATCHDOG_SUPERVISED"] = "1"
+
+    cores = pin_worker(worker.cpu_slot, server.num_workers)
+    if cores:
+        server.log.info("Worker %s pinned to cores %s", worker.pid, cores)
+
+
+def post_worker_init(worker):
+    """Warm up models before the worker starts accepting requests."""
+    from services.utils import env_flag
+
+    if not env_flag("PRELOAD_MODELS", "1"):
+        return
+    flask_app = worker.wsgi
+    # Under the uvicorn worker this is the ASGI front-end; it warms up in lifespan
+    if hasattr(flask_app, "extensions"):
+        from app import warm_up
+
+        warm_up(flask_app)
+
+
+def worker_int(worker):
+    worker.log.info("Worker %s interrupted", worker.pid)
+
+
+def worker_exit(server, worker):
+    server.log.info("Worker %s exited (drained or recycled)", worker.pid)
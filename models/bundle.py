@@ -0,0 +1,260 @@
+"""Local model bundle (detector checkpoint + PaddleOCR models) for offline use.
+
+    python -m models.bundle prefetch --bundle-dir model_bundle
+    python -m models.bundle verify --bundle-dir model_bundle
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from services.utils import env_flag
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# PaddleOCR model names are pinned so the bundle and the server always agree.
+# Override with OCR_<LANG>_DET_MODEL / OCR_<LANG>_REC_MODEL.
+DEFAULT_OCR_MODELS: Dict[str, Dict[str, str]] = {
+    "ar": {"det": "PP-OCRv5_server_det", "rec": "arabic_PP-OCRv3_mobile_rec"},
+    "en": {"det": "PP-OCRv5_server_det", "rec": "en_PP-OCRv4_mobile_rec"},
+}
+
+
+class BundleError(RuntimeError):
+    """The model bundle is missing, incomplete or fails verification."""
+
+
+def bundle_dir() -> str:
+    return os.environ.get("MODEL_BUNDLE_DIR", "model_bundle")
+
+
+def offline_mode() -> bool:
+    return env_flag("MODEL_OFFLINE", "0")
+
+
+def ocr_model_names(lang: str) -> Dict[str, str]:
+    """Pinned PaddleOCR detection/recognition model names for a language."""
+    defaults = DEFAULT_OCR_MODELS[lang]
+    prefix = f"OCR_{lang.upper()}"
+    return {
+        "det": os.environ.get(f"{prefix}_DET_MODEL", defaults["det"]),
+        "rec": os.environ.get(f"{prefix}_REC_MODEL", defaults["rec"]),
+    }
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _paddlex_models_dir() -> str:
+    # Where PaddleOCR 3.x (PaddleX) caches downloaded official models
+    cache_home = os.environ.get("PADDLE_PDX_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".paddlex"))
+    return os.path.join(cache_home, "official_models")
+
+
+class ModelBundle:
+    """A bundle directory and its manifest."""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or bundle_dir()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._verified = False
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            if not self.exists():
+                raise BundleError(
+                    f"Model bundle manifest not found at {self.manifest_path}; "
+                    "run `python -m models.bundle prefetch` first"
+                )
+            with open(self.manifest_path, "r", encoding="utf-8") as fh:
+                self._manifest = json.load(fh)
+        return self._manifest
+
+    def verify(self) -> float:
+        """Check size and sha256 of every file in the manifest. Returns seconds taken."""
+        start = time.perf_counter()
+        problems = []
+        for rel, meta in self.manifest.get("files", {}).items():
+            path = os.path.join(self.root, rel)
+            if not os.path.isfile(path):
+                problems.append(f"missing {rel}")
+            elif os.path.getsize(path) != meta["size"]:
+                problems.append(f"size mismatch {rel}")
+            elif sha256_file(path) != meta["sha256"]:
+                problems.append(f"checksum mismatch {rel}")
+        if problems:
+            shown = "; ".join(problems[:5])
+            more = f" (+{len(problems) - 5} more)" if len(problems) > 5 else ""
+            raise BundleError(f"Model bundle {self.root} failed verification: {shown}{more}")
+        return time.perf_counter() - start
+
+    def ensure_verified(self) -> None:
+        """Verify once per process unless MODEL_BUNDLE_VERIFY=0."""
+        if not env_flag("MODEL_BUNDLE_VERIFY", "1"):
+            return
+        with self._lock:
+            if not self._verified:
+                elapsed = self.verify()
+                print(f"Model bundle {self.root} verified in {elapsed:.2f}s")
+                self._verified = True
+
+    def detector_path(self) -> str:
+        rel = self.manifest.get("detector")
+        if not rel:
+            raise BundleError(f"Model bundle {self.root} has no detector checkpoint")
+        self.ensure_verified()
+        return os.path.join(self.root, rel)
+
+    def paddle_kwargs(self, lang: str) -> Dict[str, str]:
+        """PaddleOCR(...) keyword arguments pointing at the bundled model dirs."""
+        entry = self.manifest.get("paddleocr", {}).get(lang)
+        if not entry:
+            raise BundleError(f"Model bundle {self.root} has no PaddleOCR models for '{lang}'")
+        self.ensure_verified()
+        return {
+            "text_detection_model_name": entry["det"]["name"],
+            "text_detection_model_dir": os.path.join(self.root, entry["det"]["dir"]),
+            "text_recognition_model_name": entry["rec"]["name"],
+            "text_recognition_model_dir": os.path.join(self.root, entry["rec"]["dir"]),
+        }
+
+
+_bundle: Optional[ModelBundle] = None
+
+
+def get_bundle() -> ModelBundle:
+    global _bundle
+    if _bundle is None:
+        _bundle = ModelBundle()
+    return _bundle
+
+
+def apply_offline_env() -> None:
+    """Stop Hugging Face and PaddleX from reaching the network in offline mode."""
+    if offline_mode():
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
+
+
+def paddle_model_kwargs(lang: str) -> Dict[str, str]:
+    """
+    PaddleOCR model arguments: bundled dirs in offline mode, otherwise the
+    pinned model names (downloaded by PaddleOCR if not cached).
+    """
+    if offline_mode():
+        return get_bundle().paddle_kwargs(lang)
+    names = ocr_model_names(lang)
+    return {
+        "text_detection_model_name": names["det"],
+        "text_recognition_model_name": names["rec"],
+    }
+
+
+def _copy_tree(src: str, dst: str) -> None:
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    shutil.copytree(src, dst)
+
+
+def prefetch(root: str) -> Dict[str, Any]:
+    """Download (if needed) and copy every model into `root`, then write the manifest."""
+    # Imported here: the loaders pull in torch/paddle and may hit the network
+    from models.model_loader import ModelLoader
+
+    os.makedirs(root, exist_ok=True)
+    manifest: Dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "paddleocr": {},
+        "files": {},
+    }
+
+    weights = ModelLoader(num_classes=0)._resolve_weights_path(allow_bundle=False)
+    detector_rel = os.path.join("detector", os.path.basename(weights))
+    os.makedirs(os.path.join(root, "detector"), exist_ok=True)
+    shutil.copy2(weights, os.path.join(root, detector_rel))
+    manifest["detector"] = detector_rel.replace(os.sep, "/")
+    print(f"Detector: {weights}")
+
+    from paddleocr import PaddleOCR
+
+    models_dir = _paddlex_models_dir()
+    for lang in DEFAULT_OCR_MODELS:
+        names = ocr_model_names(lang)
+        # Instantiating downloads the pinned models into the PaddleX cache
+        PaddleOCR(
+            lang=lang,
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False,
+            text_detection_model_name=names["det"],
+            text_recognition_model_name=names["rec"],
+        )
+        entry: Dict[str, Dict[str, str]] = {}
+        for kind, name in names.items():
+            src = os.path.join(models_dir, name)
+            if not os.path.isdir(src):
+                raise BundleError(f"PaddleOCR model {name} not found in {models_dir}")
+            rel = f"paddleocr/{name}"
+            _copy_tree(src, os.path.join(root, rel))
+            entry[kind] = {"name": name, "dir": rel}
+            print(f"PaddleOCR {lang} {kind}: {name}")
+        manifest["paddleocr"][lang] = entry
+
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel == MANIFEST_NAME:
+                continue
+            manifest["files"][rel] = {"sha256": sha256_file(path), "size": os.path.getsize(path)}
+
+    with open(os.path.join(root, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or verify the local model bundle")
+    parser.add_argument("command", choices=("prefetch", "verify"))
+    parser.add_argument("--bundle-dir", default=bundle_dir(), help="Bundle directory")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "prefetch":
+            manifest = prefetch(args.bundle_dir)
+            total = sum(meta["size"] for meta in manifest["files"].values())
+            print(f"Bundle written to {args.bundle_dir}: {len(manifest['files'])} files, {total / 1e6:.1f} MB")
+        else:
+            elapsed = ModelBundle(args.bundle_dir).verify()
+            print(f"Bundle {args.bundle_dir} OK ({elapsed:.2f}s)")
+    except BundleError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
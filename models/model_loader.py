@@ -1,8 +1,9 @@
 import os
-from typing import Any
+from typing import Any, Optional
 
 import torch
-from huggingface_hub import hf_hub_download
+
+from models.bundle import get_bundle, offline_mode
 
 
 class ModelLoader:
@@ -11,28 +12,48 @@ class ModelLoader:
 
     Resolution priority for weights:
     1. Explicit local path via MODEL_WEIGHTS_PATH (if file exists)
-    2. Local file next to this module: fasterrcnn_custom_epoch_10.pth
-    3. Download from Hugging Face Hub (defaults to
+    2. The verified model bundle (MODEL_BUNDLE_DIR), if one exists; with
+       MODEL_OFFLINE=1 this is the only other source and is required
+    3. Local file next to this module: fasterrcnn_custom_epoch_10.pth
+    4. Download from Hugging Face Hub (defaults to
        'Sayedabdalsamie/Area_detection_for_ID_OCR', overridable via env).
+
+    An explicit `weights_path` bypasses this resolution. The model is loaded
+    onto `device` (a torch device string, "cpu" by default).
     """
 
-    def __init__(self, num_classes: int) -> None:
+    def __init__(self, num_classes: int, device: str = "cpu", weights_path: Optional[str] = None) -> None:
         self.num_classes = num_classes
+        self.device = device
+        # Explicit checkpoint (e.g. a candidate version loaded via the admin API)
+        self.weights_path = weights_path
 
-    def _resolve_weights_path(self) -> str:
+    def _resolve_weights_path(self, allow_bundle: bool = True) -> str:
         """Return a local path to the weights, downloading from HF if needed."""
+        if self.weights_path:
+            if not os.path.exists(self.weights_path):
+                raise RuntimeError(f"Detector weights file does not exist: {self.weights_path}")
+            return self.weights_path
+
         # 1) Explicit path via env
         env_path = os.environ.get("MODEL_WEIGHTS_PATH", "").strip()
         if env_path and os.path.exists(env_path):
             return env_path
 
-        # 2) Default local file next to this module
+        # 2) Pre-fetched bundle (checksums verified); never download when offline
+        bundle = get_bundle()
+        if offline_mode():
+            return bundle.detector_path()
+        if allow_bundle and bundle.exists():
+            return bundle.detector_path()
+
+        # 3) Default local file next to this module
         models_dir = os.path.dirname(__file__)
         default_local = os.path.join(models_dir, "fasterrcnn_custom_epoch_10.pth")
         if os.path.exists(default_local):
             return default_local
 
-        # 3) Download from Hugging Face Hub
+        # 4) Download from Hugging Face Hub
         repo_id = os.environ.get(
             "HF_MODEL_REPO", "Sayedabdalsamie/Area_detection_for_ID_OCR"
         )
@@ -41,6 +62,8 @@ class ModelLoader:
         )
 
         try:
+            from huggingface_hub import hf_hub_download
+
             weights_path = hf_hub_download(repo_id=repo_id, filename=filename)
         except Exception as e:
             raise RuntimeError(
@@ -79,7 +102,7 @@ class ModelLoader:
             )
 
         try:
-            state = torch.load(weights_path, map_location="cpu")
+            state = torch.load(weights_path, map_location=self.device)
             try:
                 model.load_state_dict(state, strict=False)
             except RuntimeError as e:
@@ -95,4 +118,5 @@ class ModelLoader:
             raise RuntimeError(f"Failed to load model weights: {e}")
 
         model.eval()
+        model.to(self.device)
         return model
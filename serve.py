@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Production launcher for the backend: gunicorn on POSIX, uvicorn on Windows."""
+
+import argparse
+import os
+import platform
+import subprocess
+import sys
+from typing import List, Optional, Sequence
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_command(args: argparse.Namespace) -> List[str]:
+    """Return the server command line for the current platform."""
+    if platform.system() == "Windows" or args.server == "uvicorn":
+        cmd = [
+            sys.executable, "-m", "uvicorn", "asgi:app",
+            "--host", args.host,
+            "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--timeout-graceful-shutdown", str(args.graceful_timeout),
+        ]
+        if args.max_requests:
+            cmd += ["--limit-max-requests", str(args.max_requests)]
+        return cmd
+
+    cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT_DIR, "gunicorn.conf.py")]
+    if args.asgi:
+        cmd += ["-k", "uvicorn.workers.UvicornWorker", "asgi:app"]
+    else:
+        cmd += ["app:create_app()"]
+    return cmd
+
+
+def build_env(args: argparse.Namespace) -> dict:
+    """Pass CLI settings to gunicorn.conf.py / asgi.py through the environment."""
+    env = os.environ.copy()
+    env.update(
+        {
+            "HOST": args.host,
+            "PORT": str(args.port),
+            "WEB_CONCURRENCY": str(args.workers),
+            "GRACEFUL_TIMEOUT": str(args.graceful_timeout),
+            "MAX_REQUESTS": str(args.max_requests),
+            "PRELOAD_MODELS": "1" if args.preload else "0",
+            "PYTHONUNBUFFERED": "1",
+        }
+    )
+    if args.threads:
+        env["GUNICORN_THREADS"] = str(args.threads)
+    if args.server == "uvicorn" or platform.system() == "Windows":
+        # uvicorn only restarts exited workers in multi-process mode
+        env["MEMORY_WATCHDOG_SUPERVISED"] = "1" if args.workers > 1 else "0"
+    return env
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the OCR backend with a production server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Worker processes (each loads its own models)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Threads per gunicorn worker (default: admission in-flight + queue + 2)")
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("MAX_REQUESTS", "1000")),
+                        help="Recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--graceful-timeout", type=int,
+                        default=int(os.environ.get("GRACEFUL_TIMEOUT", "60")),
+                        help="Seconds to drain in-flight requests on shutdown/recycle")
+    parser.add_argument("--asgi", action="store_true", help="Serve asgi:app with uvicorn workers")
+    parser.add_argument("--server", choices=("gunicorn", "uvicorn"), default="gunicorn",
+                        help="Server to use on POSIX (Windows always uses uvicorn)")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="Do not warm up models before accepting traffic")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.join(ROOT_DIR, "static", "uploads"), exist_ok=True)
+    os.makedirs(os.path.join(ROOT_DIR, "static", "crops"), exist_ok=True)
+
+    cmd = build_command(args)
+    print(f"Starting: {' '.join(cmd)}")
+    env = build_env(args)
+    if platform.system() != "Windows":
+        # Replace this process so the server receives signals directly
+        os.chdir(ROOT_DIR)
+        os.execvpe(cmd[0], cmd, env)
+    return subprocess.call(cmd, cwd=ROOT_DIR, env=env)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+from services.metrics import REGISTRY
+from services.utils import env_flag
+
+
+# Routes that run detection/crop/OCR and therefore need admission control
+INFERENCE_PATHS = frozenset(
+    {
+        "/api/detect",
+        "/api/crop",
+        "/api/ocr",
+        "/api/batch",
+        "/api/sheet",
+        "/upload",
+        "/ocr_only",
+        "/detect_only",
+    }
+)
+
+# Inference routes with a path parameter (/api/stream/<id>/frames, .../finish)
+INFERENCE_PREFIXES = ("/api/stream/",)
+
+
+def is_inference_path(path: str) -> bool:
+    return path in INFERENCE_PATHS or path.startswith(INFERENCE_PREFIXES)
+
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "idocr_admission_in_flight",
+    "Inference requests currently admitted.",
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "idocr_admission_queued",
+    "Inference requests waiting for a slot.",
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "idocr_admission_rejected_total",
+    "Inference requests rejected by admission control, by reason.",
+    ("reason",),
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "idocr_admission_wait_seconds",
+    "Time admitted requests spent queued.",
+)
+
+
+class AdmissionRejected(Exception):
+    """Request was not admitted; carries the HTTP status and Retry-After hint."""
+
+    def __init__(self, status: int, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self) -> dict:
+        return {"error": f"Server busy: {self.reason}", "retry_after": self.retry_after}
+
+
+def draining_rejected() -> AdmissionRejected:
+    """Rejection for inference requests while the worker drains before a recycle."""
+    ADMISSION_REJECTED.inc(reason="draining")
+    retry_after = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    return AdmissionRejected(503, "worker is recycling", retry_after)
+
+
+def admission_enabled() -> bool:
+    return env_flag("ADMISSION_ENABLED", "1")
+
+
+class _AdmissionSettings:
+    """Limits shared by the sync and async controllers."""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        # Explicit values win even when 0 (e.g. queue_timeout=0: never wait)
+        self.max_in_flight = (
+            max_in_flight
+            if max_in_flight is not None
+            else int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "2"))
+        )
+        self.max_queue = (
+            max_queue if max_queue is not None else int(os.environ.get("ADMISSION_MAX_QUEUE", "8"))
+        )
+        self.queue_timeout = (
+            queue_timeout
+            if queue_timeout is not None
+            else float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+        )
+        self.retry_after = (
+            retry_after
+            if retry_after is not None
+            else int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+        )
+
+    def queue_full(self) -> AdmissionRejected:
+        ADMISSION_REJECTED.inc(reason="queue_full")
+        return AdmissionRejected(429, "inference queue is full", self.retry_after)
+
+    def queue_timeout_exceeded(self) -> AdmissionRejected:
+        ADMISSION_REJECTED.inc(reason="queue_timeout")
+        return AdmissionRejected(
+            503, f"no inference slot within {self.queue_timeout:g}s", self.retry_after
+        )
+
+
+class AdmissionController(_AdmissionSettings):
+    """
+    Thread-based admission controller for the WSGI server.
+
+    At most `max_in_flight` requests run inference at once and at most
+    `max_queue` wait for a slot. A full queue is rejected immediately with 429;
+    a request that waits longer than `queue_timeout` is rejected with 503.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+
+    def acquire(self) -> None:
+        """Block until a slot is free; raises AdmissionRejected otherwise."""
+        start = time.perf_counter()
+        with self._cond:
+            if self._in_flight < self.max_in_flight and self._waiting == 0:
+                self._in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self._in_flight)
+                ADMISSION_WAIT.observe(0.0)
+                return
+            if self._waiting >= self.max_queue:
+                raise self.queue_full()
+
+            self._waiting += 1
+            ADMISSION_QUEUED.set(self._waiting)
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._in_flight < self.max_in_flight, timeout=self.queue_timeout
+                )
+                if not admitted:
+                    raise self.queue_timeout_exceeded()
+                self._in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self._in_flight)
+            finally:
+                self._waiting -= 1
+                ADMISSION_QUEUED.set(self._waiting)
+        ADMISSION_WAIT.observe(time.perf_counter() - start)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            self._cond.notify()
+
+
+class AsyncAdmissionController(_AdmissionSettings):
+    """
+    asyncio admission controller for the ASGI front-end.
+
+    Same limits as AdmissionController, but queued requests wait on the event
+    loop instead of holding a worker thread.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._cond: Optional[asyncio.Condition] = None
+        self._in_flight = 0
+        self._waiting = 0
+
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def saturated(self) -> bool:
+        """True if a new request would be rejected immediately (queue full)."""
+        return self._in_flight >= self.max_in_flight and self._waiting >= self.max_queue
+
+    async def acquire(self) -> None:
+        """Wait for a slot; raises AdmissionRejected otherwise."""
+        cond = self._condition()
+        start = time.perf_counter()
+        async with cond:
+            if self._in_flight < self.max_in_flight and self._waiting == 0:
+                self._in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self._in_flight)
+                ADMISSION_WAIT.observe(0.0)
+                return
+            if self._waiting >= self.max_queue:
+                raise self.queue_full()
+
+            self._waiting += 1
+            ADMISSION_QUEUED.set(self._waiting)
+            try:
+                await asyncio.wait_for(
+                    cond.wait_for(lambda: self._in_flight < self.max_in_flight),
+                    timeout=self.queue_timeout,
+                )
+                self._in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self._in_flight)
+            except asyncio.TimeoutError:
+                # A release may have notified this waiter just as it timed out;
+                # hand that wakeup on so the free slot is not left idle
+                if self._in_flight < self.max_in_flight:
+                    cond.notify()
+                raise self.queue_timeout_exceeded()
+            finally:
+                self._waiting -= 1
+                ADMISSION_QUEUED.set(self._waiting)
+        ADMISSION_WAIT.observe(time.perf_counter() - start)
+
+    async def release(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            cond.notify()
@@ -0,0 +1,180 @@
+"""Model backend selection (DETECTION_BACKEND / OCR_BACKEND = real or stub).
+
+Stub backends subclass the real services and return fixed boxes and texts
+after a synthetic latency, so everything but the models can be load-tested.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.detection_service import Box, DetectionService
+from services.image_io import ImageSource, load_image
+from services.metrics import MODEL_LOAD_SECONDS, time_stage
+from services.ocr_service import OCRService
+from services.utils import to_eastern_arabic_numerals
+
+
+BACKENDS = ("real", "stub")
+
+# Field boxes as fractions of the image (x1, y1, x2, y2), laid out like
+# benchmarks/synthetic.py cards
+STUB_LAYOUT: Dict[str, Tuple[float, float, float, float]] = {
+    "Name1": (0.38, 0.24, 0.90, 0.31),
+    "Name2": (0.38, 0.32, 0.90, 0.39),
+    "Add1": (0.38, 0.43, 0.95, 0.50),
+    "Add2": (0.38, 0.50, 0.90, 0.57),
+    "Num1": (0.38, 0.68, 0.90, 0.76),
+    "BD": (0.06, 0.74, 0.30, 0.81),
+    "Num2": (0.06, 0.83, 0.30, 0.90),
+}
+
+# Num1 is a valid national ID (born 1990-01-01) so BD derivation runs for real
+STUB_TEXTS: Dict[str, str] = {
+    "Name1": "محمد",
+    "Name2": "أحمد علي حسن",
+    "Add1": "١٢ شارع التحرير",
+    "Add2": "الدقي - الجيزة",
+    "Num1": to_eastern_arabic_numerals("29001010123456"),
+    "Num2": "AB1234567",
+}
+STUB_SCORE = 0.99
+
+
+def _backend(name: str) -> str:
+    backend = os.environ.get(name, "real").strip().lower() or "real"
+    if backend not in BACKENDS:
+        raise ValueError(f"{name} must be one of {', '.join(BACKENDS)}, got '{backend}'")
+    return backend
+
+
+class SyntheticLatency:
+    """Waits a configured number of milliseconds, optionally jittered and CPU-bound."""
+
+    def __init__(self, env_name: str, default_ms: str) -> None:
+        self.base_ms = float(os.environ.get(env_name, default_ms))
+        self.jitter = float(os.environ.get("STUB_LATENCY_JITTER", "0"))
+        self.mode = os.environ.get("STUB_LATENCY_MODE", "sleep").strip().lower()
+        self._rng = random.Random(int(os.environ.get("STUB_SEED", "1234")))
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        ms = self.base_ms
+        if self.jitter:
+            with self._lock:
+                ms *= 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+        seconds = max(0.0, ms / 1000.0)
+        if self.mode == "spin":
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                pass
+        else:
+            time.sleep(seconds)
+
+
+def _simulate_load(model: str) -> None:
+    start = time.perf_counter()
+    time.sleep(float(os.environ.get("STUB_LOAD_SECONDS", "0")))
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=model)
+
+
+class StubDetectionService(DetectionService):
+    """Detector returning STUB_LAYOUT boxes scaled to the image, without torch."""
+
+    def __init__(self, weights_path: Optional[str] = None) -> None:
+        super().__init__(weights_path=weights_path)
+        self.latency = SyntheticLatency("STUB_DETECT_LATENCY_MS", "40")
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                return
+            self._loading = True
+            try:
+                _simulate_load("detector")
+                self._model = "stub"
+            finally:
+                self._loading = False
+
+    def _detect_batch(self, images: Sequence[ImageSource]) -> List[Dict[str, Box]]:
+        self.model
+        sizes = [load_image(image).shape[:2] for image in images]
+        # One synthetic forward pass per batch, like the batched detector
+        with time_stage("detection_forward"):
+            self.latency.wait()
+        return [
+            {
+                label: (int(x1 * w), int(y1 * h), int(x2 * w), int(y2 * h))
+                for label, (x1, y1, x2, y2) in STUB_LAYOUT.items()
+            }
+            for h, w in sizes
+        ]
+
+
+class _StubPredictor:
+    """Stands in for a PaddleOCR instance (used by run_ocr and warm-up)."""
+
+    def __init__(self, latency: SyntheticLatency) -> None:
+        self.latency = latency
+
+    def predict(self, input: Any) -> List[Dict[str, Any]]:
+        self.latency.wait()
+        return [{"rec_texts": ["STUB"], "rec_scores": [STUB_SCORE]}]
+
+
+class StubOCRService(OCRService):
+    """OCR returning STUB_TEXTS per field, without paddle."""
+
+    def __init__(self, model_overrides: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+        super().__init__(model_overrides=model_overrides)
+        self.latency = SyntheticLatency("STUB_OCR_LATENCY_MS", "25")
+        self._load_lock = threading.Lock()
+
+    def _stub_model(self, lang: str) -> _StubPredictor:
+        attr = f"_ocr_{lang}"
+        with self._load_lock:
+            if getattr(self, attr) is None:
+                _simulate_load(f"ocr_{lang}")
+                setattr(self, attr, _StubPredictor(self.latency))
+        return getattr(self, attr)
+
+    @property
+    def ocr_ar(self) -> _StubPredictor:
+        return self._stub_model("ar")
+
+    @property
+    def ocr_en(self) -> _StubPredictor:
+        return self._stub_model("en")
+
+    def _run_single_ocr_scored(
+        self, image_path: Any, lang: str = "ar", field: str = "unknown"
+    ) -> Tuple[str, float]:
+        model = self.ocr_en if lang == "en" else self.ocr_ar
+        if not self._validate_image(image_path):
+            return "", 0.0
+        # Same preparation cost as the real path, then the synthetic model time
+        image: np.ndarray = self._prepare_image(image_path)
+        model.predict(input=image)
+        return STUB_TEXTS.get(field, "STUB"), STUB_SCORE
+
+
+def create_detection_service(weights_path: Optional[str] = None) -> DetectionService:
+    """DetectionService for DETECTION_BACKEND (real or stub)."""
+    if _backend("DETECTION_BACKEND") == "stub":
+        return StubDetectionService(weights_path=weights_path)
+    return DetectionService(weights_path=weights_path)
+
+
+def create_ocr_service(model_overrides: Optional[Dict[str, Dict[str, str]]] = None) -> OCRService:
+    """OCRService for OCR_BACKEND (real or stub)."""
+    if _backend("OCR_BACKEND") == "stub":
+        return StubOCRService(model_overrides=model_overrides)
+    return OCRService(model_overrides=model_overrides)
+
+
+def describe_backends() -> str:
+    return f"detection={_backend('DETECTION_BACKEND')} ocr={_backend('OCR_BACKEND')}"
@@ -0,0 +1,98 @@
+"""Compact binary responses (MessagePack / CBOR), chosen from the Accept header."""
+
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from flask import Response
+from werkzeug.datastructures import MIMEAccept
+
+from services.metrics import time_stage
+
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CBOR_MIMETYPE = "application/cbor"
+
+# Bump when the compact schema changes incompatibly
+COMPACT_SCHEMA_VERSION = 1
+
+
+def _msgpack_encoder() -> Optional[Callable[[Any], bytes]]:
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return lambda data: msgpack.packb(data, use_bin_type=True)
+
+
+def _cbor_encoder() -> Optional[Callable[[Any], bytes]]:
+    try:
+        import cbor2
+    except ImportError:
+        return None
+    return cbor2.dumps
+
+
+def _available_encoders() -> Dict[str, Callable[[Any], bytes]]:
+    encoders: Dict[str, Callable[[Any], bytes]] = {}
+    msgpack_encode = _msgpack_encoder()
+    if msgpack_encode is not None:
+        for mimetype in MSGPACK_MIMETYPES:
+            encoders[mimetype] = msgpack_encode
+    cbor_encode = _cbor_encoder()
+    if cbor_encode is not None:
+        encoders[CBOR_MIMETYPE] = cbor_encode
+    return encoders
+
+
+ENCODERS = _available_encoders()
+
+
+class NotAcceptableError(ValueError):
+    """The client only accepts formats this server cannot produce."""
+
+
+def negotiate(accept: MIMEAccept) -> Optional[str]:
+    """
+    Return the compact mimetype preferred by the Accept header, or None for JSON.
+    Raises NotAcceptableError if the client asks only for a compact format whose
+    library is not installed; any other Accept value falls back to JSON.
+    """
+    if not accept:
+        return None
+    offered: List[str] = [JSON_MIMETYPE, *ENCODERS]
+    best = accept.best_match(offered)
+    if best is None:
+        known = (*MSGPACK_MIMETYPES, CBOR_MIMETYPE)
+        if any(mimetype in known for mimetype, _ in accept):
+            raise NotAcceptableError(f"Supported response formats: {', '.join(offered)}")
+        return None
+    return None if best == JSON_MIMETYPE else best
+
+
+def compact_boxes(boxes: Mapping[str, Any]) -> Dict[str, List[int]]:
+    """Boxes as plain [x1, y1, x2, y2] int lists."""
+    return {label: [int(v) for v in box] for label, box in boxes.items()}
+
+
+def compact_payload(
+    fields: Optional[Mapping[str, Any]] = None,
+    confidences: Optional[Mapping[str, float]] = None,
+    boxes: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Minimal result schema: no file paths or preview URLs."""
+    payload: Dict[str, Any] = {"v": COMPACT_SCHEMA_VERSION}
+    if fields is not None:
+        payload["fields"] = dict(fields)
+    if confidences is not None:
+        payload["conf"] = {label: round(float(c), 4) for label, c in confidences.items()}
+    if boxes is not None:
+        payload["boxes"] = compact_boxes(boxes)
+    return payload
+
+
+def compact_response(payload: Dict[str, Any], mimetype: str, status: int = 200) -> Response:
+    with time_stage("compact_serialization"):
+        body = ENCODERS[mimetype](payload)
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add("Accept")
+    return response
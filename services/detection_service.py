@@ -1,11 +1,15 @@
 import os
-from typing import Dict, Tuple
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-import torch
-import torchvision.transforms as T
+import cv2
 from PIL import Image
 
-from models.model_loader import ModelLoader
+from services.image_io import ImageSource, load_image
+from services.metrics import MODEL_LOAD_SECONDS, time_stage
+from services.runtime_config import get_runtime_config
+from services.tracing import span
 
 # Class mapping
 CUSTOM_CLASSES: Dict[int, str] = {
@@ -22,29 +26,145 @@ Box = Tuple[int, int, int, int]  # x1, y1, x2, y2
 
 
 class DetectionService:
-    """Handles detection via Faster R-CNN."""
+    """
+    Handles detection via Faster R-CNN.
+
+    torch/torchvision are imported and the model is loaded on first use, or
+    ahead of time on a background thread via start_background_load(), so
+    creating the service (and the app) stays fast.
+    """
+
+    def __init__(self, weights_path: Optional[str] = None) -> None:
+        self.weights_path = weights_path
+        self._model: Optional[Any] = None
+        self._device: Optional[Any] = None
+        self._load_error: Optional[str] = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        """The detector model; loads it (or waits for a background load) if needed."""
+        if self._model is None:
+            self._load()
+        return self._model
+
+    @property
+    def status(self) -> str:
+        """One of not_loaded, loading, ready or failed."""
+        if self._model is not None:
+            return "ready"
+        if self._loading:
+            return "loading"
+        if self._load_error is not None:
+            return "failed"
+        return "not_loaded"
+
+    @property
+    def load_error(self) -> Optional[str]:
+        return self._load_error
+
+    def start_background_load(self) -> None:
+        """Import torch and load the model on a daemon thread."""
+        if self._model is not None or self._loading:
+            return
+        self._loading = True
+        threading.Thread(target=self._background_load, name="detector-load", daemon=True).start()
+
+    def _background_load(self) -> None:
+        try:
+            self._load()
+        except Exception as e:
+            print(f"Warning: Background detector load failed: {str(e)}")
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                return
+            self._loading = True
+            try:
+                # Will raise if model can't be loaded; we want strict behavior
+                import torch
+
+                from models.model_loader import ModelLoader
+
+                runtime = get_runtime_config()
+                runtime.apply_torch()
+                start = time.perf_counter()
+                model = ModelLoader(
+                    num_classes=len(CUSTOM_CLASSES) + 1,
+                    device=runtime.device,
+                    weights_path=self.weights_path,
+                ).load()
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="detector")
+                self._device = torch.device(runtime.device)
+                self._model = model
+                self._load_error = None
+            except Exception as e:
+                self._load_error = str(e)
+                raise
+            finally:
+                self._loading = False
+
+    def detect(self, image: ImageSource) -> Dict[str, Box]:
+        """
+        Returns a mapping from label to bounding box.
+        Accepts an image path or an already-decoded BGR array; boxes are in
+        that image's pixels (for a path, the file's, see load_image).
+        """
+        with span("detect"):
+            return self._detect(image)
 
-    def __init__(self) -> None:
-        # Will raise if model can't be loaded; we want strict behavior
-        self.model = ModelLoader(num_classes=len(CUSTOM_CLASSES) + 1).load()
+    def _detect(self, image: ImageSource) -> Dict[str, Box]:
+        result = self._detect_batch([image])[0]
+        if not result:
+            raise ValueError("No detections above threshold")
+        return result
 
-    def detect(self, image_path: str) -> Dict[str, Box]:
+    def detect_batch(self, images: Sequence[ImageSource]) -> List[Dict[str, Box]]:
         """
-        Returns a mapping from label to bounding box.
+        Detect fields on several images with one forward pass per
+        DETECTION_BATCH_SIZE images (default 8). Returns one mapping per
+        image, empty where nothing was found, instead of raising.
         """
-        self.model.eval()
-        img = Image.open(image_path).convert("RGB")
+        batch_size = max(1, int(os.environ.get("DETECTION_BATCH_SIZE", "8")))
+        results: List[Dict[str, Box]] = []
+        with span("detect_batch"):
+            for i in range(0, len(images), batch_size):
+                results.extend(self._detect_batch(images[i:i + batch_size]))
+        return results
+
+    def _to_tensor(self, image: ImageSource) -> Tuple[Any, int, int]:
+        import torchvision.transforms as T
+
+        img = Image.fromarray(cv2.cvtColor(load_image(image), cv2.COLOR_BGR2RGB))
         orig_width, orig_height = img.size
-        
+
         # Resize image to 293x293 before detection (as required by the model)
         img_resized = img.resize((293, 293), Image.Resampling.LANCZOS)
-        
-        transform = T.Compose([T.ToTensor()])
-        tensor = transform(img_resized)
-
-        with torch.no_grad():
-            outputs = self.model([tensor])[0]
 
+        transform = T.Compose([T.ToTensor()])
+        return transform(img_resized).to(self._device), orig_width, orig_height
+
+    def _detect_batch(self, images: Sequence[ImageSource]) -> List[Dict[str, Box]]:
+        import torch
+
+        model = self.model
+        prepared = [self._to_tensor(image) for image in images]
+
+        # torchvision detection models take a list of images as one batch
+        with torch.inference_mode(), time_stage("detection_forward"):
+            outputs = [
+                {k: v.cpu() for k, v in output.items()}
+                for output in model([tensor for tensor, _, _ in prepared])
+            ]
+        return [
+            self._boxes_from_output(output, orig_width, orig_height)
+            for output, (_, orig_width, orig_height) in zip(outputs, prepared)
+        ]
+
+    @staticmethod
+    def _boxes_from_output(outputs: Dict[str, Any], orig_width: int, orig_height: int) -> Dict[str, Box]:
         boxes = outputs.get("boxes")
         labels = outputs.get("labels")
         scores = outputs.get("scores")
@@ -78,8 +198,4 @@ class DetectionService:
 
             result[label] = (x1, y1, x2, y2)
 
-        if not result:
-            raise ValueError("No detections above threshold")
-
         return result
-
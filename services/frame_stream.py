@@ -0,0 +1,228 @@
+"""Camera stream mode: score every frame cheaply, OCR only the best one."""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from services.detection_service import CUSTOM_CLASSES, Box
+from services.image_io import scale_boxes
+from services.image_quality import (
+    QualityReport,
+    QualityThresholds,
+    assess_quality,
+    quality_problems,
+    quality_score,
+)
+from services.metrics import REGISTRY
+from services.orientation import detect_upright
+
+
+STREAM_FRAMES = REGISTRY.counter(
+    "idocr_stream_frames_total",
+    "Stream frames by outcome (rejected, not_better, no_fields, detected).",
+    ("outcome",),
+)
+STREAMS_ACTIVE = REGISTRY.gauge(
+    "idocr_streams_active",
+    "Camera streams currently held in memory.",
+)
+
+
+class FrameStream:
+    """State of one camera stream; the best frame is kept at working resolution."""
+
+    def __init__(self, stream_id: str) -> None:
+        self.stream_id = stream_id
+        self.frames = 0
+        self.best_index: Optional[int] = None
+        self.best_score = 0.0
+        self.best_image: Optional[np.ndarray] = None
+        self.best_scale = 1.0
+        self.best_boxes: Dict[str, Box] = {}
+        self.best_quality: Optional[QualityReport] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        if self.best_index is None:
+            return None
+        return {"frame": self.best_index, "score": round(self.best_score, 4), "fields": len(self.best_boxes)}
+
+
+class FrameStreamService:
+    """Open streams, score their frames and OCR the best one."""
+
+    def __init__(self, detection_service: Any, crop_service: Any, ocr_service: Any) -> None:
+        self.detection_service = detection_service
+        self.crop_service = crop_service
+        self.ocr_service = ocr_service
+        self.score_size = int(os.environ.get("STREAM_SCORE_SIZE", "640"))
+        self.min_sharpness = float(os.environ.get("STREAM_MIN_SHARPNESS", "80"))
+        self.max_glare = float(os.environ.get("STREAM_MAX_GLARE", "0.03"))
+        self.min_coverage = float(os.environ.get("STREAM_MIN_COVERAGE", "0.15"))
+        self.accept_score = float(os.environ.get("STREAM_ACCEPT_SCORE", "0.8"))
+        self.max_frames = int(os.environ.get("STREAM_MAX_FRAMES", "60"))
+        self.min_fields = int(os.environ.get("ORIENTATION_MIN_FIELDS", "3"))
+        self.max_active = int(os.environ.get("STREAM_MAX_ACTIVE", "32"))
+        self.ttl_seconds = float(os.environ.get("STREAM_TTL_SECONDS", "120"))
+        self._streams: "OrderedDict[str, FrameStream]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self) -> FrameStream:
+        stream = FrameStream(uuid.uuid4().hex)
+        with self._lock:
+            self._evict_expired()
+            while len(self._streams) >= self.max_active:
+                self._streams.popitem(last=False)
+            self._streams[stream.stream_id] = stream
+            STREAMS_ACTIVE.set(len(self._streams))
+        return stream
+
+    def get(self, stream_id: str) -> Optional[FrameStream]:
+        with self._lock:
+            self._evict_expired()
+            stream = self._streams.get(stream_id)
+            if stream is not None:
+                stream.last_access = time.monotonic()
+                self._streams.move_to_end(stream_id)
+        return stream
+
+    def close(self, stream_id: str) -> None:
+        with self._lock:
+            self._streams.pop(stream_id, None)
+            STREAMS_ACTIVE.set(len(self._streams))
+
+    def _evict_expired(self) -> None:
+        # Caller holds the lock; LRU order, so stop at the first live stream
+        now = time.monotonic()
+        while self._streams:
+            stream_id, stream = next(iter(self._streams.items()))
+            if now - stream.last_access < self.ttl_seconds:
+                break
+            del self._streams[stream_id]
+        STREAMS_ACTIVE.set(len(self._streams))
+
+    def _gate(self, report: QualityReport, scale: float) -> List[str]:
+        # The upload quality gate's checks, with the stream's stricter limits
+        thresholds = QualityThresholds.from_env()._replace(
+            min_sharpness=self.min_sharpness, max_glare=self.max_glare, min_coverage=self.min_coverage
+        )
+        return [problem["reason"] for problem in quality_problems(report, scale, thresholds)]
+
+    def add_frame(self, stream: FrameStream, image: np.ndarray, scale: float) -> Dict[str, Any]:
+        """
+        Score one decoded frame (working image and its scale to the original)
+        and finish the stream if it is good enough. Returns the frame report.
+        """
+        with stream.lock:
+            index = stream.frames
+            stream.frames += 1
+            report: Dict[str, Any] = {"frame": index}
+            if stream.done:
+                report["ignored"] = "stream already finished"
+                return report
+
+            h, w = image.shape[:2]
+            ratio = min(1.0, self.score_size / max(h, w))
+            small = image if ratio == 1.0 else cv2.resize(
+                image, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA
+            )
+            quality = assess_quality(small, self.score_size)
+            cheap_score = quality_score(quality)
+            report["quality"] = quality.to_dict()
+            report["score"] = round(cheap_score, 4)
+
+            reasons = self._gate(quality, scale / ratio)
+            if reasons:
+                report["rejected"] = reasons
+                STREAM_FRAMES.inc(outcome="rejected")
+            elif stream.best_index is not None and cheap_score <= stream.best_score:
+                # Detection can only lower the score, so this frame cannot win
+                report["rejected"] = ["not_better"]
+                STREAM_FRAMES.inc(outcome="not_better")
+            else:
+                self._detect_frame(stream, index, image, scale, small, cheap_score, quality, report)
+
+            if stream.best_index is not None and (
+                stream.best_score >= self.accept_score or stream.frames >= self.max_frames
+            ):
+                self._finalize(stream)
+            report["best"] = stream.best()
+            report["done"] = stream.done
+            if stream.done:
+                report["result"] = stream.result
+            return report
+
+    def _detect_frame(
+        self,
+        stream: FrameStream,
+        index: int,
+        image: np.ndarray,
+        scale: float,
+        small: np.ndarray,
+        cheap_score: float,
+        quality: QualityReport,
+        report: Dict[str, Any],
+    ) -> None:
+        try:
+            upright, detections = detect_upright(self.detection_service, small)
+        except ValueError:
+            upright, detections = small, {}
+        report["fields"] = len(detections)
+        if len(detections) < self.min_fields:
+            report["rejected"] = ["no_fields"]
+            STREAM_FRAMES.inc(outcome="no_fields")
+            return
+        STREAM_FRAMES.inc(outcome="detected")
+
+        score = cheap_score * len(detections) / len(CUSTOM_CLASSES)
+        report["score"] = round(score, 4)
+        if stream.best_index is not None and score <= stream.best_score:
+            return
+        if upright is not small:
+            image = cv2.rotate(image, cv2.ROTATE_180)
+        # Boxes from the scored copy, reused on the working image
+        stream.best_boxes = scale_boxes(detections, image.shape[1] / small.shape[1])
+        stream.best_index = index
+        stream.best_score = score
+        stream.best_image = image
+        stream.best_scale = scale
+        stream.best_quality = quality
+
+    def finish(self, stream: FrameStream) -> Optional[Dict[str, Any]]:
+        """OCR the best frame if not done yet; None if no frame was usable."""
+        with stream.lock:
+            if not stream.done and stream.best_index is not None:
+                self._finalize(stream)
+            return stream.result
+
+    def _finalize(self, stream: FrameStream) -> None:
+        # Caller holds stream.lock
+        start = time.perf_counter()
+        crops = self.crop_service.crop_arrays(stream.best_image, stream.best_boxes)
+        confidences: Dict[str, float] = {}
+        fields = self.ocr_service.process_crops(crops, confidences)
+        stream.result = {
+            "result": fields,
+            "confidences": confidences,
+            "boxes": scale_boxes(stream.best_boxes, stream.best_scale),
+            "frame": stream.best_index,
+            "score": round(stream.best_score, 4),
+            "quality": stream.best_quality.to_dict() if stream.best_quality else None,
+            "frames_seen": stream.frames,
+            "ocr_ms": round(1000.0 * (time.perf_counter() - start), 2),
+        }
+        # Only the result is needed from here on
+        stream.best_image = None
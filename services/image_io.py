@@ -0,0 +1,289 @@
+import io
+import os
+import sys
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from flask import Request
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from services.metrics import time_stage
+from services.orientation import correct_orientation, orientation_enabled
+from services.utils import env_flag
+
+
+# Either a path on disk or an already-decoded BGR array
+ImageSource = Union[str, np.ndarray]
+
+Box = Tuple[int, int, int, int]  # x1, y1, x2, y2
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured byte or pixel limits."""
+
+
+class InMemoryUploadRequest(Request):
+    """
+    Request class that parses multipart file parts into memory.
+
+    Werkzeug spools uploads larger than 500KB to a temporary file; keeping them
+    in a BytesIO lets the decoder work directly on the request buffer.
+    Total size is still bounded by MAX_CONTENT_LENGTH.
+    """
+
+    def _get_file_stream(
+        self,
+        total_content_length,
+        content_type,
+        filename=None,
+        content_length=None,
+    ):
+        return io.BytesIO()
+
+
+def get_upload_limits() -> Tuple[int, int]:
+    """Return (max_bytes, max_pixels) for uploaded images."""
+    max_bytes = int(os.environ.get("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+    max_pixels = int(os.environ.get("UPLOAD_MAX_PIXELS", "40000000"))
+    return max_bytes, max_pixels
+
+
+def should_persist_uploads() -> bool:
+    """Whether the original upload should be written to disk."""
+    return env_flag("PERSIST_UPLOADS", "0")
+
+
+def read_upload_buffer(file: FileStorage, max_bytes: int) -> memoryview:
+    """
+    Return a view on the uploaded bytes without copying them.
+    Raises ImageTooLargeError if the upload exceeds max_bytes.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        buffer = stream.getbuffer()
+    else:
+        # Fallback for streams not created by InMemoryUploadRequest
+        stream.seek(0)
+        buffer = memoryview(stream.read(max_bytes + 1))
+
+    if buffer.nbytes == 0:
+        raise ValueError("Uploaded file is empty")
+    if buffer.nbytes > max_bytes:
+        raise ImageTooLargeError(
+            f"Upload is {buffer.nbytes} bytes, limit is {max_bytes} bytes"
+        )
+    return buffer
+
+
+def get_working_max_size() -> int:
+    """
+    Longest side of the working image fed to detection and cropping.
+    Defaults to twice CROP_MAX_SIZE so field crops keep their full quality.
+    """
+    crop_max = int(os.environ.get("CROP_MAX_SIZE", "800"))
+    return int(os.environ.get("WORKING_MAX_SIZE", str(crop_max * 2)))
+
+
+def probe_image(buffer: memoryview) -> Tuple[int, int, int]:
+    """
+    Read (width, height, exif_orientation) from the image header without
+    decoding pixel data. Width and height are as stored, before orientation.
+    """
+    try:
+        with Image.open(io.BytesIO(buffer)) as img:
+            width, height = img.size
+            try:
+                orientation = int(img.getexif().get(EXIF_ORIENTATION_TAG, 1))
+            except Exception:
+                orientation = 1
+            return width, height, orientation
+    except Exception as e:
+        raise ValueError(f"Unsupported or corrupted image: {e}")
+
+
+def probe_image_file(path: str) -> Tuple[int, int]:
+    """Read (width, height) from an image file's header without decoding pixels."""
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception as e:
+        raise ValueError(f"Unsupported or corrupted image: {path}: {e}")
+
+
+def _reduced_decode_flag(long_side: int, target: int) -> int:
+    """
+    Pick the largest IMREAD_REDUCED_* factor that still leaves at least
+    `target` pixels on the longest side. JPEGs are then scaled during
+    decoding (DCT scaling) instead of decoding at full resolution.
+    """
+    for factor, flag in (
+        (8, cv2.IMREAD_REDUCED_COLOR_8),
+        (4, cv2.IMREAD_REDUCED_COLOR_4),
+        (2, cv2.IMREAD_REDUCED_COLOR_2),
+    ):
+        if long_side // factor >= target:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def apply_exif_orientation(img: np.ndarray, orientation: int) -> np.ndarray:
+    """Rotate/flip an array according to an EXIF orientation value (1-8)."""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def decode_image_buffer(
+    buffer: memoryview,
+    max_pixels: int,
+    max_size: Optional[int] = None,
+    correct: bool = True,
+    correction: Optional[Dict[str, Any]] = None,
+) -> Tuple[np.ndarray, float]:
+    """
+    Decode an encoded image buffer into an upright BGR working image.
+
+    The pixel limit is enforced from the header before decoding. Large images
+    are decoded at reduced resolution and downscaled to WORKING_MAX_SIZE, and
+    EXIF orientation is applied once here, followed by portrait-to-landscape
+    rotation and deskew (see services/orientation.py). `max_size` overrides
+    WORKING_MAX_SIZE and `correct=False` skips the rotation/deskew step (for
+    pages holding several cards, or images that were already corrected). If
+    given, `correction` is filled with the correction that was applied
+    ({"rotation": 0|90, "skew": degrees}).
+
+    Returns (image, scale) where scale maps working coordinates back to the
+    original (oriented) image: original = working * scale.
+    """
+    width, height, orientation = probe_image(buffer)
+    if width * height > max_pixels:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height} pixels), "
+            f"limit is {max_pixels} pixels"
+        )
+
+    with time_stage("decode"):
+        img = _decode_working_image(buffer, width, height, orientation, max_size)
+    info: Dict[str, Any] = {"rotation": 0, "skew": 0.0}
+    if correct and orientation_enabled():
+        # Rotating by 90 degrees keeps the long side, so scale is unchanged
+        img, info = correct_orientation(img)
+    if correction is not None:
+        correction.update(info)
+
+    scale = max(width, height) / max(img.shape[:2])
+    return img, scale
+
+
+def _decode_working_image(
+    buffer: memoryview, width: int, height: int, orientation: int, max_size: Optional[int] = None
+) -> np.ndarray:
+    target = max_size or get_working_max_size()
+    flags = _reduced_decode_flag(max(width, height), target) | cv2.IMREAD_IGNORE_ORIENTATION
+
+    # np.frombuffer wraps the request buffer without copying it
+    img = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), flags)
+    if img is None:
+        raise ValueError("Failed to decode image")
+
+    img = apply_exif_orientation(img, orientation)
+
+    h, w = img.shape[:2]
+    if max(h, w) > target:
+        ratio = target / max(h, w)
+        img = cv2.resize(
+            img,
+            (max(1, int(w * ratio)), max(1, int(h * ratio))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return img
+
+
+def ingest_upload(
+    file: FileStorage, correction: Optional[Dict[str, Any]] = None
+) -> Tuple[np.ndarray, float, memoryview]:
+    """
+    Validate and decode an uploaded image straight from the request buffer.
+    Returns the working BGR array, its scale to the original image and the
+    raw buffer (for optional persistence).
+    """
+    max_bytes, max_pixels = get_upload_limits()
+    buffer = read_upload_buffer(file, max_bytes)
+    img, scale = decode_image_buffer(buffer, max_pixels, correction=correction)
+    return img, scale, buffer
+
+
+def scale_boxes(boxes: Dict[str, Box], factor: float) -> Dict[str, Box]:
+    """Multiply every box coordinate by factor (e.g. working -> original)."""
+    if factor == 1.0:
+        return dict(boxes)
+    return {
+        label: tuple(int(round(v * factor)) for v in box)
+        for label, box in boxes.items()
+    }
+
+
+def persist_buffer(buffer: memoryview, path: str) -> None:
+    """Write the original encoded bytes to disk."""
+    with time_stage("upload_save"), open(path, "wb") as fh:
+        fh.write(buffer)
+
+
+def persist_image(img: np.ndarray, path: str) -> None:
+    """Write a decoded (e.g. orientation-corrected) working image as JPEG."""
+    with time_stage("upload_save"):
+        ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        if not ok:
+            raise ValueError(f"Failed to encode image: {path}")
+        encoded.tofile(path)
+
+
+def load_image_with_scale(
+    path: str,
+    correct: bool = True,
+    correction: Optional[Dict[str, Any]] = None,
+    max_size: Optional[int] = None,
+) -> Tuple[np.ndarray, float]:
+    """
+    Read an image from disk through the same normalization as uploads.
+    Returns (working image, scale to original).
+    """
+    _, max_pixels = get_upload_limits()
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError as e:
+        raise ValueError(f"Failed to read image: {path}: {e}")
+    if data.size == 0:
+        raise ValueError(f"Image file is empty: {path}")
+    return decode_image_buffer(
+        memoryview(data), max_pixels, max_size=max_size, correct=correct, correction=correction
+    )
+
+
+def load_image(source: ImageSource) -> np.ndarray:
+    """
+    Return a BGR image for a path or pass through an already-decoded array.
+    A path is read at full resolution with only EXIF orientation applied, so
+    boxes found on it (DetectionService.detect(path)) are in the file's
+    pixels; use load_image_with_scale() for the normalized working image.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    img, _ = load_image_with_scale(source, correct=False, max_size=sys.maxsize)
+    return img
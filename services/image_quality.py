@@ -0,0 +1,237 @@
+"""Cheap image quality measurements and the quality gate run before detection."""
+
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from services.metrics import REGISTRY, time_stage
+from services.utils import env_flag
+
+
+QUALITY_REJECTIONS = REGISTRY.counter(
+    "idocr_quality_rejections_total",
+    "Images rejected by the pre-inference quality gate, by reason.",
+    ("reason",),
+)
+
+# What the user can do about each rejection reason
+QUALITY_HINTS: Dict[str, str] = {
+    "too_small": "Image resolution is too low; move the camera closer or use a higher resolution",
+    "blurry": "Image is blurry; hold the card and camera steady and let the camera focus",
+    "too_dark": "Image is too dark; add light or avoid shadows on the card",
+    "overexposed": "Image is overexposed; reduce the light or turn off the flash",
+    "glare": "Glare on the card; tilt the card away from direct light",
+    "card_not_found": "Card outline not found; place the whole card on a plain, contrasting background",
+}
+
+
+class QualityReport(NamedTuple):
+    width: int
+    height: int
+    sharpness: float
+    brightness: float
+    dark_fraction: float
+    bright_fraction: float
+    glare: float
+    coverage: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            key: round(value, 4) if isinstance(value, float) else value
+            for key, value in self._asdict().items()
+        }
+
+
+def _downscaled(img: np.ndarray, size: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    if max(h, w) <= size:
+        return img
+    ratio = size / max(h, w)
+    return cv2.resize(img, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+
+
+def _rect_contour(mask: np.ndarray) -> Optional[np.ndarray]:
+    """Largest external contour of `mask` (at least 5% of it) that fills its rotated rectangle."""
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    frame_area = float(mask.shape[0] * mask.shape[1])
+    best, best_area = None, 0.0
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < 0.05 * frame_area or area <= best_area:
+            continue
+        _, (rw, rh), _ = cv2.minAreaRect(contour)
+        if rw * rh and area >= 0.8 * rw * rh:
+            best, best_area = contour, area
+    return best
+
+
+def _card_contour(gray: np.ndarray) -> Optional[np.ndarray]:
+    """Card outline from edges, or None."""
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 40, 120)
+    edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+    return _rect_contour(edges)
+
+
+def card_coverage(gray: np.ndarray) -> float:
+    """Area of the card outline (see _card_contour) over the frame area, 0 if none."""
+    contour = _card_contour(gray)
+    if contour is None:
+        return 0.0
+    return min(1.0, cv2.contourArea(contour) / float(gray.shape[0] * gray.shape[1]))
+
+
+def _border_blobs(mask: np.ndarray) -> np.ndarray:
+    """The blobs of a boolean mask that touch the frame border."""
+    _, labels = cv2.connectedComponents(mask.astype(np.uint8))
+    border = np.unique(np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]]))
+    return np.isin(labels, border[border > 0])
+
+
+def assess_quality(img: np.ndarray, size: Optional[int] = None) -> QualityReport:
+    """
+    Measure a BGR (or gray) image; width/height are the input's own.
+
+    Exposure and glare describe the card, not the scene: when a card outline
+    is found they are measured inside it. Otherwise near-white areas touching
+    the frame border (a scanner bed or paper around the card) are left out,
+    so a white background is not read as glare or over-exposure.
+    """
+    size = size or int(os.environ.get("QUALITY_SIZE", "640"))
+    with time_stage("quality"):
+        h, w = img.shape[:2]
+        small = _downscaled(img, size)
+        gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if small.ndim == 3:
+            hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+            glare_mask = (hsv[:, :, 2] >= 250) & (hsv[:, :, 1] <= 40)
+        else:
+            glare_mask = gray > 245
+
+        contour = _card_contour(gray)
+        region = np.ones(gray.shape, dtype=bool)
+        if contour is None:
+            # A light card on a white bed has weak edges; use what is left
+            # after removing the near-white background instead
+            background = _border_blobs(glare_mask | (gray > 245))
+            if 0.05 <= background.mean() < 0.95:
+                region = ~background
+                contour = _rect_contour(region.astype(np.uint8) * 255)
+        coverage = 0.0
+        if contour is not None:
+            coverage = min(1.0, cv2.contourArea(contour) / float(gray.size))
+            filled = np.zeros(gray.shape, dtype=np.uint8)
+            cv2.drawContours(filled, [contour], -1, 255, thickness=cv2.FILLED)
+            region = filled > 0
+
+        card = gray[region]
+        pixels = float(card.size)
+        return QualityReport(
+            width=int(w),
+            height=int(h),
+            sharpness=sharpness,
+            brightness=float(card.mean()) / 255.0,
+            dark_fraction=float(np.count_nonzero(card < 30)) / pixels,
+            bright_fraction=float(np.count_nonzero(card > 245)) / pixels,
+            glare=float(np.count_nonzero(glare_mask & region)) / pixels,
+            coverage=coverage,
+        )
+
+
+def quality_score(report: QualityReport, sharpness_target: Optional[float] = None) -> float:
+    """
+    Single 0-1 figure for ranking frames of the same scene: mostly sharpness,
+    then how much of the frame the card fills, minus glare.
+    """
+    target = sharpness_target or float(os.environ.get("QUALITY_SHARPNESS_TARGET", "300"))
+    sharp = min(1.0, report.sharpness / target)
+    # A card filling ~60% of the frame is ideal; more usually means cut-off edges
+    coverage = min(1.0, report.coverage / 0.6)
+    glare_penalty = min(1.0, report.glare / 0.05)
+    return max(0.0, 0.5 * sharp + 0.3 * coverage + 0.2 * (1.0 - glare_penalty))
+
+
+class QualityThresholds(NamedTuple):
+    min_side: float
+    min_sharpness: float
+    min_brightness: float
+    max_brightness: float
+    max_glare: float
+    min_coverage: float
+
+    @classmethod
+    def from_env(cls) -> "QualityThresholds":
+        return cls(
+            min_side=float(os.environ.get("QUALITY_MIN_SIDE", "240")),
+            min_sharpness=float(os.environ.get("QUALITY_MIN_SHARPNESS", "40")),
+            min_brightness=float(os.environ.get("QUALITY_MIN_BRIGHTNESS", "0.12")),
+            max_brightness=float(os.environ.get("QUALITY_MAX_BRIGHTNESS", "0.92")),
+            max_glare=float(os.environ.get("QUALITY_MAX_GLARE", "0.15")),
+            min_coverage=float(os.environ.get("QUALITY_MIN_COVERAGE", "0")),
+        )
+
+
+class ImageQualityError(ValueError):
+    """Raised by the quality gate; carries the failed checks and the measurements."""
+
+    def __init__(self, problems: List[Dict[str, Any]], report: QualityReport) -> None:
+        super().__init__("Image quality too low: " + ", ".join(p["reason"] for p in problems))
+        self.problems = problems
+        self.report = report
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"error": str(self), "reasons": self.problems, "quality": self.report.to_dict()}
+
+
+def quality_gate_enabled() -> bool:
+    return env_flag("QUALITY_GATE", "1")
+
+
+def quality_problems(
+    report: QualityReport, scale: float = 1.0, thresholds: Optional[QualityThresholds] = None
+) -> List[Dict[str, Any]]:
+    """
+    Failed checks as {"reason", "message", "value", "threshold"}. `scale` maps
+    the measured image to the original (original = measured * scale), so the
+    resolution check applies to what was uploaded.
+    """
+    limits = thresholds or QualityThresholds.from_env()
+    checks = [
+        ("too_small", min(report.width, report.height) * scale, limits.min_side, "min"),
+        ("blurry", report.sharpness, limits.min_sharpness, "min"),
+        ("too_dark", report.brightness, limits.min_brightness, "min"),
+        ("overexposed", report.brightness, limits.max_brightness, "max"),
+        ("glare", report.glare, limits.max_glare, "max"),
+        ("card_not_found", report.coverage, limits.min_coverage, "min"),
+    ]
+    problems = []
+    for reason, value, threshold, kind in checks:
+        if (kind == "min" and value < threshold) or (kind == "max" and value > threshold):
+            problems.append({
+                "reason": reason,
+                "message": QUALITY_HINTS[reason],
+                "value": round(float(value), 4),
+                "threshold": threshold,
+            })
+    return problems
+
+
+def check_image_quality(
+    image: np.ndarray, scale: float = 1.0, thresholds: Optional[QualityThresholds] = None
+) -> Optional[QualityReport]:
+    """
+    Quality gate in front of detection. Raises ImageQualityError if the image
+    fails any threshold; returns the measurements (None if the gate is off).
+    """
+    if not quality_gate_enabled():
+        return None
+    report = assess_quality(image)
+    problems = quality_problems(report, scale, thresholds)
+    if problems:
+        for problem in problems:
+            QUALITY_REJECTIONS.inc(reason=problem["reason"])
+        raise ImageQualityError(problems, report)
+    return report
@@ -0,0 +1,219 @@
+"""Detection and OCR in worker processes, fed through shared memory."""
+
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.memory_watchdog import process_rss_bytes
+from services.shm_transport import ShmArena, ShmReader
+
+
+def default_services() -> Tuple[Any, Any]:
+    """Build the worker's own detector and OCR service (runs in the child)."""
+    from services.backends import create_detection_service, create_ocr_service
+
+    return create_detection_service(), create_ocr_service()
+
+
+def _run(op: str, payload: Any, reader: ShmReader, detector: Any, ocr: Any) -> Any:
+    # Views exist only inside this call so detach() can unmap afterwards
+    if op == "detect":
+        return detector.detect(reader.view(payload))
+    if op == "ocr":
+        confidences: Dict[str, float] = {}
+        fields = ocr.process_crops(reader.views(payload), confidences)
+        return fields, confidences
+    raise ValueError(f"Unknown inference op '{op}'")
+
+
+def _portable(exc: Exception) -> Exception:
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _worker_main(requests: Any, results: Any, factory: Callable[[], Tuple[Any, Any]]) -> None:
+    detector, ocr = factory()
+    reader = ShmReader()
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        job_id, op, payload = message
+        try:
+            reply: Tuple[int, bool, Any] = (job_id, True, _run(op, payload, reader, detector, ocr))
+        except Exception as e:
+            # The traceback's frames still reference the shared-memory views
+            reply = (job_id, False, _portable(e.with_traceback(None)))
+        # Unmap before replying; the owner unlinks once it has the reply
+        reader.detach()
+        results.put(reply)
+
+
+class _Worker:
+    """One worker process, its request queue and the calls it holds."""
+
+    def __init__(self, index: int, proc: Any, requests: Any) -> None:
+        self.index = index
+        self.proc = proc
+        self.requests = requests
+        self.jobs: Set[int] = set()
+
+
+class InferenceProcessPool:
+    """Drop-in detect()/process_crops() backed by worker processes."""
+
+    def __init__(
+        self,
+        processes: int,
+        factory: Callable[[], Tuple[Any, Any]] = default_services,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.processes = max(1, processes)
+        self.timeout = float(os.environ.get("INFERENCE_CALL_TIMEOUT_SECONDS", "120"))
+        self.arena = ShmArena()
+        self._ctx = multiprocessing.get_context(
+            start_method or os.environ.get("INFERENCE_START_METHOD", "spawn")
+        )
+        self._factory = factory
+        self._results: Any = None
+        self._workers: List[_Worker] = []
+        self._pending: Dict[int, Tuple["Future[Any]", _Worker]] = {}
+        self._next_id = 0
+        self._respawns = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self, index: int) -> _Worker:
+        requests = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(requests, self._results, self._factory),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        proc.start()
+        return _Worker(index, proc, requests)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._workers or self._closed:
+                return
+            self._results = self._ctx.Queue()
+            self._workers = [self._spawn(i) for i in range(self.processes)]
+        threading.Thread(target=self._collect, name="inference-results", daemon=True).start()
+
+    def _collect(self) -> None:
+        last_check = time.monotonic()
+        while not self._closed:
+            try:
+                message = self._results.get(timeout=0.5)
+            except Exception:
+                message = None
+            if message is not None:
+                job_id, ok, value = message
+                with self._lock:
+                    entry = self._pending.pop(job_id, None)
+                    if entry is not None:
+                        entry[1].jobs.discard(job_id)
+                if entry is not None:
+                    if ok:
+                        entry[0].set_result(value)
+                    else:
+                        entry[0].set_exception(value)
+            # Leak detection and worker health run alongside reply handling
+            if time.monotonic() - last_check > 1.0:
+                self.arena.check_leaks()
+                self._replace_dead()
+                last_check = time.monotonic()
+
+    def _replace_dead(self) -> None:
+        failed: List["Future[Any]"] = []
+        with self._lock:
+            if self._closed:
+                return
+            for i, worker in enumerate(self._workers):
+                if worker.proc.is_alive():
+                    continue
+                for job_id in worker.jobs:
+                    entry = self._pending.pop(job_id, None)
+                    if entry is not None:
+                        failed.append(entry[0])
+                print(
+                    f"Warning: Inference worker {worker.proc.pid} exited with code "
+                    f"{worker.proc.exitcode}; failing {len(worker.jobs)} call(s) and restarting it"
+                )
+                self._workers[i] = self._spawn(worker.index)
+                self._respawns += 1
+        for future in failed:
+            future.set_exception(RuntimeError("Inference worker process exited during the call"))
+
+    def _call(self, op: str, payload: Any) -> Any:
+        self.start()
+        future: "Future[Any]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Inference process pool is closed")
+            job_id = self._next_id
+            self._next_id += 1
+            # Least-loaded worker; a dead one is replaced (and its calls failed) by _collect
+            worker = min(self._workers, key=lambda w: len(w.jobs))
+            worker.jobs.add(job_id)
+            self._pending[job_id] = (future, worker)
+            worker.requests.put((job_id, op, payload))
+        try:
+            return future.result(timeout=self.timeout)
+        finally:
+            with self._lock:
+                if self._pending.pop(job_id, None) is not None:
+                    worker.jobs.discard(job_id)
+
+    def detect(self, image: np.ndarray) -> Dict[str, Any]:
+        with self.arena.lease(image, label="detect") as handle:
+            return self._call("detect", handle)
+
+    def process_crops(
+        self, crops: Dict[str, np.ndarray], confidences: Optional[Dict[str, float]] = None
+    ) -> Dict[str, str]:
+        with self.arena.lease(crops, label="ocr") as handles:
+            fields, scores = self._call("ocr", handles)
+        if confidences is not None:
+            confidences.update(scores)
+        return fields
+
+    def stats(self) -> Dict[str, Any]:
+        data = self.arena.stats()
+        data["processes"] = self.processes
+        with self._lock:
+            workers = list(self._workers)
+            data["pending_calls"] = len(self._pending)
+            data["respawns"] = self._respawns
+        data["alive"] = sum(1 for worker in workers if worker.proc.is_alive())
+        data["rss_bytes"] = {
+            str(worker.proc.pid): process_rss_bytes(worker.proc.pid)
+            for worker in workers
+            if worker.proc.is_alive()
+        }
+        return data
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            worker.requests.put(None)
+        for worker in workers:
+            worker.proc.join(timeout)
+            if worker.proc.is_alive():
+                worker.proc.terminate()
+        self.arena.close()
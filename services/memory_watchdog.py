@@ -0,0 +1,247 @@
+"""Per-worker memory watchdog.
+
+Samples RSS and allocator statistics, tries to release memory near
+MEMORY_RSS_LIMIT_MB and drains and recycles the worker when that fails.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import REGISTRY
+from services.utils import env_flag
+
+
+PROCESS_RSS = REGISTRY.gauge(
+    "idocr_process_rss_bytes",
+    "Resident set size of this worker process.",
+)
+ALLOCATOR_BYTES = REGISTRY.gauge(
+    "idocr_allocator_bytes",
+    "Allocator statistics of this worker, by allocator and kind.",
+    ("allocator", "kind"),
+)
+ALLOCATOR_ERRORS = REGISTRY.counter(
+    "idocr_allocator_errors_total",
+    "Paddle tensor-memory errors (\"Tensor holds no memory\", mutable_data).",
+)
+MEMORY_TRIMS = REGISTRY.counter(
+    "idocr_memory_trims_total",
+    "Attempts to return memory to the OS before recycling.",
+)
+MEMORY_RECYCLES = REGISTRY.counter(
+    "idocr_memory_recycles_total",
+    "Worker recycles started by the memory watchdog, by reason.",
+    ("reason",),
+)
+
+SUPERVISED_ENV = "MEMORY_WATCHDOG_SUPERVISED"
+
+
+def _load_libc() -> Optional[Any]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+    except OSError:
+        return None
+
+
+_LIBC = _load_libc()
+
+
+class _MallInfo2(ctypes.Structure):
+    _fields_ = [
+        (name, ctypes.c_size_t)
+        for name in ("arena", "ordblks", "smblks", "hblks", "hblkhd", "usmblks",
+                     "fsmblks", "uordblks", "fordblks", "keepcost")
+    ]
+
+
+def process_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Current RSS of `pid` (default: this process), or None if unknown."""
+    try:
+        import psutil
+
+        return int(psutil.Process(pid).memory_info().rss)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def allocator_stats() -> Dict[str, Dict[str, int]]:
+    """
+    glibc heap and, when already imported, Torch/Paddle GPU allocator figures.
+    Frameworks are never imported here just to be measured.
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    mallinfo2 = getattr(_LIBC, "mallinfo2", None) if _LIBC is not None else None
+    if mallinfo2 is not None:
+        mallinfo2.restype = _MallInfo2
+        info = mallinfo2()
+        # fordblks = freed but still mapped: the fragmentation that trim recovers
+        stats["glibc"] = {
+            "heap": int(info.arena + info.hblkhd),
+            "in_use": int(info.uordblks + info.hblkhd),
+            "free_retained": int(info.fordblks),
+        }
+
+    torch = sys.modules.get("torch")
+    try:
+        if torch is not None and torch.cuda.is_available():
+            stats["torch_cuda"] = {
+                "allocated": int(torch.cuda.memory_allocated()),
+                "reserved": int(torch.cuda.memory_reserved()),
+            }
+    except Exception:
+        pass
+
+    paddle = sys.modules.get("paddle")
+    try:
+        if paddle is not None and paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count():
+            stats["paddle_cuda"] = {
+                "allocated": int(paddle.device.cuda.memory_allocated()),
+                "reserved": int(paddle.device.cuda.memory_reserved()),
+            }
+    except Exception:
+        pass
+    return stats
+
+
+def release_memory() -> None:
+    """Collect garbage, trim the glibc heap and drop framework GPU caches."""
+    gc.collect()
+    if _LIBC is not None and hasattr(_LIBC, "malloc_trim"):
+        _LIBC.malloc_trim(0)
+    torch = sys.modules.get("torch")
+    try:
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+    paddle = sys.modules.get("paddle")
+    try:
+        if paddle is not None and paddle.device.is_compiled_with_cuda():
+            paddle.device.cuda.empty_cache()
+    except Exception:
+        pass
+    MEMORY_TRIMS.inc()
+
+
+def report_allocator_error() -> None:
+    """Called by OCRService when Paddle reports a tensor-memory error."""
+    ALLOCATOR_ERRORS.inc()
+
+
+class MemoryWatchdog:
+    """Samples memory in a daemon thread and drains/recycles the worker at the ceiling."""
+
+    def __init__(self, in_flight: Callable[[], float] = lambda: 0) -> None:
+        self.limit_bytes = int(float(os.environ.get("MEMORY_RSS_LIMIT_MB", "0")) * 1024 * 1024)
+        self.trim_fraction = float(os.environ.get("MEMORY_TRIM_FRACTION", "0.85"))
+        self.interval = float(os.environ.get("MEMORY_CHECK_INTERVAL_SECONDS", "10"))
+        self.drain_timeout = float(os.environ.get("MEMORY_DRAIN_TIMEOUT_SECONDS", "30"))
+        self.allocator_error_limit = int(os.environ.get("MEMORY_ALLOCATOR_ERROR_LIMIT", "3"))
+        recycle = os.environ.get("MEMORY_RECYCLE", "auto").strip().lower()
+        if recycle == "auto":
+            self.recycle_enabled = env_flag(SUPERVISED_ENV, "0")
+        else:
+            self.recycle_enabled = recycle in ("1", "true", "yes")
+        self._in_flight = in_flight
+        self._draining = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_trim = 0.0
+        self.rss_bytes: Optional[int] = None
+        self.peak_rss_bytes = 0
+        self.recycle_reason: Optional[str] = None
+
+    @property
+    def draining(self) -> bool:
+        return self._draining.is_set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="memory-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                reason = self.check()
+            except Exception as e:
+                print(f"Warning: Memory watchdog check failed: {str(e)}")
+                continue
+            if reason and self.recycle_enabled:
+                self.recycle(reason)
+                return
+
+    def sample(self) -> Optional[int]:
+        """Refresh the memory metrics; returns RSS in bytes."""
+        rss = process_rss_bytes()
+        if rss is not None:
+            self.rss_bytes = rss
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            PROCESS_RSS.set(rss)
+        for allocator, values in allocator_stats().items():
+            for kind, value in values.items():
+                ALLOCATOR_BYTES.set(value, allocator=allocator, kind=kind)
+        return rss
+
+    def check(self) -> Optional[str]:
+        """Sample once; returns the recycle reason if the worker should be recycled."""
+        rss = self.sample()
+        if self.allocator_error_limit and ALLOCATOR_ERRORS.get() >= self.allocator_error_limit:
+            return "allocator_errors"
+        if not self.limit_bytes or rss is None:
+            return None
+        if rss >= self.limit_bytes * self.trim_fraction and time.monotonic() - self._last_trim > 60:
+            self._last_trim = time.monotonic()
+            release_memory()
+            rss = self.sample() or rss
+        if rss >= self.limit_bytes:
+            return "rss_limit"
+        return None
+
+    def recycle(self, reason: str) -> None:
+        """Stop taking inference work, wait for in-flight requests, then SIGTERM self."""
+        if self._draining.is_set():
+            return
+        self.recycle_reason = reason
+        self._draining.set()
+        MEMORY_RECYCLES.inc(reason=reason)
+        rss_mb = (self.rss_bytes or 0) / (1024 * 1024)
+        print(f"Warning: Recycling worker {os.getpid()} ({reason}, RSS {rss_mb:.0f} MB); draining")
+        deadline = time.monotonic() + self.drain_timeout
+        while self._in_flight() > 0 and time.monotonic() < deadline:
+            time.sleep(0.2)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": self.rss_bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "limit_bytes": self.limit_bytes or None,
+            "allocator": allocator_stats(),
+            "allocator_errors": int(ALLOCATOR_ERRORS.get()),
+            "recycle_enabled": self.recycle_enabled,
+            "draining": self.draining,
+            "recycle_reason": self.recycle_reason,
+        }
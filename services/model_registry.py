@@ -0,0 +1,208 @@
+"""Versioned model routing: hot-reload, canary, promote and rollback."""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from services.metrics import REGISTRY
+
+
+MODEL_VERSION_LATENCY = REGISTRY.histogram(
+    "idocr_model_version_latency_seconds",
+    "Latency of model calls by model kind and version.",
+    ("model", "version"),
+)
+MODEL_VERSION_CALLS = REGISTRY.counter(
+    "idocr_model_version_calls_total",
+    "Model calls by model kind, version and outcome.",
+    ("model", "version", "outcome"),
+)
+MODEL_CANARY_PERCENT = REGISTRY.gauge(
+    "idocr_model_canary_percent",
+    "Share of calls routed to the candidate version.",
+    ("model",),
+)
+
+
+def warm_detector(service: Any) -> None:
+    """Load the detector and run one forward pass on a blank image."""
+    service.model
+    try:
+        service.detect(np.full((293, 293, 3), 255, dtype=np.uint8))
+    except ValueError:
+        # "No detections above threshold" is expected on a blank image
+        pass
+
+
+def warm_ocr(service: Any) -> None:
+    """Load both PaddleOCR models and run one tiny prediction each."""
+    blank = np.full((64, 256, 3), 255, dtype=np.uint8)
+    for model in (service.ocr_ar, service.ocr_en):
+        model.predict(input=blank)
+
+
+class ModelVersion:
+    """One loaded (or loading) version of a model."""
+
+    def __init__(self, version: str, spec: Dict[str, Any], service: Any = None) -> None:
+        self.version = version
+        self.spec = spec
+        self.service = service
+        self.status = "ready" if service is not None else "loading"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.ready_at: Optional[float] = time.time() if service is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"version": self.version, "status": self.status, "spec": self.spec}
+        if self.error:
+            data["error"] = self.error
+        if self.ready_at is not None:
+            data["load_seconds"] = round(self.ready_at - self.created_at, 3)
+        return data
+
+
+class ModelRouter:
+    """
+    Routes calls to the active version, or `canary_percent` of them to a ready
+    candidate. Methods listed in `timed_methods` are routed and timed per
+    version; any other attribute is read from the active service.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        service: Any,
+        factory: Callable[[Dict[str, Any]], Any],
+        warm: Callable[[Any], None],
+        timed_methods: Sequence[str],
+        version: str = "initial",
+    ) -> None:
+        self._kind = kind
+        self._factory = factory
+        self._warm = warm
+        self._timed_methods = frozenset(timed_methods)
+        self._lock = threading.Lock()
+        self._active = ModelVersion(version, {}, service)
+        self._candidate: Optional[ModelVersion] = None
+        self._previous: Optional[ModelVersion] = None
+        self._canary_percent = 0.0
+        self._pinned: ContextVar[Optional[ModelVersion]] = ContextVar(f"{kind}_pinned", default=None)
+        MODEL_CANARY_PERCENT.set(0.0, model=kind)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names not defined on the router itself
+        if name in self._timed_methods:
+            return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+        return getattr(self._active.service, name)
+
+    @property
+    def active(self) -> ModelVersion:
+        return self._active
+
+    def pick(self) -> ModelVersion:
+        candidate = self._candidate
+        if (
+            candidate is not None
+            and candidate.status == "ready"
+            and self._canary_percent > 0
+            and random.random() * 100.0 < self._canary_percent
+        ):
+            return candidate
+        return self._active
+
+    @contextmanager
+    def pinned(self) -> Iterator[ModelVersion]:
+        """Pick a version once and route every call in this context to it."""
+        chosen = self._pinned.get() or self.pick()
+        token = self._pinned.set(chosen)
+        try:
+            yield chosen
+        finally:
+            self._pinned.reset(token)
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        chosen = self._pinned.get() or self.pick()
+        outcome = "error"
+        try:
+            with MODEL_VERSION_LATENCY.time(model=self._kind, version=chosen.version):
+                result = getattr(chosen.service, method)(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            MODEL_VERSION_CALLS.inc(model=self._kind, version=chosen.version, outcome=outcome)
+
+    def load_candidate(self, version: str, spec: Dict[str, Any]) -> ModelVersion:
+        """Build and warm a candidate on a background thread; replaces any previous candidate."""
+        with self._lock:
+            if version in (self._active.version, self._candidate and self._candidate.version):
+                raise ValueError(f"Version '{version}' is already loaded for {self._kind}")
+            candidate = ModelVersion(version, spec)
+            self._candidate = candidate
+            self._set_canary(0.0)
+        threading.Thread(
+            target=self._load, args=(candidate,), name=f"{self._kind}-load-{version}", daemon=True
+        ).start()
+        return candidate
+
+    def _load(self, candidate: ModelVersion) -> None:
+        try:
+            service = self._factory(candidate.spec)
+            self._warm(service)
+            candidate.service = service
+            candidate.ready_at = time.time()
+            candidate.status = "ready"
+            print(f"{self._kind} version {candidate.version} ready in {candidate.ready_at - candidate.created_at:.1f}s")
+        except Exception as e:
+            candidate.status = "failed"
+            candidate.error = str(e)
+            print(f"Warning: Failed to load {self._kind} version {candidate.version}: {str(e)}")
+
+    def set_canary(self, percent: float) -> None:
+        if not 0.0 <= percent <= 100.0:
+            raise ValueError("percent must be between 0 and 100")
+        with self._lock:
+            if percent > 0 and (self._candidate is None or self._candidate.status != "ready"):
+                raise ValueError(f"No ready candidate for {self._kind}")
+            self._set_canary(percent)
+
+    def _set_canary(self, percent: float) -> None:
+        self._canary_percent = percent
+        MODEL_CANARY_PERCENT.set(percent, model=self._kind)
+
+    def promote(self) -> ModelVersion:
+        """Atomically make the ready candidate the active version."""
+        with self._lock:
+            candidate = self._candidate
+            if candidate is None or candidate.status != "ready":
+                raise ValueError(f"No ready candidate for {self._kind}")
+            # Keep the old version for rollback; a new swap releases the one before
+            self._previous, self._active = self._active, candidate
+            self._candidate = None
+            self._set_canary(0.0)
+            return candidate
+
+    def rollback(self) -> ModelVersion:
+        """Drop the candidate, or if there is none, switch back to the previous version."""
+        with self._lock:
+            self._set_canary(0.0)
+            if self._candidate is not None:
+                self._candidate = None
+                return self._active
+            if self._previous is None:
+                raise ValueError(f"No previous version to roll back to for {self._kind}")
+            self._active, self._previous = self._previous, None
+            return self._active
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "active": self._active.to_dict(),
+            "candidate": self._candidate.to_dict() if self._candidate else None,
+            "previous": self._previous.version if self._previous else None,
+            "canary_percent": self._canary_percent,
+        }
@@ -1,31 +1,63 @@
-from paddleocr import PaddleOCR
 import os
+import time
 import cv2
 import numpy as np
-from PIL import Image
+from typing import Dict, List, Optional, Tuple
+from services.image_io import probe_image_file
+from services.memory_watchdog import report_allocator_error
+from services.metrics import MODEL_LOAD_SECONDS, record_cache, time_ocr_field, time_stage
+from models.bundle import paddle_model_kwargs
+from services.runtime_config import get_runtime_config
 from services.utils import derive_birthdate_from_national_id, to_english_numerals
 
 
+def _describe(image) -> str:
+    """Short description of an image source for log messages."""
+    if isinstance(image, np.ndarray):
+        return f"<array {image.shape}>"
+    return str(image)
+
+
 class OCRService:
 
-    def __init__(self):
+    def __init__(self, model_overrides: Optional[Dict[str, Dict[str, str]]] = None):
         # Lazy loading - don't initialize OCR models until first use
         # This prevents memory access violations at startup
+        # Optional per-language PaddleOCR model arguments (lang -> kwargs),
+        # used to load a different model version than the pinned default
+        self.model_overrides = model_overrides or {}
         self._ocr_ar = None
         self._ocr_en = None
         self._initialization_error = None
 
+    def _model_kwargs(self, lang: str) -> Dict[str, str]:
+        kwargs = paddle_model_kwargs(lang)
+        kwargs.update(self.model_overrides.get(lang, {}))
+        return kwargs
+
+    @property
+    def loaded_models(self) -> List[str]:
+        return [lang for lang, model in (("ar", self._ocr_ar), ("en", self._ocr_en)) if model is not None]
+
     @property
     def ocr_ar(self):
         """Lazy initialization of Arabic OCR model."""
+        record_cache("ocr_model", self._ocr_ar is not None)
         if self._ocr_ar is None:
             try:
+                start = time.perf_counter()
+                # Imported here so paddle is only loaded when OCR is first needed
+                from paddleocr import PaddleOCR
+
                 self._ocr_ar = PaddleOCR(
                     lang="ar",
                     use_doc_orientation_classify=False,
                     use_doc_unwarping=False,
                     use_textline_orientation=False,
+                    **self._model_kwargs("ar"),
+                    **get_runtime_config().paddle_kwargs(),
                 )
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="ocr_ar")
             except Exception as e:
                 self._initialization_error = (
                     f"Failed to initialize Arabic OCR: {str(e)}"
@@ -36,14 +68,22 @@ class OCRService:
     @property
     def ocr_en(self):
         """Lazy initialization of English OCR model."""
+        record_cache("ocr_model", self._ocr_en is not None)
         if self._ocr_en is None:
             try:
+                start = time.perf_counter()
+                # Imported here so paddle is only loaded when OCR is first needed
+                from paddleocr import PaddleOCR
+
                 self._ocr_en = PaddleOCR(
                     lang="en",
                     use_doc_orientation_classify=False,
                     use_doc_unwarping=False,
                     use_textline_orientation=False,
+                    **self._model_kwargs("en"),
+                    **get_runtime_config().paddle_kwargs(),
                 )
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="ocr_en")
             except Exception as e:
                 self._initialization_error = (
                     f"Failed to initialize English OCR: {str(e)}"
@@ -51,151 +91,76 @@ class OCRService:
                 raise RuntimeError(self._initialization_error)
         return self._ocr_en
 
-    def _validate_image(self, image_path: str) -> bool:
+    def _validate_image(self, image_path) -> bool:
         """
-        Simple validation - just check if image exists and can be read.
+        Cheap validity check before OCR. Arrays are checked by shape and
+        dtype; files by size and image header only (no pixel decoding).
         Returns True if valid, False otherwise.
         """
-        if not image_path or not isinstance(image_path, str):
-            return False
-
-        if not os.path.exists(image_path):
-            return False
+        if isinstance(image_path, np.ndarray):
+            return (
+                image_path.ndim in (2, 3)
+                and image_path.shape[0] > 0
+                and image_path.shape[1] > 0
+                and (image_path.ndim == 2 or image_path.shape[2] in (1, 3, 4))
+            )
 
-        # Check file size
-        try:
-            file_size = os.path.getsize(image_path)
-            if file_size == 0:
-                return False
-        except Exception:
+        if not image_path or not isinstance(image_path, str):
             return False
 
-        # Try to read with PIL to verify it's a valid image
         try:
-            img = Image.open(image_path)
-            width, height = img.size
-            img.close()
-            if width == 0 or height == 0:
+            if os.path.getsize(image_path) == 0:
                 return False
-            return True
-        except Exception:
+            width, height = probe_image_file(image_path)
+        except (OSError, ValueError):
             return False
+        return width > 0 and height > 0
 
-    def _validate_and_prepare_image(self, image_path: str) -> str:
+    def _prepare_image(self, image) -> np.ndarray:
         """
-        Validate image and ensure it's in a format PaddleOCR can process.
-        Preprocesses the image to ensure compatibility.
-        Returns the validated/preprocessed image path.
+        Turn a crop (path or array) into the array PaddleOCR gets: 3-channel
+        BGR uint8, upscaled to at least OCR_MIN_SIZE pixels per side. Files
+        are decoded once here and the array goes straight to predict().
         """
-        if not image_path or not isinstance(image_path, str):
-            raise ValueError(f"Invalid image path: {image_path}")
-
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-
-        # Check file size
-        file_size = os.path.getsize(image_path)
-        if file_size == 0:
-            raise ValueError(f"Image file is empty: {image_path}")
-
-        # Create a preprocessed version to ensure PaddleOCR compatibility
-        # Use OpenCV to read and save in a format PaddleOCR definitely supports
-        try:
-            # Read image with OpenCV
-            img = cv2.imread(image_path, cv2.IMREAD_COLOR)
-            if img is None:
-                # Try reading as grayscale and convert to BGR
-                img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        with time_stage("ocr_prepare"):
+            if isinstance(image, np.ndarray):
+                img = image
+            else:
+                img = cv2.imread(image, cv2.IMREAD_UNCHANGED)
                 if img is None:
-                    raise ValueError(f"Cannot read image with OpenCV: {image_path}")
-                img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
-
-            h, w = img.shape[:2]
-            if h == 0 or w == 0:
-                raise ValueError(f"Image has invalid dimensions: {w}x{h}")
-
-            # Minimum size for PaddleOCR
-            min_size = 32
-            if h < min_size or w < min_size:
-                # Upscale if too small
-                scale = max(min_size / h, min_size / w) * 1.5  # Add some margin
-                new_h = max(int(h * scale), min_size)
-                new_w = max(int(w * scale), min_size)
-                img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
-
-            # Ensure image is in BGR format (OpenCV default) and valid
-            if len(img.shape) == 2:
-                img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
-            elif len(img.shape) != 3 or img.shape[2] != 3:
-                raise ValueError(f"Unexpected image shape: {img.shape}")
-
-            # Ensure image data is valid (not empty, correct dtype)
-            if img.size == 0:
-                raise ValueError("Image array is empty")
+                    raise ValueError(f"Cannot read image with OpenCV: {image}")
 
             # Normalize to uint8 if needed
             if img.dtype != np.uint8:
-                # Normalize to 0-255 range
+                if np.issubdtype(img.dtype, np.floating) and not np.isfinite(img).all():
+                    raise ValueError("Image contains invalid pixel values (NaN or Inf)")
                 if img.max() > 255 or img.min() < 0:
                     img = cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX)
                 img = img.astype(np.uint8)
 
-            # Verify image has valid pixel values
-            if np.any(np.isnan(img)) or np.any(np.isinf(img)):
-                raise ValueError("Image contains invalid pixel values (NaN or Inf)")
-
-            # Create a preprocessed file path
-            base_name = os.path.splitext(os.path.basename(image_path))[0]
-            preprocessed_dir = os.path.join(os.path.dirname(image_path), "preprocessed")
-            os.makedirs(preprocessed_dir, exist_ok=True)
-            preprocessed_path = os.path.join(preprocessed_dir, f"{base_name}_prep.jpg")
-
-            # Save as JPEG (PaddleOCR handles JPEG well)
-            # Use high quality to avoid compression artifacts
-            success = cv2.imwrite(
-                preprocessed_path, img, [cv2.IMWRITE_JPEG_QUALITY, 95]
-            )
-            if not success:
-                raise ValueError(
-                    f"Failed to save preprocessed image: {preprocessed_path}"
-                )
-
-            # Verify the saved image can be read back and is valid
-            verify_img = cv2.imread(preprocessed_path)
-            if verify_img is None:
-                raise ValueError(
-                    f"Preprocessed image cannot be read back: {preprocessed_path}"
-                )
-
-            # Double-check the verified image
-            if (
-                verify_img.size == 0
-                or verify_img.shape[0] == 0
-                or verify_img.shape[1] == 0
-            ):
-                raise ValueError(f"Verified image has invalid size: {verify_img.shape}")
+            # Ensure 3-channel BGR
+            if img.ndim == 2 or img.shape[2] == 1:
+                img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+            elif img.shape[2] == 4:
+                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
-            return preprocessed_path
+            # Minimum size for PaddleOCR
+            min_size = int(os.environ.get("OCR_MIN_SIZE", "32"))
+            h, w = img.shape[:2]
+            if h < min_size or w < min_size:
+                # Upscale if too small, with some margin
+                scale = max(min_size / h, min_size / w) * 1.5
+                new_h = max(int(h * scale), min_size)
+                new_w = max(int(w * scale), min_size)
+                img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
 
-        except Exception as e:
-            # If preprocessing fails, try to use original with PIL validation
-            try:
-                img = Image.open(image_path)
-                width, height = img.size
-                if width == 0 or height == 0:
-                    raise ValueError(f"Image has invalid dimensions: {width}x{height}")
-                img.close()
-                # Return original if PIL can read it
-                return image_path
-            except Exception as pil_e:
-                raise ValueError(
-                    f"Image preprocessing failed: {str(e)}, PIL fallback failed: {str(pil_e)}"
-                )
+            return np.ascontiguousarray(img)
 
     def run_ocr(self, image_list):
         """
         image_list must be a list of 6 items in this order:
         [Add1, Add2, Name1, Name2, Num1, Num2]
+        Items may be file paths or in-memory BGR arrays.
         """
         results = {}
 
@@ -226,16 +191,17 @@ class OCRService:
                     results[label] = []
                     continue
 
-                # Simple validation - just check if file exists and is readable
+                # Header/shape-only validation
                 if not self._validate_image(image_path):
-                    print(f"Image validation failed for {label}: {image_path}")
+                    print(f"Image validation failed for {label}: {_describe(image_path)}")
                     results[label] = []
                     continue
 
-                # Use original image path directly - PaddleOCR handles image formats well
-                # Skip preprocessing to avoid tensor memory issues
+                # Decode once into a contiguous uint8 BGR array for predict()
                 try:
-                    result = ocr_model.predict(input=image_path)
+                    image = self._prepare_image(image_path)
+                    with time_ocr_field(label, ocr_model_name):
+                        result = ocr_model.predict(input=image)
                     results[label] = result
                 except Exception as ocr_error:
                     error_msg = str(ocr_error)
@@ -245,19 +211,21 @@ class OCRService:
                         or "mutable_data" in error_msg
                     ):
                         print(
-                            f"Tensor memory error for {label} - image may be corrupted or incompatible: {image_path}"
+                            f"Tensor memory error for {label} - image may be corrupted or incompatible: {_describe(image_path)}"
                         )
+                        # Repeated errors trigger a worker recycle (services.memory_watchdog)
+                        report_allocator_error()
                     else:
-                        print(f"OCR error for {label} ({image_path}): {error_msg}")
+                        print(f"OCR error for {label} ({_describe(image_path)}): {error_msg}")
                     results[label] = []
 
             except (ValueError, FileNotFoundError) as validation_error:
                 print(
-                    f"Image validation error for {label} ({image_path}): {str(validation_error)}"
+                    f"Image validation error for {label} ({_describe(image_path)}): {str(validation_error)}"
                 )
                 results[label] = []
             except Exception as e:
-                print(f"Unexpected error for {label} ({image_path}): {str(e)}")
+                print(f"Unexpected error for {label} ({_describe(image_path)}): {str(e)}")
                 results[label] = []
 
         # Extract rec_texts safely
@@ -321,8 +289,14 @@ class OCRService:
         
         return ocr_result
 
-    def _run_single_ocr(self, image_path: str, lang: str = "ar") -> str:
-        """Run OCR on a single image and return text as a string."""
+    def _run_single_ocr(self, image_path, lang: str = "ar", field: str = "unknown") -> str:
+        """Run OCR on a single image (path or BGR array) and return text as a string."""
+        return self._run_single_ocr_scored(image_path, lang=lang, field=field)[0]
+
+    def _run_single_ocr_scored(
+        self, image_path, lang: str = "ar", field: str = "unknown"
+    ) -> Tuple[str, float]:
+        """Like _run_single_ocr, but also return the mean recognition score (0.0 if none)."""
         try:
             # Get the appropriate OCR model (lazy loading)
             if lang == "en":
@@ -330,27 +304,36 @@ class OCRService:
             else:
                 ocr_model = self.ocr_ar
             
-            # Validate image
+            # Validate image (header/shape only), then decode once in memory
             if not self._validate_image(image_path):
-                return ""
+                return "", 0.0
+            image = self._prepare_image(image_path)
             
             # Run OCR
-            result = ocr_model.predict(input=image_path)
+            with time_ocr_field(field, lang):
+                result = ocr_model.predict(input=image)
             if not result:
-                return ""
+                return "", 0.0
             
             texts = []
+            scores: List[float] = []
             # Extract text from result
             for res in result:
                 if isinstance(res, dict):
                     rec_texts = res.get("rec_texts", [])
+                    rec_scores = res.get("rec_scores", [])
                 elif hasattr(res, "rec_texts"):
                     rec_texts = res.rec_texts
+                    rec_scores = getattr(res, "rec_scores", [])
                 elif hasattr(res, "get"):
                     rec_texts = res.get("rec_texts", [])
+                    rec_scores = res.get("rec_scores", [])
                 else:
                     continue
                 
+                if rec_scores is not None:
+                    scores.extend(float(v) for v in rec_scores)
+                
                 if rec_texts:
                     if isinstance(rec_texts, list):
                         texts.extend([str(t) for t in rec_texts if t])
@@ -358,12 +341,15 @@ class OCRService:
                         texts.append(str(rec_texts))
             
             # Return merged text
-            return " ".join(texts).strip()
+            confidence = sum(scores) / len(scores) if scores else 0.0
+            return " ".join(texts).strip(), confidence
         except Exception as e:
-            print(f"OCR Error for {image_path}: {e}")
-            return ""
+            print(f"OCR Error for {_describe(image_path)}: {e}")
+            if "Tensor holds no memory" in str(e) or "mutable_data" in str(e):
+                report_allocator_error()
+            return "", 0.0
 
-    def process_crops(self, crop_map):
+    def process_crops(self, crop_map, confidences: Optional[Dict[str, float]] = None):
         """
         crop_map = {
             "Add1": "path.jpg",
@@ -373,19 +359,23 @@ class OCRService:
             "Num1": "path.jpg",
             "Num2": "path.jpg",
         }
+        Values may also be in-memory BGR arrays.
+        If `confidences` is given it is filled with the mean recognition
+        score per field.
         """
 
         out = {"Add1": "", "Add2": "", "Name1": "", "Name2": "", "Num1": "", "Num2": ""}
 
         for class_name, image_path in crop_map.items():
-            if not os.path.exists(image_path):
+            if isinstance(image_path, str) and not os.path.exists(image_path):
                 continue
 
             # Num2 uses English OCR
-            if class_name == "Num2":
-                out[class_name] = self._run_single_ocr(image_path, lang="en")
-            else:
-                out[class_name] = self._run_single_ocr(image_path, lang="ar")
+            lang = "en" if class_name == "Num2" else "ar"
+            text, score = self._run_single_ocr_scored(image_path, lang=lang, field=class_name)
+            out[class_name] = text
+            if confidences is not None:
+                confidences[class_name] = score
 
         # Derive BD from Num1 using Egyptian ID format
         num1_text = out.get("Num1", "")
@@ -0,0 +1,158 @@
+"""Cheap card orientation (portrait -> landscape) and skew correction."""
+
+import math
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services.metrics import REGISTRY, time_stage
+from services.utils import env_flag
+
+
+ORIENTATION_CORRECTIONS = REGISTRY.counter(
+    "idocr_orientation_corrections_total",
+    "Images corrected before detection, by kind (rotate90, deskew, rotate180).",
+    ("kind",),
+)
+
+# Card outline height/width above which the card is treated as portrait
+_PORTRAIT_RATIO = 1.15
+
+
+def orientation_enabled() -> bool:
+    return env_flag("ORIENTATION_CORRECTION", "1")
+
+
+def _downscaled_gray(img: np.ndarray, size: int) -> np.ndarray:
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape[:2]
+    if max(h, w) > size:
+        ratio = size / max(h, w)
+        gray = cv2.resize(
+            gray, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA
+        )
+    return gray
+
+
+def card_is_portrait(gray: np.ndarray) -> bool:
+    """
+    True when the card outline (largest contour covering at least a fifth of
+    the frame, else the whole frame) is taller than it is wide.
+    """
+    h, w = gray.shape[:2]
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 40, 120)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    card_w, card_h = w, h
+    if contours:
+        largest = max(contours, key=cv2.contourArea)
+        x, y, cw, ch = cv2.boundingRect(largest)
+        if cw * ch >= 0.2 * w * h:
+            card_w, card_h = cw, ch
+    return card_h > card_w * _PORTRAIT_RATIO
+
+
+def estimate_skew(gray: np.ndarray, max_skew: float) -> float:
+    """
+    Skew in degrees (positive = counter-clockwise, OpenCV's convention) from
+    the length-weighted median angle of near-horizontal line segments.
+    Returns 0.0 when there is not enough evidence.
+    """
+    h, w = gray.shape[:2]
+    edges = cv2.Canny(gray, 50, 150)
+    lines = cv2.HoughLinesP(
+        edges, 1, np.pi / 360, threshold=50, minLineLength=max(20, w // 5), maxLineGap=10
+    )
+    if lines is None:
+        return 0.0
+    angles = []
+    weights = []
+    for x1, y1, x2, y2 in lines.reshape(-1, 4).astype(int).tolist():
+        # Image y grows downwards, so negate for a counter-clockwise angle
+        angle = math.degrees(math.atan2(-(y2 - y1), x2 - x1))
+        if angle > 90:
+            angle -= 180
+        elif angle <= -90:
+            angle += 180
+        if abs(angle) <= max_skew:
+            angles.append(angle)
+            weights.append(math.hypot(x2 - x1, y2 - y1))
+    if len(angles) < 3:
+        return 0.0
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    median_index = order[int(np.searchsorted(cumulative, cumulative[-1] / 2.0))]
+    return float(angles[median_index])
+
+
+def rotate_image(img: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate by `angle` degrees counter-clockwise about the centre, same size."""
+    h, w = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+    return cv2.warpAffine(
+        img, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def correct_orientation(img: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Rotate a portrait card to landscape and remove small skew.
+    Returns (corrected image, {"rotation": 0|90, "skew": degrees}).
+    """
+    size = int(os.environ.get("ORIENTATION_SIZE", "480"))
+    max_skew = float(os.environ.get("ORIENTATION_MAX_SKEW", "15"))
+    min_skew = float(os.environ.get("ORIENTATION_MIN_SKEW", "0.5"))
+    info: Dict[str, Any] = {"rotation": 0, "skew": 0.0}
+
+    with time_stage("orientation"):
+        gray = _downscaled_gray(img, size)
+        if card_is_portrait(gray):
+            img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+            gray = cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE)
+            info["rotation"] = 90
+            ORIENTATION_CORRECTIONS.inc(kind="rotate90")
+
+        skew = estimate_skew(gray, max_skew)
+        if abs(skew) >= min_skew:
+            # Rotating by the measured skew levels the lines again
+            img = rotate_image(img, -skew)
+            info["skew"] = round(skew, 2)
+            ORIENTATION_CORRECTIONS.inc(kind="deskew")
+    return img, info
+
+
+def detect_upright(
+    detection_service: Any, image: np.ndarray, min_fields: Optional[int] = None
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Detect fields, retrying once on the 180 degree rotation when the card may
+    be upside down. Returns (image the boxes refer to, detections); callers
+    must crop from the returned image.
+    """
+    if not env_flag("ORIENTATION_RETRY_180", "1"):
+        return image, detection_service.detect(image)
+    min_fields = min_fields or int(os.environ.get("ORIENTATION_MIN_FIELDS", "3"))
+
+    try:
+        detections = detection_service.detect(image)
+    except ValueError:
+        # "No detections above threshold"
+        detections = {}
+    if len(detections) >= min_fields:
+        return image, detections
+    if not detections:
+        # Nothing card-like at all (blank or non-card image): a flipped
+        # copy will not do better, so skip the second forward pass
+        raise ValueError("No detections above threshold")
+
+    flipped = cv2.rotate(image, cv2.ROTATE_180)
+    try:
+        flipped_detections = detection_service.detect(flipped)
+    except ValueError:
+        flipped_detections = {}
+    if len(flipped_detections) > len(detections):
+        ORIENTATION_CORRECTIONS.inc(kind="rotate180")
+        return flipped, flipped_detections
+    return image, detections
@@ -0,0 +1,257 @@
+"""Stage-pipelined card processing: decode -> detect -> crop -> ocr."""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from services.image_io import (
+    decode_image_buffer,
+    get_upload_limits,
+    load_image_with_scale,
+    scale_boxes,
+)
+from services.image_quality import check_image_quality
+from services.metrics import REGISTRY
+from services.orientation import detect_upright
+
+
+PIPELINE_STAGES = ("decode", "detect", "crop", "ocr")
+
+PIPELINE_QUEUE_DEPTH = REGISTRY.gauge(
+    "idocr_pipeline_queue_depth",
+    "Cards waiting in front of each pipeline stage.",
+    ("stage",),
+)
+PIPELINE_BUSY_SECONDS = REGISTRY.counter(
+    "idocr_pipeline_busy_seconds_total",
+    "Worker time spent processing cards, by pipeline stage.",
+    ("stage",),
+)
+PIPELINE_CARDS = REGISTRY.counter(
+    "idocr_pipeline_cards_total",
+    "Cards finished by the pipeline, by outcome.",
+    ("outcome",),
+)
+
+# Encoded bytes, a path to an image file, or an already-decoded BGR array
+CardSource = Union[bytes, memoryview, str, np.ndarray]
+
+_STOP = object()
+
+
+class CardJob:
+    """One card moving through the pipeline; `state` is filled in stage by stage."""
+
+    def __init__(self, source: CardSource) -> None:
+        self.source = source
+        self.future: "Future[Dict[str, Any]]" = Future()
+        self.state: Dict[str, Any] = {}
+        self.submitted_at = time.perf_counter()
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[CardJob], None],
+        workers: int,
+        inbox: "queue.Queue[Any]",
+        outbox: "Optional[queue.Queue[Any]]",
+        next_name: str = "",
+    ) -> None:
+        self.name = name
+        self.next_name = next_name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"pipeline-{self.name}-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self.inbox.get()
+            PIPELINE_QUEUE_DEPTH.set(self.inbox.qsize(), stage=self.name)
+            if job is _STOP:
+                return
+            if job.future.cancelled():
+                continue
+            start = time.perf_counter()
+            try:
+                self.fn(job)
+                ok = True
+            except Exception as e:
+                job.future.set_exception(e)
+                PIPELINE_CARDS.inc(outcome="error")
+                ok = False
+            elapsed = time.perf_counter() - start
+            PIPELINE_BUSY_SECONDS.inc(elapsed, stage=self.name)
+            with self._lock:
+                self.busy_seconds += elapsed
+                self.processed += 1
+                self.failed += 0 if ok else 1
+            if ok and self.outbox is not None:
+                self.outbox.put(job)
+                PIPELINE_QUEUE_DEPTH.set(self.outbox.qsize(), stage=self.next_name)
+
+
+class CardPipeline:
+    """
+    Pipelined decode -> detect -> crop -> OCR executor over shared services.
+    Results match the compact schema: fields, confidences and boxes in
+    original image coordinates.
+    """
+
+    def __init__(
+        self,
+        detection_service: Any,
+        crop_service: Any,
+        ocr_service: Any,
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: Optional[int] = None,
+    ) -> None:
+        self.detection_service = detection_service
+        self.crop_service = crop_service
+        self.ocr_service = ocr_service
+        workers = dict(workers or {})
+        defaults = {"decode": 1, "detect": 1, "crop": 1, "ocr": 2}
+        for stage, default in defaults.items():
+            workers.setdefault(
+                stage, int(os.environ.get(f"PIPELINE_{stage.upper()}_WORKERS", str(default)))
+            )
+        self.queue_size = queue_size or int(os.environ.get("PIPELINE_QUEUE_SIZE", "4"))
+
+        fns = {"decode": self._decode, "detect": self._detect, "crop": self._crop, "ocr": self._ocr}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in PIPELINE_STAGES]
+        self.stages: List[_Stage] = []
+        for i, name in enumerate(PIPELINE_STAGES):
+            last = i + 1 == len(PIPELINE_STAGES)
+            self.stages.append(
+                _Stage(
+                    name,
+                    fns[name],
+                    workers[name],
+                    queues[i],
+                    None if last else queues[i + 1],
+                    "" if last else PIPELINE_STAGES[i + 1],
+                )
+            )
+        self._started_at: Optional[float] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started_at is not None:
+                return
+            for stage in self.stages:
+                stage.start()
+            self._started_at = time.perf_counter()
+
+    def submit(self, source: CardSource, timeout: Optional[float] = None) -> "Future[Dict[str, Any]]":
+        """Queue a card; blocks while the decode queue is full (back-pressure)."""
+        self.start()
+        job = CardJob(source)
+        self.stages[0].inbox.put(job, timeout=timeout)
+        PIPELINE_QUEUE_DEPTH.set(self.stages[0].inbox.qsize(), stage="decode")
+        return job.future
+
+    def map(self, sources: List[CardSource]) -> List["Future[Dict[str, Any]]"]:
+        """Submit several cards; futures are returned in input order."""
+        return [self.submit(source) for source in sources]
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Let queued cards finish, then stop the workers stage by stage."""
+        if self._started_at is None:
+            return
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                stage.inbox.put(_STOP)
+            stage.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage throughput and utilization (busy time / worker time since start)."""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        stages = {}
+        for stage in self.stages:
+            capacity = elapsed * stage.workers
+            stages[stage.name] = {
+                "workers": stage.workers,
+                "queued": stage.inbox.qsize(),
+                "processed": stage.processed,
+                "failed": stage.failed,
+                "busy_seconds": round(stage.busy_seconds, 3),
+                "mean_ms": round(1000.0 * stage.busy_seconds / stage.processed, 2) if stage.processed else 0.0,
+                "utilization": round(stage.busy_seconds / capacity, 3) if capacity else 0.0,
+            }
+        # The most utilized stage limits throughput; add workers there first
+        bottleneck = max(stages, key=lambda name: stages[name]["utilization"]) if elapsed else None
+        return {
+            "uptime_seconds": round(elapsed, 3),
+            "queue_size": self.queue_size,
+            "bottleneck": bottleneck,
+            "stages": stages,
+        }
+
+    # Stage functions: each reads and extends job.state
+
+    def _decode(self, job: CardJob) -> None:
+        source = job.source
+        if isinstance(source, np.ndarray):
+            image, scale = source, 1.0
+        elif isinstance(source, str):
+            image, scale = load_image_with_scale(source)
+        else:
+            _, max_pixels = get_upload_limits()
+            image, scale = decode_image_buffer(memoryview(source), max_pixels)
+        # Drop the encoded bytes as soon as they are decoded
+        job.source = None
+        # Unusable images stop here, before any model runs
+        check_image_quality(image, scale)
+        job.state["image"], job.state["scale"] = image, scale
+
+    def _detect(self, job: CardJob) -> None:
+        # Crop from whichever image the boxes refer to (may be rotated 180)
+        job.state["image"], job.state["detections"] = detect_upright(
+            self.detection_service, job.state["image"]
+        )
+
+    def _crop(self, job: CardJob) -> None:
+        job.state["crops"] = self.crop_service.crop_arrays(
+            job.state["image"], job.state["detections"]
+        )
+        # The full image is no longer needed; release it before the OCR queue
+        job.state.pop("image")
+
+    def _ocr(self, job: CardJob) -> None:
+        confidences: Dict[str, float] = {}
+        fields = self.ocr_service.process_crops(job.state["crops"], confidences)
+        job.future.set_result(
+            {
+                "fields": fields,
+                "confidences": confidences,
+                "boxes": scale_boxes(job.state["detections"], job.state["scale"]),
+                "latency_ms": round(1000.0 * (time.perf_counter() - job.submitted_at), 2),
+            }
+        )
+        job.state.clear()
+        PIPELINE_CARDS.inc(outcome="ok")
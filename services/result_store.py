@@ -0,0 +1,212 @@
+"""SQLite store of OCR results, indexed by national ID and image hash."""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from services.metrics import REGISTRY, record_cache, time_stage
+from services.utils import env_flag, to_english_numerals
+
+
+RESULT_STORE_RECORDS = REGISTRY.counter(
+    "idocr_result_store_records_total",
+    "Results written to the result store, by source endpoint.",
+    ("source",),
+)
+
+EXPORT_FORMATS = ("jsonl", "csv")
+EXPORT_COLUMNS = (
+    "id", "created_at", "source", "image_sha256", "national_id", "birth_date",
+    "detector_version", "ocr_version", "fields", "confidences", "boxes", "rotation",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    image_sha256 TEXT,
+    national_id TEXT,
+    birth_date TEXT,
+    detector_version TEXT,
+    ocr_version TEXT,
+    fields TEXT NOT NULL,
+    confidences TEXT NOT NULL,
+    boxes TEXT NOT NULL,
+    rotation INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_results_national_id ON results (national_id);
+CREATE INDEX IF NOT EXISTS idx_results_image_sha256 ON results (image_sha256);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at);
+"""
+
+_JSON_COLUMNS = ("fields", "confidences", "boxes")
+
+
+def result_store_enabled() -> bool:
+    return env_flag("RESULT_STORE_ENABLED", "0")
+
+
+def normalize_national_id(text: Any) -> str:
+    """Num1 as plain ASCII digits (Eastern Arabic numerals converted)."""
+    return "".join(filter(str.isdigit, to_english_numerals(str(text or ""))))
+
+
+def image_sha256(data: Any) -> str:
+    """Hash of the encoded image bytes (bytes or memoryview, no copy)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    for column in _JSON_COLUMNS:
+        record[column] = json.loads(record[column])
+    return record
+
+
+class ResultStore:
+    """SQLite-backed result store; one connection per thread."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.environ.get("RESULT_STORE_PATH", os.path.join("data", "results.db"))
+        self.reuse = env_flag("RESULT_STORE_REUSE", "0")
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(results)")}
+        if "rotation" not in columns:
+            # Databases created before the 180 degree detection retry
+            conn.execute("ALTER TABLE results ADD COLUMN rotation INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across application crashes, fsync per checkpoint
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(
+        self,
+        fields: Mapping[str, Any],
+        confidences: Optional[Mapping[str, float]] = None,
+        boxes: Optional[Mapping[str, Any]] = None,
+        image_hash: Optional[str] = None,
+        detector_version: Optional[str] = None,
+        ocr_version: Optional[str] = None,
+        source: str = "upload",
+        rotation: int = 0,
+    ) -> int:
+        """
+        Insert one card's result. Boxes are in original image coordinates,
+        after `rotation` (0 or 180) was applied for detection.
+        """
+        with time_stage("result_store_write"):
+            cursor = self._conn().execute(
+                "INSERT INTO results (created_at, source, image_sha256, national_id, birth_date,"
+                " detector_version, ocr_version, fields, confidences, boxes, rotation)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    source,
+                    image_hash,
+                    normalize_national_id(fields.get("Num1")) or None,
+                    fields.get("BD") or None,
+                    detector_version,
+                    ocr_version,
+                    json.dumps(dict(fields), ensure_ascii=False),
+                    json.dumps({k: round(float(v), 4) for k, v in (confidences or {}).items()}),
+                    json.dumps({k: [int(v) for v in box] for k, box in (boxes or {}).items()}),
+                    rotation,
+                ),
+            )
+        RESULT_STORE_RECORDS.inc(source=source)
+        return int(cursor.lastrowid)
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM results WHERE id = ?", (record_id,)).fetchone()
+        return _row_to_dict(row) if row is not None else None
+
+    def find_by_national_id(self, national_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT * FROM results WHERE national_id = ? ORDER BY id DESC LIMIT ?",
+            (normalize_national_id(national_id), limit),
+        ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def find_by_image_hash(self, image_hash: str, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT * FROM results WHERE image_sha256 = ? ORDER BY id DESC LIMIT ?",
+            (image_hash.lower(), limit),
+        ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def find_reusable(
+        self, image_hash: str, detector_version: Optional[str], ocr_version: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Latest result for the same image produced by the same model versions."""
+        if not self.reuse:
+            return None
+        with time_stage("result_store_lookup"):
+            row = self._conn().execute(
+                "SELECT * FROM results WHERE image_sha256 = ? AND detector_version IS ?"
+                " AND ocr_version IS ? ORDER BY id DESC LIMIT 1",
+                (image_hash, detector_version, ocr_version),
+            ).fetchone()
+        record_cache("result_store", row is not None)
+        return _row_to_dict(row) if row is not None else None
+
+    def count_national_id(self, national_id: str) -> int:
+        """Records already stored for this national ID (duplicate check)."""
+        normalized = normalize_national_id(national_id)
+        if not normalized:
+            return 0
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM results WHERE national_id = ?", (normalized,)
+        ).fetchone()
+        return int(row[0])
+
+    def export(self, fmt: str = "jsonl", since: Optional[float] = None) -> Iterator[str]:
+        """Stream all records (optionally created after `since`) as JSON lines or CSV."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{fmt}'; use one of {', '.join(EXPORT_FORMATS)}")
+        # A dedicated connection so a long export does not tie up the thread's one
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(
+                "SELECT * FROM results WHERE created_at >= ? ORDER BY id", (since or 0.0,)
+            )
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+                for row in cursor:
+                    writer.writerow([row[column] for column in EXPORT_COLUMNS])
+                    if buffer.tell() > 64 * 1024:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                yield buffer.getvalue()
+            else:
+                for row in cursor:
+                    yield json.dumps(_row_to_dict(row), ensure_ascii=False) + "\n"
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._conn().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT national_id), COUNT(DISTINCT image_sha256) FROM results"
+        ).fetchone()
+        return {"records": row[0], "national_ids": row[1], "images": row[2], "path": self.path}
@@ -0,0 +1,170 @@
+"""Thread budget, CPU affinity and device settings shared by Torch and Paddle."""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.utils import env_flag
+
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else None
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """Parse a Linux-style CPU list such as "0-3,8,10-11"."""
+    cores: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def available_cores() -> List[int]:
+    """Cores this process may run on (respects existing affinity/cgroup pinning)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _set_affinity(cores: List[int]) -> bool:
+    if not cores:
+        return False
+    if not hasattr(os, "sched_setaffinity"):
+        print("Warning: CPU affinity is not supported on this platform; ignoring CPU_AFFINITY")
+        return False
+    try:
+        os.sched_setaffinity(0, cores)
+        return True
+    except OSError as e:
+        print(f"Warning: Failed to set CPU affinity to {cores}: {str(e)}")
+        return False
+
+
+def pin_worker(slot: int, workers: int) -> List[int]:
+    """
+    Pin the current worker process to its share of the available cores when
+    CPU_AFFINITY=auto. `slot` is the worker's index in [0, workers).
+    Returns the cores pinned to (empty if pinning is disabled).
+    """
+    if os.environ.get("CPU_AFFINITY", "").strip().lower() != "auto" or workers <= 1:
+        return []
+    cores = available_cores()
+    per_worker = max(1, len(cores) // workers)
+    start = (slot % workers) * per_worker
+    chosen = cores[start:start + per_worker] or cores
+    return chosen if _set_affinity(chosen) else []
+
+
+class RuntimeConfig:
+    """Resolved runtime settings; see module docstring for the env vars."""
+
+    def __init__(self) -> None:
+        affinity = os.environ.get("CPU_AFFINITY", "").strip()
+        self.cpu_affinity: Optional[List[int]] = None
+        if affinity and affinity.lower() != "auto":
+            if _set_affinity(parse_cpu_list(affinity)):
+                self.cpu_affinity = available_cores()
+        cores = available_cores()
+        self.cores = len(cores)
+        if self.cpu_affinity is None and self.cores < (os.cpu_count() or 1):
+            # Already pinned by pin_worker, taskset or a cgroup cpuset
+            self.cpu_affinity = cores
+
+        max_in_flight = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "2"))
+        per_request = max(1, self.cores // max(1, max_in_flight))
+        self.torch_threads = _env_int("TORCH_NUM_THREADS") or per_request
+        self.torch_interop_threads = _env_int("TORCH_INTEROP_THREADS") or 1
+        self.paddle_threads = _env_int("PADDLE_CPU_THREADS") or self.torch_threads
+        self.enable_mkldnn = env_flag("PADDLE_ENABLE_MKLDNN", "1")
+        self.requested_device = os.environ.get("DEVICE", "auto").strip().lower() or "auto"
+        self._device: Optional[str] = None
+
+    @property
+    def device(self) -> str:
+        """Torch device string, resolved on first use (needs torch for "auto")."""
+        if self._device is None:
+            if self.requested_device == "auto":
+                import torch
+
+                self._device = "cuda" if torch.cuda.is_available() else "cpu"
+            else:
+                self._device = self.requested_device
+        return self._device
+
+    @property
+    def paddle_device(self) -> str:
+        """Same device in PaddleOCR's notation ("cpu" or "gpu:<n>")."""
+        device = self.device
+        if device.startswith("cuda"):
+            index = device.split(":", 1)[1] if ":" in device else "0"
+            return f"gpu:{index}"
+        return "cpu"
+
+    def paddle_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for PaddleOCR(...)."""
+        kwargs: Dict[str, Any] = {"device": self.paddle_device}
+        if self.paddle_device == "cpu":
+            kwargs["cpu_threads"] = self.paddle_threads
+            kwargs["enable_mkldnn"] = self.enable_mkldnn
+        return kwargs
+
+    def apply_torch(self) -> None:
+        """Set Torch thread pools. Inter-op threads can only be set once per process."""
+        import torch
+
+        torch.set_num_threads(self.torch_threads)
+        try:
+            torch.set_num_interop_threads(self.torch_interop_threads)
+        except RuntimeError:
+            # Already set, or parallel work has started; keep the existing pool
+            pass
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "device": self._device or self.requested_device,
+            "cores": self.cores,
+            "cpu_affinity": self.cpu_affinity,
+            "torch_threads": self.torch_threads,
+            "torch_interop_threads": self.torch_interop_threads,
+            "paddle_threads": self.paddle_threads,
+            "paddle_mkldnn": self.enable_mkldnn,
+        }
+
+    def describe(self) -> str:
+        affinity = ",".join(str(c) for c in self.cpu_affinity) if self.cpu_affinity else "none"
+        # Report "auto" until torch is loaded rather than importing it here
+        return (
+            f"device={self._device or self.requested_device} cores={self.cores} affinity={affinity} "
+            f"torch_threads={self.torch_threads}/{self.torch_interop_threads} "
+            f"paddle_threads={self.paddle_threads} mkldnn={'on' if self.enable_mkldnn else 'off'}"
+        )
+
+
+_config: Optional[RuntimeConfig] = None
+_lock = threading.Lock()
+
+
+def get_runtime_config() -> RuntimeConfig:
+    """
+    Resolve the runtime config once per process. Thread env vars are set as
+    defaults so OpenMP/MKL pick them up if the libraries have not been imported yet.
+    """
+    global _config
+    with _lock:
+        if _config is None:
+            config = RuntimeConfig()
+            for name in _THREAD_ENV_VARS:
+                os.environ.setdefault(name, str(config.torch_threads))
+            _config = config
+        return _config
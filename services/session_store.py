@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import REGISTRY, record_cache
+
+
+SESSIONS_ACTIVE = REGISTRY.gauge(
+    "idocr_sessions_active",
+    "Sessions currently held in memory, by store (session, preview).",
+    ("store",),
+)
+SESSIONS_EVICTED = REGISTRY.counter(
+    "idocr_sessions_evicted_total",
+    "Sessions evicted, by store and reason (ttl or capacity).",
+    ("store", "reason"),
+)
+
+
+class Session:
+    """
+    State shared by the /api/detect -> /api/crop -> /api/ocr steps.
+    Boxes are stored in working-image coordinates.
+    """
+
+    def __init__(self, session_id: str, image: np.ndarray, scale: float, image_path: Optional[str]) -> None:
+        self.session_id = session_id
+        self.image = image
+        self.scale = scale
+        self.image_path = image_path
+        self.boxes: Dict[str, Any] = {}
+        self.crops: Dict[str, np.ndarray] = {}
+        self.crop_map: Dict[str, str] = {}
+        # Boxes behind the current crops, used to render previews on demand
+        self.crop_boxes: Dict[str, Any] = {}
+        # Encoded preview thumbnails, filled lazily: label -> (bytes, mimetype)
+        self.previews: Dict[str, Tuple[bytes, str]] = {}
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+
+    def set_crop_boxes(self, boxes: Dict[str, Any]) -> None:
+        self.crop_boxes = dict(boxes)
+        self.previews = {}
+
+
+class SessionStore:
+    """
+    Bounded in-memory session store with TTL and LRU eviction.
+    Sessions expire `ttl_seconds` after their last access; when full the
+    least recently used session is evicted. `name` labels the store's
+    metrics, so several stores can be told apart.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        name: str = "session",
+    ) -> None:
+        self.max_sessions = max_sessions or int(os.environ.get("SESSION_MAX_ENTRIES", "64"))
+        self.ttl_seconds = ttl_seconds or float(os.environ.get("SESSION_TTL_SECONDS", "600"))
+        self.name = name
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, image: np.ndarray, scale: float = 1.0, image_path: Optional[str] = None) -> Session:
+        session = Session(uuid.uuid4().hex, image, scale, image_path)
+        with self._lock:
+            self._evict_expired()
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                SESSIONS_EVICTED.inc(store=self.name, reason="capacity")
+            self._sessions[session.session_id] = session
+            SESSIONS_ACTIVE.set(len(self._sessions), store=self.name)
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """Return the session and refresh its TTL, or None if unknown/expired."""
+        if not session_id:
+            return None
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+        record_cache(self.name, session is not None)
+        return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            SESSIONS_ACTIVE.set(len(self._sessions), store=self.name)
+
+    def __contains__(self, session_id: object) -> bool:
+        # Membership only: no TTL refresh and no cache metrics
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict_expired(self) -> None:
+        # Caller holds the lock; the dict is in LRU order so stop at the first live one
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            SESSIONS_EVICTED.inc(store=self.name, reason="ttl")
+        SESSIONS_ACTIVE.set(len(self._sessions), store=self.name)
@@ -0,0 +1,207 @@
+"""Multi-card mode: split a scanned page into cards and read each one."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import cv2
+import numpy as np
+
+from services.image_io import Box
+from services.metrics import REGISTRY, time_stage
+
+
+# ID-1 card: 85.60 x 53.98 mm
+CARD_ASPECT = 85.60 / 53.98
+
+SHEET_CARDS = REGISTRY.counter(
+    "idocr_sheet_cards_total",
+    "Cards found on uploaded sheets, by outcome (ok, failed).",
+    ("outcome",),
+)
+
+
+class SheetCard(NamedTuple):
+    """One card located on a page."""
+
+    image: np.ndarray  # upright-ish landscape card, warped from the page
+    quad: np.ndarray  # 4x2 float32 corners in page coordinates (tl, tr, br, bl)
+
+
+def _order_quad(points: np.ndarray) -> np.ndarray:
+    """Order 4 corners so the long side runs tl->tr (landscape)."""
+    pts = points.astype(np.float32)
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    tl, br = pts[np.argmin(s)], pts[np.argmax(s)]
+    tr, bl = pts[np.argmin(d)], pts[np.argmax(d)]
+    quad = np.array([tl, tr, br, bl], dtype=np.float32)
+    if np.linalg.norm(quad[1] - quad[0]) < np.linalg.norm(quad[3] - quad[0]):
+        # Portrait on the page: start at bl so the long edge becomes the top
+        quad = np.array([bl, tl, tr, br], dtype=np.float32)
+    return quad
+
+
+def _foreground_mask(gray: np.ndarray, color: np.ndarray) -> np.ndarray:
+    # Page background = median of the border pixels (scanner lid or paper)
+    border = np.concatenate([color[0], color[-1], color[:, 0], color[:, -1]])
+    background = np.median(border, axis=0)
+    distance = np.abs(color.astype(np.int16) - background.astype(np.int16)).max(axis=2)
+    mask = (distance > 25).astype(np.uint8) * 255
+    edges = cv2.dilate(cv2.Canny(gray, 40, 120), np.ones((3, 3), np.uint8))
+    mask = cv2.bitwise_or(mask, edges)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+    # Fill each blob so text and photo holes do not split a card
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filled = np.zeros_like(mask)
+    cv2.drawContours(filled, contours, -1, 255, thickness=cv2.FILLED)
+    # Separate cards that touch through thin bridges (shadows, dust)
+    return cv2.morphologyEx(filled, cv2.MORPH_OPEN, np.ones((7, 7), np.uint8))
+
+
+def _card_rects(
+    mask: np.ndarray, min_area: float, tolerance: float, grown: int = 0, depth: int = 0
+) -> List[Tuple[Any, Any, float]]:
+    """
+    Rotated rectangles of card-shaped blobs. A blob that is too big or the
+    wrong shape may be several cards touching: it is eroded and its parts
+    are tried again (up to 3 times), then grown back by the eroded amount.
+    """
+    rects = []
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        (cx, cy), (rw, rh), angle = cv2.minAreaRect(contour)
+        rw, rh = rw + 2 * grown, rh + 2 * grown
+        if rw * rh < min_area or min(rw, rh) == 0:
+            continue
+        aspect = max(rw, rh) / min(rw, rh)
+        # A card fills its rotated rectangle; blobs of text or merged cards do not
+        if (
+            cv2.contourArea(contour) >= 0.8 * (rw - 2 * grown) * (rh - 2 * grown)
+            and abs(aspect - CARD_ASPECT) <= tolerance * CARD_ASPECT
+        ):
+            rects.append(((cx, cy), (rw, rh), angle))
+        elif depth < 3 and rw * rh >= 2 * min_area:
+            blob = np.zeros_like(mask)
+            cv2.drawContours(blob, [contour], -1, 255, thickness=cv2.FILLED)
+            blob = cv2.erode(blob, np.ones((5, 5), np.uint8), iterations=2)
+            rects.extend(_card_rects(blob, min_area, tolerance, grown + 4, depth + 1))
+    return rects
+
+
+def _reading_order(quads: List[np.ndarray]) -> List[int]:
+    """Indices sorted by rows (top to bottom), then left to right."""
+    if not quads:
+        return []
+    centers = [q.mean(axis=0) for q in quads]
+    heights = [np.linalg.norm(q[3] - q[0]) for q in quads]
+    row_tolerance = float(np.median(heights)) / 2.0
+    order = sorted(range(len(quads)), key=lambda i: centers[i][1])
+    rows: List[List[int]] = []
+    for i in order:
+        if rows and abs(centers[i][1] - centers[rows[-1][0]][1]) <= row_tolerance:
+            rows[-1].append(i)
+        else:
+            rows.append([i])
+    return [i for row in rows for i in sorted(row, key=lambda j: centers[j][0])]
+
+
+def locate_cards(page: np.ndarray) -> List[SheetCard]:
+    """Find ID cards on a page image and return them warped to landscape, in reading order."""
+    locate_size = int(os.environ.get("SHEET_LOCATE_SIZE", "1200"))
+    max_cards = int(os.environ.get("SHEET_MAX_CARDS", "12"))
+    min_fraction = float(os.environ.get("SHEET_MIN_CARD_FRACTION", "0.01"))
+    tolerance = float(os.environ.get("SHEET_ASPECT_TOLERANCE", "0.25"))
+
+    with time_stage("sheet_locate"):
+        h, w = page.shape[:2]
+        ratio = min(1.0, locate_size / max(h, w))
+        small = page if ratio == 1.0 else cv2.resize(
+            page, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA
+        )
+        color = small if small.ndim == 3 else cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)
+        gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+        mask = _foreground_mask(gray, color)
+        min_area = min_fraction * mask.shape[0] * mask.shape[1]
+        rects = _card_rects(mask, min_area, tolerance)
+        rects.sort(key=lambda rect: rect[1][0] * rect[1][1], reverse=True)
+        quads = [_order_quad(cv2.boxPoints(rect)) / ratio for rect in rects[:max_cards]]
+
+        cards = []
+        for i in _reading_order(quads):
+            quad = quads[i]
+            out_w = int(round(max(np.linalg.norm(quad[1] - quad[0]), np.linalg.norm(quad[2] - quad[3]))))
+            out_h = int(round(max(np.linalg.norm(quad[3] - quad[0]), np.linalg.norm(quad[2] - quad[1]))))
+            target = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+            matrix = cv2.getPerspectiveTransform(quad, target)
+            image = cv2.warpPerspective(page, matrix, (out_w, out_h), flags=cv2.INTER_LINEAR)
+            cards.append(SheetCard(image, quad))
+    return cards
+
+
+class SheetService:
+    """Locate the cards on a page, detect fields in batches and OCR every card."""
+
+    def __init__(self, detection_service: Any, crop_service: Any, ocr_service: Any) -> None:
+        self.detection_service = detection_service
+        self.crop_service = crop_service
+        self.ocr_service = ocr_service
+        self.ocr_workers = max(1, int(os.environ.get("SHEET_OCR_WORKERS", "2")))
+        self.min_fields = int(os.environ.get("ORIENTATION_MIN_FIELDS", "3"))
+
+    def _detect_all(self, cards: List[SheetCard]) -> Tuple[List[np.ndarray], List[Dict[str, Box]], List[int]]:
+        images = [card.image for card in cards]
+        detections = self.detection_service.detect_batch(images)
+        rotations = [0] * len(cards)
+        # Cards the scanner saw upside down: one more batch on the 180 rotations
+        retry = [i for i, found in enumerate(detections) if len(found) < self.min_fields]
+        if retry:
+            flipped = [cv2.rotate(images[i], cv2.ROTATE_180) for i in retry]
+            for i, image, found in zip(retry, flipped, self.detection_service.detect_batch(flipped)):
+                if len(found) > len(detections[i]):
+                    images[i], detections[i], rotations[i] = image, found, 180
+        return images, detections, rotations
+
+    def _ocr_card(self, image: np.ndarray, detections: Dict[str, Box]) -> Tuple[Dict[str, str], Dict[str, float]]:
+        crops = self.crop_service.crop_arrays(image, detections)
+        confidences: Dict[str, float] = {}
+        fields = self.ocr_service.process_crops(crops, confidences)
+        return fields, confidences
+
+    def process(self, page: np.ndarray, scale: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Per-card results in reading order. Each has the card's corners on the
+        original page ("quad"), "rotation" (0 or 180, applied after warping),
+        and fields, confidences and boxes in the warped card's coordinates;
+        or "error" if no fields were found on it.
+        """
+        cards = locate_cards(page)
+        if not cards:
+            return []
+        images, detections, rotations = self._detect_all(cards)
+
+        results: List[Dict[str, Any]] = []
+        jobs: List[Tuple[int, Any]] = []
+        with ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix="sheet-ocr") as pool:
+            for index, (card, image, found, rotation) in enumerate(zip(cards, images, detections, rotations)):
+                result: Dict[str, Any] = {
+                    "index": index,
+                    "quad": [[round(float(x) * scale, 1), round(float(y) * scale, 1)] for x, y in card.quad],
+                    "size": [int(image.shape[1]), int(image.shape[0])],
+                    "rotation": rotation,
+                }
+                results.append(result)
+                if not found:
+                    result["error"] = "No detections above threshold"
+                    continue
+                result["boxes"] = {label: [int(v) for v in box] for label, box in found.items()}
+                jobs.append((index, pool.submit(self._ocr_card, image, found)))
+
+            for index, future in jobs:
+                try:
+                    results[index]["fields"], results[index]["confidences"] = future.result()
+                except Exception as e:
+                    results[index]["error"] = str(e)
+        for result in results:
+            SHEET_CARDS.inc(outcome="failed" if "error" in result else "ok")
+        return results
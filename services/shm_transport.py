@@ -0,0 +1,257 @@
+"""Shared-memory transport for images and crops between processes.
+
+The owner puts arrays in with ShmArena and must release() them; workers map
+them with ShmReader.view and must detach() before replying.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from services.metrics import REGISTRY
+
+
+SHM_SEGMENTS = REGISTRY.gauge(
+    "idocr_shm_segments",
+    "Shared-memory segments currently owned by this process.",
+)
+SHM_BYTES = REGISTRY.gauge(
+    "idocr_shm_bytes",
+    "Bytes held in shared-memory segments owned by this process.",
+)
+SHM_LEAKED = REGISTRY.counter(
+    "idocr_shm_leaked_total",
+    "Shared-memory segments reclaimed by leak detection, by side.",
+    ("side",),
+)
+
+# Offsets inside a segment are aligned so every view is SIMD-friendly
+_ALIGN = 64
+
+
+class ShmHandle(NamedTuple):
+    """Where an array lives: segment name, byte offset, shape and dtype."""
+
+    segment: str
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+
+HandleOrMap = Union[ShmHandle, Mapping[str, ShmHandle]]
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _segment_names(handles: HandleOrMap) -> List[str]:
+    if isinstance(handles, ShmHandle):
+        return [handles.segment]
+    return sorted({h.segment for h in handles.values()})
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching also registers the segment with the resource
+    # tracker. Worker processes share the owner's tracker, whose registry is a
+    # set, so the duplicate is harmless and the owner's unlink() clears it
+    return shared_memory.SharedMemory(name=name)
+
+
+class _Segment:
+    def __init__(self, shm: shared_memory.SharedMemory, label: str) -> None:
+        self.shm = shm
+        self.label = label
+        self.created_at = time.monotonic()
+
+
+class ShmArena:
+    """Owner side: creates segments, hands out handles and unlinks on release."""
+
+    def __init__(self, leak_timeout: Optional[float] = None) -> None:
+        self.leak_timeout = leak_timeout or float(os.environ.get("SHM_LEAK_TIMEOUT_SECONDS", "120"))
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+        self._prefix = f"idocr_{os.getpid()}_"
+
+    def put(self, array: np.ndarray, label: str = "") -> ShmHandle:
+        """Copy one array into a new segment."""
+        return self.put_many({"": array}, label)[""]
+
+    def put_many(self, arrays: Mapping[str, np.ndarray], label: str = "") -> Dict[str, ShmHandle]:
+        """
+        Copy several arrays (e.g. the crops of one card) into a single segment,
+        so they share one lifetime and one release().
+        """
+        layout: List[Tuple[str, int, np.ndarray]] = []
+        size = 0
+        for key, array in arrays.items():
+            layout.append((key, size, array))
+            size = _aligned(size + array.nbytes)
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(size, 1), name=self._prefix + uuid.uuid4().hex[:16]
+        )
+        handles: Dict[str, ShmHandle] = {}
+        for key, offset, array in layout:
+            handle = ShmHandle(shm.name, offset, tuple(array.shape), array.dtype.str)
+            # copyto handles non-contiguous inputs such as crop slices
+            np.copyto(self._view(shm, handle), array, casting="no")
+            handles[key] = handle
+        with self._lock:
+            self._segments[shm.name] = _Segment(shm, label)
+            self._update_gauges()
+        return handles
+
+    @staticmethod
+    def _view(shm: shared_memory.SharedMemory, handle: ShmHandle) -> np.ndarray:
+        return np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf, offset=handle.offset)
+
+    def release(self, handles: HandleOrMap) -> None:
+        """Unlink the segment(s) behind the handles. Releasing twice is a no-op."""
+        self._release_names(_segment_names(handles))
+
+    def _release_names(self, names: List[str]) -> None:
+        for name in names:
+            with self._lock:
+                segment = self._segments.pop(name, None)
+                self._update_gauges()
+            if segment is not None:
+                self._destroy(segment)
+
+    @contextmanager
+    def lease(
+        self, arrays: Union[np.ndarray, Mapping[str, np.ndarray]], label: str = ""
+    ) -> Iterator[HandleOrMap]:
+        """Put arrays into shared memory for the duration of the block."""
+        handles: HandleOrMap = (
+            self.put(arrays, label) if isinstance(arrays, np.ndarray) else self.put_many(arrays, label)
+        )
+        try:
+            yield handles
+        finally:
+            self.release(handles)
+
+    def outstanding(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "segment": name,
+                    "label": segment.label,
+                    "bytes": segment.shm.size,
+                    "age_seconds": round(now - segment.created_at, 3),
+                }
+                for name, segment in self._segments.items()
+            ]
+
+    def check_leaks(self) -> List[str]:
+        """Reclaim segments held longer than leak_timeout. Returns their names."""
+        cutoff = time.monotonic() - self.leak_timeout
+        with self._lock:
+            leaked = [name for name, seg in self._segments.items() if seg.created_at < cutoff]
+            labels = {name: self._segments[name].label for name in leaked}
+        for name in leaked:
+            label = f" ({labels[name]})" if labels[name] else ""
+            print(f"Warning: Shared-memory segment {name}{label} not released after {self.leak_timeout:.0f}s; reclaiming")
+            SHM_LEAKED.inc(side="owner")
+        self._release_names(leaked)
+        return leaked
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(seg.shm.size for seg in self._segments.values()),
+                "leak_timeout_seconds": self.leak_timeout,
+            }
+
+    def close(self) -> None:
+        """Release everything; anything still outstanding at shutdown is a leak."""
+        with self._lock:
+            segments = list(self._segments.values())
+            self._segments.clear()
+            self._update_gauges()
+        if segments:
+            print(f"Warning: {len(segments)} shared-memory segment(s) still outstanding at shutdown")
+            SHM_LEAKED.inc(len(segments), side="owner")
+        for segment in segments:
+            self._destroy(segment)
+
+    def _update_gauges(self) -> None:
+        SHM_SEGMENTS.set(len(self._segments))
+        SHM_BYTES.set(sum(seg.shm.size for seg in self._segments.values()))
+
+    @staticmethod
+    def _destroy(segment: _Segment) -> None:
+        try:
+            segment.shm.close()
+        except BufferError:
+            # An owner-side view is still alive; the mapping goes away with it
+            pass
+        try:
+            segment.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShmReader:
+    """Worker side: maps segments by name and hands out views into them."""
+
+    def __init__(self, writable: bool = False) -> None:
+        self.writable = writable
+        self._attached: Dict[str, shared_memory.SharedMemory] = {}
+        self._views: Dict[str, List["weakref.ref[np.ndarray]"]] = {}
+        self._reported: Set[str] = set()
+
+    def view(self, handle: ShmHandle) -> np.ndarray:
+        """Zero-copy view; valid until detach(). Read-only unless writable=True."""
+        shm = self._attached.get(handle.segment)
+        if shm is None:
+            shm = _attach(handle.segment)
+            self._attached[handle.segment] = shm
+            self._views[handle.segment] = []
+        array = np.ndarray(
+            handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf, offset=handle.offset
+        )
+        array.flags.writeable = self.writable
+        # NumPy does not pin the mapping, so track views to avoid unmapping
+        # memory that is still referenced (slices keep their base alive)
+        self._views[handle.segment].append(weakref.ref(array))
+        return array
+
+    def views(self, handles: Mapping[str, ShmHandle]) -> Dict[str, np.ndarray]:
+        return {key: self.view(handle) for key, handle in handles.items()}
+
+    def detach(self) -> List[str]:
+        """
+        Unmap every attached segment. Segments that still have live views are
+        reported (the caller kept a reference past the request) and returned.
+        """
+        leaked: List[str] = []
+        for name, shm in list(self._attached.items()):
+            if any(ref() is not None for ref in self._views[name]):
+                leaked.append(name)
+                continue
+            shm.close()
+            del self._attached[name], self._views[name]
+            self._reported.discard(name)
+        new = [name for name in leaked if name not in self._reported]
+        if new:
+            print(f"Warning: Views into shared-memory segment(s) {', '.join(new)} outlived the request")
+            SHM_LEAKED.inc(len(new), side="reader")
+            self._reported.update(new)
+        return leaked
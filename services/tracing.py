@@ -0,0 +1,244 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.utils import env_flag
+
+
+TRACE_HEADER = "X-Trace"
+TRACE_QUERY_PARAM = "trace"
+
+# Trace modes: "spans" records span timings only; "profile" adds cProfile
+# stats; "torch" adds a torch.profiler capture of the request.
+TRACE_MODES = ("spans", "profile", "torch")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return env_flag("TRACING_ENABLED", "0")
+
+
+def profiling_enabled() -> bool:
+    """cProfile/torch captures are expensive, so they need an explicit opt-in."""
+    return env_flag("TRACE_PROFILING_ENABLED", "0")
+
+
+def parse_trace_mode(value: Optional[str]) -> Optional[str]:
+    """
+    Map a header/query value to a trace mode.
+    "1"/"true" -> "spans", "profile" / "torch" as-is, anything else -> None.
+    """
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "spans"):
+        return "spans"
+    if value in ("profile", "torch"):
+        return value if profiling_enabled() else "spans"
+    return None
+
+
+class Trace:
+    """Span timings collected for a single request."""
+
+    def __init__(self, name: str, mode: str = "spans") -> None:
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.mode = mode
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.profile_text: Optional[str] = None
+        self.torch_trace_file: Optional[str] = None
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._torch_profiler: Any = None
+
+    def add_span(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        span_id: str,
+        parent_id: Optional[str],
+        args: Dict[str, Any],
+    ) -> None:
+        with self._lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "span_id": span_id,
+                    "parent_id": parent_id,
+                    "start_ms": round((start - self.start) * 1000.0, 3),
+                    "duration_ms": round((end - start) * 1000.0, 3),
+                    "thread": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    def start_profiling(self) -> None:
+        if self.mode == "profile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "torch":
+            try:
+                import torch.profiler
+
+                self._torch_profiler = torch.profiler.profile(
+                    activities=[torch.profiler.ProfilerActivity.CPU],
+                    record_shapes=True,
+                )
+                self._torch_profiler.__enter__()
+            except Exception as e:
+                print(f"Warning: torch profiler unavailable: {str(e)}")
+                self._torch_profiler = None
+
+    def stop_profiling(self, output_dir: str) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(30)
+            self.profile_text = out.getvalue()
+            self._profiler = None
+        if self._torch_profiler is not None:
+            self._torch_profiler.__exit__(None, None, None)
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, f"{self.trace_id}.torch.json")
+            self._torch_profiler.export_chrome_trace(path)
+            self.torch_trace_file = path
+            self._torch_profiler = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact summary suitable for returning inline in a response."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        data: Dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "total_ms": round((time.perf_counter() - self.start) * 1000.0, 3),
+            "spans": spans,
+        }
+        if self.profile_text:
+            data["profile"] = self.profile_text
+        if self.torch_trace_file:
+            # File name only; server paths are not exposed to clients
+            data["torch_trace_file"] = os.path.basename(self.torch_trace_file)
+        return data
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": span["name"],
+                    "ph": "X",
+                    "ts": (self.start_wall * 1e6) + span["start_ms"] * 1000.0,
+                    "dur": span["duration_ms"] * 1000.0,
+                    "pid": pid,
+                    "tid": span["thread"],
+                    "args": span["args"],
+                }
+                for span in self.spans
+            ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OpenTelemetry OTLP/JSON export of the request spans."""
+        trace_id = self.trace_id
+        start_ns = int(self.start_wall * 1e9)
+
+        def attributes(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [{"key": k, "value": {"stringValue": str(v)}} for k, v in args.items()]
+
+        with self._lock:
+            spans = [
+                {
+                    "traceId": trace_id,
+                    "spanId": span["span_id"],
+                    "parentSpanId": span["parent_id"] or "",
+                    "name": span["name"],
+                    "kind": 1,
+                    "startTimeUnixNano": str(start_ns + int(span["start_ms"] * 1e6)),
+                    "endTimeUnixNano": str(
+                        start_ns + int((span["start_ms"] + span["duration_ms"]) * 1e6)
+                    ),
+                    "attributes": attributes(span["args"]),
+                }
+                for span in self.spans
+            ]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": "egyptian-id-ocr"}}
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "services.tracing"}, "spans": spans}],
+                }
+            ]
+        }
+
+    def write(self, output_dir: str, fmt: str = "chrome") -> str:
+        """Write the trace to output_dir and return the file path."""
+        os.makedirs(output_dir, exist_ok=True)
+        if fmt == "otlp":
+            payload, suffix = self.to_otlp(), "otlp.json"
+        else:
+            payload, suffix = self.to_chrome_trace(), "trace.json"
+        path = os.path.join(output_dir, f"{self.trace_id}.{suffix}")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        return path
+
+
+def start_trace(name: str, mode: str = "spans") -> Trace:
+    """Begin a trace for the current context (request)."""
+    trace = Trace(name, mode)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    trace.start_profiling()
+    return trace
+
+
+def end_trace() -> Optional[Trace]:
+    """Detach and return the trace for the current context, if any."""
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    _current_span.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Record a span on the active trace; no-op when the request is not traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _current_span.reset(token)
+        trace.add_span(name, start, end, span_id, parent_id, args)
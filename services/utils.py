@@ -31,6 +31,10 @@ EASTERN_TO_ENGLISH: Dict[str, str] = {
 }
 
 
+def env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes")
+
+
 def ensure_directories(dirs: Iterable[str]) -> None:
     for d in dirs:
         os.makedirs(d, exist_ok=True)
@@ -2,8 +2,12 @@
 """
 Unified startup script for Egyptian ID OCR application.
 Starts both Flask backend and Vite frontend development servers.
+
+With --production, starts only the backend under a production server
+(see serve.py); any further arguments are passed to serve.py.
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -143,8 +147,24 @@ def print_output(process, name, color):
     except Exception:
         pass
 
+def start_production(server_args):
+    """Start the backend with a production server, without the frontend."""
+    print_colored("\n" + "="*60, Colors.BOLD + Colors.GREEN)
+    print_colored("  Egyptian ID OCR - Production Backend", Colors.BOLD + Colors.GREEN)
+    print_colored("="*60, Colors.BOLD + Colors.GREEN)
+
+    import serve
+    return serve.main(server_args)
+
 def main():
     """Main function to start both servers."""
+    parser = argparse.ArgumentParser(description="Start the Egyptian ID OCR application")
+    parser.add_argument("--production", action="store_true",
+                        help="Run only the backend with a production server (see serve.py --help)")
+    args, server_args = parser.parse_known_args()
+    if args.production:
+        sys.exit(start_production(server_args))
+
     print_colored("\n" + "="*60, Colors.BOLD + Colors.GREEN)
     print_colored("  Egyptian ID OCR - Unified Startup Script", Colors.BOLD + Colors.GREEN)
     print_colored("="*60, Colors.BOLD + Colors.GREEN)
@@ -0,0 +1,65 @@
+"""
+Shared fixtures. The suite runs on the stub model backends (services/backends.py),
+so it needs neither torch nor paddle nor model weights.
+"""
+
+import os
+
+# Must be set before app/services are imported
+os.environ.update(
+    {
+        "DETECTION_BACKEND": "stub",
+        "OCR_BACKEND": "stub",
+        "STUB_DETECT_LATENCY_MS": "0",
+        "STUB_OCR_LATENCY_MS": "0",
+        "STUB_LOAD_SECONDS": "0",
+        "MODEL_LOAD_MODE": "lazy",
+        "MEMORY_WATCHDOG": "0",
+        "RESULT_STORE_ENABLED": "0",
+        "TRACING_ENABLED": "0",
+    }
+)
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_card
+
+
+@pytest.fixture
+def card() -> np.ndarray:
+    """A synthetic card photographed on a dark background."""
+    return make_card(0)
+
+
+@pytest.fixture
+def jpeg():
+    def encode(image: np.ndarray) -> bytes:
+        ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        assert ok
+        return buf.tobytes()
+
+    return encode
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """create_app() factory running in a temporary directory (uploads, crops, data)."""
+    monkeypatch.chdir(tmp_path)
+
+    def build(**env: str):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        from app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        return app
+
+    return build
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app().test_client()
@@ -0,0 +1,103 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+from services.admission import AdmissionController, AdmissionRejected, AsyncAdmissionController
+
+
+def test_full_queue_is_rejected_with_429():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1, retry_after=3)
+    controller.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire()
+    assert (rejected.value.status, rejected.value.retry_after) == (429, 3)
+    controller.release()
+    controller.acquire()  # the slot is free again
+
+
+def test_queue_timeout_is_rejected_with_503():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    controller.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire()
+    assert rejected.value.status == 503
+
+
+def test_explicit_zero_settings_are_kept(monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "8")
+    monkeypatch.setenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30")
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=0)
+    assert (controller.max_queue, controller.queue_timeout) == (0, 0)
+
+
+def test_queued_request_gets_the_released_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=2)
+    controller.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        controller.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    controller.release()
+    thread.join(2)
+    assert admitted.is_set()
+
+
+def test_async_timed_out_waiter_leaves_the_slot_to_the_next_one():
+    async def scenario():
+        controller = AsyncAdmissionController(max_in_flight=1, max_queue=2, queue_timeout=0.2)
+        await controller.acquire()
+        first = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        controller.queue_timeout = 5
+        second = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected):
+            await first
+        await controller.release()
+        await asyncio.wait_for(second, 1)
+        assert controller._in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_http_requests_over_the_limit_get_429(make_app, card, jpeg):
+    app = make_app(
+        ADMISSION_MAX_IN_FLIGHT="1",
+        ADMISSION_MAX_QUEUE="0",
+        ADMISSION_RETRY_AFTER_SECONDS="4",
+        STUB_DETECT_LATENCY_MS="300",
+    )
+    data = jpeg(card)
+    statuses = []
+
+    def post():
+        response = app.test_client().post("/api/detect", data={"image": (io.BytesIO(data), "card.jpg")})
+        statuses.append((response.status_code, response.headers.get("Retry-After")))
+
+    threads = [threading.Thread(target=post) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    assert sorted(statuses) == [(200, None), (429, "4")]
+
+
+def test_draining_worker_returns_503(make_app, card, jpeg):
+    app = make_app()
+    app.extensions["idocr_memory_watchdog"]._draining.set()
+    client = app.test_client()
+    response = client.post("/api/detect", data={"image": (io.BytesIO(jpeg(card)), "card.jpg")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    # Non-inference endpoints keep answering
+    assert client.get("/api/health").status_code == 200
@@ -0,0 +1,41 @@
+import asyncio
+
+from asgi import AsgiFrontend
+from services.admission import AsyncAdmissionController
+
+
+def run_request(frontend, messages, path="/api/detect"):
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    incoming = list(messages)
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(frontend(scope, receive, send))
+    return sent
+
+
+def test_disconnect_during_upload_does_not_run_the_request():
+    calls = []
+
+    def wsgi_app(environ, start_response):
+        calls.append(environ)
+        start_response("200 OK", [])
+        return [b""]
+
+    admission = AsyncAdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+    frontend = AsgiFrontend(wsgi_app, admission)
+    sent = run_request(
+        frontend,
+        [{"type": "http.request", "body": b"partial", "more_body": True}, {"type": "http.disconnect"}],
+    )
+    assert calls == [] and sent == []
+    assert admission._in_flight == 0
+
+    sent = run_request(frontend, [{"type": "http.request", "body": b"whole", "more_body": False}])
+    assert len(calls) == 1 and calls[0]["wsgi.input"].read() == b"whole"
+    assert sent[0]["status"] == 200
@@ -0,0 +1,76 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_card
+from services.inference_workers import InferenceProcessPool
+
+
+def post_batch(client, images):
+    files = [(io.BytesIO(data), f"card{i}.jpg") for i, data in enumerate(images)]
+    return client.post("/api/batch", data={"images": files})
+
+
+@pytest.mark.parametrize("processes", ["0", "1"], ids=["threads", "process_pool"])
+def test_batch_returns_cards_in_upload_order(make_app, jpeg, processes):
+    app = make_app(PIPELINE_INFERENCE_PROCESSES=processes)
+    try:
+        response = post_batch(app.test_client(), [jpeg(make_card(i)) for i in range(3)])
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["count"] == 3
+        assert [card["filename"] for card in body["cards"]] == ["card0.jpg", "card1.jpg", "card2.jpg"]
+        for card in body["cards"]:
+            assert "error" not in card
+            assert {"Name1", "Num1"} <= set(card["boxes"])
+            assert set(card["fields"]) >= {"Name1", "Num1"}
+
+        stats = app.test_client().get("/api/pipeline/stats").get_json()
+        assert ("transport" in stats) == (processes == "1")
+    finally:
+        pipeline = app.extensions["idocr_pipeline"]
+        pipeline.close()
+        if processes == "1":
+            pipeline.detection_service.close()
+
+
+def test_bad_cards_fail_alone(client, jpeg, card):
+    dark = (card * 0.05).astype(np.uint8)
+    response = post_batch(client, [jpeg(card), b"not an image", jpeg(dark)])
+    assert response.status_code == 200
+    cards = response.get_json()["cards"]
+    assert "error" not in cards[0]
+    assert cards[1]["type"] == "ValueError"
+    assert cards[2]["type"] == "ImageQualityError"
+
+
+def test_batch_without_images_is_rejected(client):
+    assert client.post("/api/batch", data={}).status_code == 400
+
+
+def test_dead_worker_fails_its_call_and_is_replaced(monkeypatch, card):
+    monkeypatch.setenv("STUB_DETECT_LATENCY_MS", "800")
+    pool = InferenceProcessPool(1)
+    try:
+        pool.detect(card)  # worker is up
+        result = {}
+
+        def call():
+            try:
+                pool.detect(card)
+            except RuntimeError as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        time.sleep(0.3)
+        pool._workers[0].proc.kill()
+        thread.join(5)
+        assert "exited during the call" in str(result["error"])
+        assert set(pool.detect(card)) >= {"Name1", "Num1"}
+        assert pool.stats()["respawns"] == 1
+    finally:
+        pool.close()
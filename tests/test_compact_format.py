@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+
+def upload(client, data, accept=None):
+    headers = {"Accept": accept} if accept else {}
+    return client.post("/upload", data={"image": (io.BytesIO(data), "card.jpg")}, headers=headers)
+
+
+def test_msgpack_response_has_the_compact_schema(client, card, jpeg):
+    msgpack = pytest.importorskip("msgpack")
+    response = upload(client, jpeg(card), "application/msgpack")
+    assert response.mimetype == "application/msgpack"
+    payload = msgpack.unpackb(response.data)
+    assert payload["v"] == 1 and set(payload) == {"v", "fields", "conf", "boxes"}
+
+
+@pytest.mark.parametrize("accept", [None, "application/json", "application/msgpack"])
+def test_negotiated_responses_vary_on_accept(client, card, jpeg, accept):
+    assert "Accept" in upload(client, jpeg(card), accept).vary
+    # Errors from the same endpoint too
+    assert "Accept" in upload(client, b"not an image", accept).vary
+    assert "Accept" in client.post("/api/batch", data={}, headers={"Accept": accept or "*/*"}).vary
+
+
+def test_other_endpoints_do_not_vary(client):
+    assert "Accept" not in client.get("/api/health").vary
@@ -0,0 +1,37 @@
+import io
+import os
+import shutil
+
+import numpy as np
+
+from services.crop_service import CropService
+
+
+def test_concurrent_requests_get_their_own_crop_files(tmp_path):
+    service = CropService(str(tmp_path / "crops"))
+    first = service.save_crops({"Num1": np.full((20, 40, 3), 10, np.uint8)}, "a")
+    second = service.save_crops({"Num1": np.full((20, 40, 3), 200, np.uint8)}, "b")
+    unnamed = service.save_crops({"Num1": np.zeros((20, 40, 3), np.uint8)})
+
+    assert len({first["Num1"], second["Num1"], unnamed["Num1"]}) == 3
+    assert os.path.basename(first["Num1"]) == "a_Num1.png"
+    assert all(os.path.exists(path) for path in (first["Num1"], second["Num1"], unnamed["Num1"]))
+
+
+def test_failed_writes_are_left_out_of_the_crop_map(tmp_path):
+    service = CropService(str(tmp_path / "crops"))
+    crops = {"Name1": np.zeros((20, 40, 3), np.uint8), "Num1": np.zeros((0, 0, 3), np.uint8)}
+    assert list(service.save_crops(crops, "s")) == ["Name1"]
+
+    shutil.rmtree(service.crops_dir)
+    assert service.save_crops(crops, "s") == {}
+
+
+def test_crop_maps_from_two_sessions_do_not_collide(client, card, jpeg):
+    crop_maps = []
+    for _ in range(2):
+        detected = client.post("/api/detect", data={"image": (io.BytesIO(jpeg(card)), "card.jpg")})
+        session_id = detected.get_json()["session_id"]
+        crop_maps.append(client.post("/api/crop", json={"session_id": session_id}).get_json()["crop_map"])
+    assert set(crop_maps[0].values()).isdisjoint(crop_maps[1].values())
+    assert client.post("/api/ocr", json={"crop_map": crop_maps[0]}).status_code == 200
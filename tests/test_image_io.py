@@ -0,0 +1,34 @@
+import cv2
+
+from services.backends import StubDetectionService
+from services.crop_service import CropService
+from services.image_io import load_image, load_image_with_scale
+
+
+def write_jpeg(path, image):
+    assert cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_path_input_is_read_in_file_pixels(tmp_path, card):
+    large = cv2.resize(card, (3000, 2008))
+    path = write_jpeg(tmp_path / "large.jpg", large)
+
+    working, scale = load_image_with_scale(path)
+    assert max(working.shape[:2]) < 3000 and scale > 1
+    assert load_image(path).shape[:2] == (2008, 3000)
+
+
+def test_detect_on_a_path_returns_file_coordinates(tmp_path, card):
+    # A portrait file is not rotated and a large one is not downscaled
+    portrait = cv2.rotate(cv2.resize(card, (3000, 2008)), cv2.ROTATE_90_CLOCKWISE)
+    path = write_jpeg(tmp_path / "portrait.jpg", portrait)
+    boxes = StubDetectionService().detect(path)
+    assert max(x2 for _, _, x2, _ in boxes.values()) > 1000
+    assert all(x2 <= 2008 and y2 <= 3000 for _, _, x2, y2 in boxes.values())
+
+    # Cropping the same path with those boxes cuts the same regions
+    crops = CropService(str(tmp_path / "crops")).crop_arrays(path, boxes)
+    x1, y1, x2, y2 = boxes["Num1"]
+    h, w = crops["Num1"].shape[:2]
+    assert abs(w / h - (x2 - x1) / (y2 - y1)) < 0.05
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from services.pipeline import CardPipeline
+
+
+class FakeDetector:
+    def detect(self, image):
+        if image.mean() == 0:
+            raise ValueError("No fields detected")
+        h, w = image.shape[:2]
+        return {"Name1": (0, 0, w // 2, h // 2), "Num1": (w // 2, h // 2, w, h)}
+
+
+class FakeCropper:
+    def crop_arrays(self, image, detections):
+        return {label: image[y1:y2, x1:x2] for label, (x1, y1, x2, y2) in detections.items()}
+
+
+class FakeOCR:
+    def process_crops(self, crops, confidences):
+        confidences.update({label: 0.9 for label in crops})
+        return {label: str(int(crop.mean())) for label, crop in crops.items()}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    # The flat test cards would not pass the quality gate
+    monkeypatch.setenv("QUALITY_GATE", "0")
+    pipeline = CardPipeline(FakeDetector(), FakeCropper(), FakeOCR(), queue_size=2)
+    yield pipeline
+    pipeline.close()
+
+
+def test_results_come_back_in_submission_order(pipeline):
+    cards = [np.full((40, 60, 3), value, np.uint8) for value in range(1, 9)]
+    results = [future.result(timeout=5) for future in pipeline.map(cards)]
+    assert [r["fields"]["Name1"] for r in results] == [str(v) for v in range(1, 9)]
+    assert results[0]["boxes"]["Num1"] == (30, 20, 60, 40)
+
+
+def test_a_failing_card_does_not_stop_the_others(pipeline):
+    futures = pipeline.map([np.ones((40, 60, 3), np.uint8), np.zeros((40, 60, 3), np.uint8)])
+    assert futures[0].result(timeout=5)["fields"]
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+
+    pipeline.close()  # let the counters settle
+    stats = pipeline.stats()
+    assert (stats["stages"]["detect"]["processed"], stats["stages"]["detect"]["failed"]) == (2, 1)
+    assert stats["stages"]["ocr"]["processed"] == 1
+    assert stats["bottleneck"] in stats["stages"]
@@ -0,0 +1,102 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+from services.image_quality import (
+    ImageQualityError,
+    QualityThresholds,
+    assess_quality,
+    check_image_quality,
+    quality_problems,
+)
+
+
+def on_flatbed(card: np.ndarray, width: int = 1000, height: int = 1400, fraction: float = 0.33) -> np.ndarray:
+    """Paste the card (without its dark margin) onto a white scanner bed."""
+    card = card[60:-60, 60:-60]
+    card_w = min(width - 20, int((fraction * width * height * 1.586) ** 0.5))
+    card_h = int(card_w / 1.586)
+    bed = np.full((height, width, 3), 255, dtype=np.uint8)
+    y, x = (height - card_h) // 2, (width - card_w) // 2
+    bed[y:y + card_h, x:x + card_w] = cv2.resize(card, (card_w, card_h), interpolation=cv2.INTER_AREA)
+    return bed
+
+
+def reasons(image: np.ndarray, scale: float = 1.0):
+    return [p["reason"] for p in quality_problems(assess_quality(image), scale, QualityThresholds.from_env())]
+
+
+def test_clean_card_passes(card):
+    assert reasons(card) == []
+    assert check_image_quality(card) is not None
+
+
+def test_clean_card_on_white_background_passes(card):
+    bed = on_flatbed(card)
+    report = assess_quality(bed)
+    # The white bed is outside the card outline, so it is neither glare nor over-exposure
+    assert report.glare < 0.01
+    assert report.coverage == pytest.approx(0.33, abs=0.05)
+    assert reasons(bed) == []
+
+
+def test_glare_on_the_card_is_still_detected(card):
+    glared = card.copy()
+    cv2.ellipse(glared, (560, 380), (300, 180), 0, 0, 360, (255, 255, 255), -1)
+    assert "glare" in reasons(glared)
+    assert "glare" in reasons(on_flatbed(glared))
+
+
+@pytest.mark.parametrize(
+    "transform, expected",
+    [
+        (lambda img: cv2.GaussianBlur(img, (21, 21), 0), "blurry"),
+        (lambda img: (img * 0.08).astype(np.uint8), "too_dark"),
+        (lambda img: cv2.resize(img, (200, 132), interpolation=cv2.INTER_AREA), "too_small"),
+    ],
+)
+def test_unusable_images_are_rejected(card, transform, expected):
+    with pytest.raises(ImageQualityError) as info:
+        check_image_quality(transform(card))
+    assert expected in [p["reason"] for p in info.value.problems]
+
+
+def test_resolution_check_uses_original_size(card):
+    small = cv2.resize(card, (200, 132), interpolation=cv2.INTER_AREA)
+    # A 200 px working image that came from a 4x larger original is fine
+    assert "too_small" not in reasons(small, scale=4.0)
+
+
+def test_gate_can_be_disabled(card, monkeypatch):
+    monkeypatch.setenv("QUALITY_GATE", "0")
+    assert check_image_quality(cv2.GaussianBlur(card, (21, 21), 0)) is None
+
+
+def test_upload_rejection_is_actionable(client, card, jpeg):
+    blurred = jpeg(cv2.GaussianBlur(card, (21, 21), 0))
+    response = client.post("/upload", data={"image": (io.BytesIO(blurred), "card.jpg")})
+    assert response.status_code == 422
+    body = response.get_json()
+    assert [p["reason"] for p in body["reasons"]] == ["blurry"]
+    assert body["reasons"][0]["message"]
+    assert body["quality"]["sharpness"] < body["reasons"][0]["threshold"]
+
+
+def test_upload_of_card_on_white_background_is_accepted(client, card, jpeg):
+    response = client.post("/upload", data={"image": (io.BytesIO(jpeg(on_flatbed(card))), "scan.jpg")})
+    assert response.status_code == 200
+    assert response.get_json()["result"]["Num1"]
+
+
+def test_batch_reports_rejections_per_card(client, card, jpeg):
+    files = [
+        (io.BytesIO(jpeg(cv2.GaussianBlur(card, (21, 21), 0))), "blurred.jpg"),
+        (io.BytesIO(jpeg(card)), "sharp.jpg"),
+    ]
+    response = client.post("/api/batch", data={"images": files})
+    assert response.status_code == 200
+    blurred, sharp = response.get_json()["cards"]
+    assert [p["reason"] for p in blurred["reasons"]] == ["blurry"]
+    assert "error" not in sharp
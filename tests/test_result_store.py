@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+
+import pytest
+
+from benchmarks.synthetic import make_card
+from services.result_store import ResultStore, image_sha256, normalize_national_id
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_STORE_REUSE", "1")
+    return ResultStore(str(tmp_path / "results.db"))
+
+
+def test_national_id_is_normalized_for_lookup(store):
+    assert normalize_national_id("٢٩٠ ٠١٠١-1234567") == "29001011234567"
+    record_id = store.record({"Num1": "٢٩٠٠١٠١١٢٣٤٥٦٧", "BD": "1990-01-01"}, {"Num1": 0.91})
+    found = store.find_by_national_id("29001011234567")
+    assert [r["id"] for r in found] == [record_id]
+    assert found[0]["confidences"] == {"Num1": 0.91}
+    assert store.count_national_id("29001011234567") == 1
+
+
+def test_reuse_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("RESULT_STORE_REUSE", raising=False)
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.record({"Num1": "29001011234567"}, image_hash="abc", detector_version="v1", ocr_version="v1")
+    assert store.find_reusable("abc", "v1", "v1") is None
+
+
+def test_reuse_requires_the_same_image_and_model_versions(store):
+    image_hash = image_sha256(b"card bytes")
+    store.record({"Num1": "29001011234567"}, image_hash=image_hash, detector_version="v1", ocr_version="v1")
+    assert store.find_reusable(image_hash, "v1", "v1") is not None
+    assert store.find_reusable(image_hash, "v2", "v1") is None
+    assert store.find_reusable(image_sha256(b"other"), "v1", "v1") is None
+    assert len(store.find_by_image_hash(image_hash.upper())) == 1
+
+
+def test_export_streams_jsonl_and_csv(store):
+    for digit in "12":
+        store.record({"Num1": "2900101123456" + digit}, boxes={"Num1": (1.4, 2, 3, 4)})
+
+    lines = "".join(store.export("jsonl")).splitlines()
+    assert [json.loads(line)["boxes"] for line in lines] == [{"Num1": [1, 2, 3, 4]}] * 2
+    rows = list(csv.DictReader(io.StringIO("".join(store.export("csv")))))
+    assert [row["national_id"] for row in rows] == ["29001011234561", "29001011234562"]
+    assert list(store.export("jsonl", since=2**31)) == []
+    with pytest.raises(ValueError):
+        list(store.export("xml"))
+
+
+@pytest.fixture
+def store_client(make_app, tmp_path):
+    app = make_app(
+        RESULT_STORE_ENABLED="1",
+        RESULT_STORE_PATH=str(tmp_path / "results.db"),
+        RESULT_STORE_REUSE="1",
+        ADMIN_TOKEN="secret",
+    )
+    return app.test_client()
+
+
+def upload(client, data):
+    response = client.post("/upload", data={"image": (io.BytesIO(data), "card.jpg")})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_same_image_reuses_the_stored_result(store_client, card, jpeg):
+    data = jpeg(card)
+    first, second = upload(store_client, data), upload(store_client, data)
+
+    assert first["record"]["reused"] is False
+    assert second["record"] == {**first["record"], "reused": True}
+    assert second["result"] == first["result"]
+    # Previews of a reused result are rendered from the same boxes
+    assert set(second["crops"]) == set(first["crops"])
+    assert store_client.get(second["crops"]["Num1"]).status_code == 200
+
+
+def test_different_image_is_recognized_again(store_client, card, jpeg):
+    first = upload(store_client, jpeg(card))
+    other = upload(store_client, jpeg(make_card(1)))
+    assert other["record"]["reused"] is False
+    assert other["record"]["id"] != first["record"]["id"]
+
+
+def test_results_api_lists_and_validates(store_client, card, jpeg):
+    result = upload(store_client, jpeg(card))
+    admin = {"Authorization": "Bearer secret"}
+    assert store_client.get(f"/api/results/{result['record']['id']}").status_code == 401
+
+    record = store_client.get(f"/api/results/{result['record']['id']}", headers=admin).get_json()
+    assert record["fields"] == result["result"]
+    national_id = result["result"]["Num1"]
+    found = store_client.get(f"/api/results?national_id={national_id}&limit=0", headers=admin)
+    assert found.status_code == 200 and found.get_json()["count"] == 1
+    assert store_client.get("/api/results?national_id=1&limit=abc", headers=admin).status_code == 400
+    assert store_client.get("/api/results/export?since=yesterday", headers=admin).status_code == 400
+
+
+def test_uploads_are_recognized_again_without_reuse(make_app, tmp_path, card, jpeg):
+    client = make_app(RESULT_STORE_ENABLED="1", RESULT_STORE_PATH=str(tmp_path / "results.db")).test_client()
+    data = jpeg(card)
+    first, second = upload(client, data), upload(client, data)
+    assert (first["record"]["reused"], second["record"]["reused"]) == (False, False)
+    assert second["record"]["national_id_records"] == 2
@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+
+from services import session_store as session_store_module
+from services.session_store import SessionStore
+
+
+def test_sessions_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(session_store_module.time, "monotonic", lambda: clock[0])
+    store = SessionStore(max_sessions=4, ttl_seconds=10)
+    session = store.create(np.zeros((4, 4, 3), np.uint8))
+
+    clock[0] += 9
+    assert store.get(session.session_id) is session  # refreshes the TTL
+    clock[0] += 9
+    assert store.get(session.session_id) is session
+    clock[0] += 11
+    assert store.get(session.session_id) is None
+    assert len(store) == 0
+
+
+def test_least_recently_used_session_is_evicted_first():
+    store = SessionStore(max_sessions=2, ttl_seconds=60)
+    image = np.zeros((4, 4, 3), np.uint8)
+    first, second = store.create(image), store.create(image)
+    store.get(first.session_id)
+    third = store.create(image)
+
+    assert second.session_id not in store
+    assert first.session_id in store and third.session_id in store
+
+
+def test_new_session_has_no_crops():
+    session = SessionStore(max_sessions=1, ttl_seconds=60).create(np.zeros((4, 4, 3), np.uint8), 0.5, "x.jpg")
+    assert session.boxes == {} and session.crops == {} and session.crop_map == {}
+    assert session.created_at == session.last_access
+    assert (session.scale, session.image_path) == (0.5, "x.jpg")
+
+
+def test_deleted_session_is_gone():
+    store = SessionStore(max_sessions=2, ttl_seconds=60)
+    session = store.create(np.zeros((4, 4, 3), np.uint8))
+    store.delete(session.session_id)
+    assert store.get(session.session_id) is None
+    assert store.get(None) is None
+
+
+def test_uploads_do_not_evict_detect_sessions(make_app, card, jpeg):
+    # /upload previews live in their own store, so a burst of uploads cannot
+    # push out the session of a client in the middle of detect -> crop -> ocr
+    client = make_app(SESSION_MAX_ENTRIES="2", PREVIEW_MAX_ENTRIES="2").test_client()
+    data = jpeg(card)
+    session_id = client.post("/api/detect", data={"image": (io.BytesIO(data), "card.jpg")}).get_json()["session_id"]
+
+    previews = []
+    for _ in range(5):
+        uploaded = client.post("/upload", data={"image": (io.BytesIO(data), "card.jpg")})
+        assert uploaded.status_code == 200
+        previews.append(uploaded.get_json()["crops"])
+
+    assert client.post("/api/crop", json={"session_id": session_id}).status_code == 200
+    # The newest upload previews are served; the oldest ones were evicted
+    assert client.get(previews[-1]["Num1"]).status_code == 200
+    assert client.get(previews[0]["Num1"]).status_code == 404
@@ -0,0 +1,63 @@
+import io
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import make_card
+from services.sheet_service import CARD_ASPECT, locate_cards
+
+
+def make_sheet(count: int = 4, angle: float = 0.0) -> np.ndarray:
+    """A white A4-ish page at ~150 dpi with `count` cards laid out two per row."""
+    page = np.full((1754, 1240, 3), 250, dtype=np.uint8)
+    for i in range(count):
+        card = cv2.resize(make_card(i)[60:-60, 60:-60], (500, 316), interpolation=cv2.INTER_AREA)
+        x, y = 80 + (i % 2) * 580, 100 + (i // 2) * 420
+        if angle:
+            matrix = cv2.getRotationMatrix2D((250, 158), angle, 1.0)
+            mask = cv2.warpAffine(np.full(card.shape[:2], 255, np.uint8), matrix, (500, 316))
+            card = cv2.warpAffine(card, matrix, (500, 316))
+            region = page[y:y + 316, x:x + 500]
+            region[mask > 0] = card[mask > 0]
+        else:
+            page[y:y + 316, x:x + 500] = card
+    return page
+
+
+def test_cards_are_located_in_reading_order():
+    cards = locate_cards(make_sheet(4))
+    assert len(cards) == 4
+    centers = [card.quad.mean(axis=0) for card in cards]
+    # Row by row, left to right
+    assert centers[0][0] < centers[1][0] and abs(centers[0][1] - centers[1][1]) < 20
+    assert centers[2][1] > centers[0][1] + 300
+    for card in cards:
+        h, w = card.image.shape[:2]
+        assert abs(w / h - CARD_ASPECT) < 0.1
+        assert abs(w - 500) < 20
+
+
+def test_tilted_cards_are_straightened():
+    cards = locate_cards(make_sheet(2, angle=5.0))
+    assert len(cards) == 2
+    for card in cards:
+        h, w = card.image.shape[:2]
+        assert w > h
+
+
+def test_sheet_endpoint_reads_every_card(client, jpeg):
+    response = client.post("/api/sheet", data={"image": (io.BytesIO(jpeg(make_sheet(3))), "page.jpg")})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 3
+    for card in body["cards"]:
+        assert "error" not in card
+        assert len(card["quad"]) == 4
+        assert "Num1" in card["fields"]
+
+
+def test_blank_page_has_no_cards(client, jpeg):
+    blank = np.full((1754, 1240, 3), 250, dtype=np.uint8)
+    response = client.post("/api/sheet", data={"image": (io.BytesIO(jpeg(blank)), "page.jpg")})
+    assert response.status_code == 422
+    assert response.get_json()["cards"] == []
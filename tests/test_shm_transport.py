@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from services.shm_transport import ShmArena, ShmReader
+
+
+@pytest.fixture
+def arena():
+    arena = ShmArena(leak_timeout=60)
+    yield arena
+    arena.close()
+
+
+def test_crops_round_trip_through_one_segment(arena):
+    image = np.arange(60 * 80 * 3, dtype=np.uint8).reshape(60, 80, 3)
+    crops = {"Name1": image[10:30, 5:45], "Num1": image[40:, 50:, 0]}
+    handles = arena.put_many(crops, label="card")
+    assert len({handle.segment for handle in handles.values()}) == 1
+
+    reader = ShmReader()
+    views = reader.views(handles)
+    for label, crop in crops.items():
+        np.testing.assert_array_equal(views[label], crop)
+    assert not views["Name1"].flags.writeable
+    del views
+    assert reader.detach() == []
+
+    arena.release(handles)
+    arena.release(handles)  # releasing twice is a no-op
+    assert arena.stats()["segments"] == 0
+
+
+def test_views_still_alive_at_detach_are_reported(arena):
+    with arena.lease(np.ones((4, 4), np.uint8)) as handle:
+        reader = ShmReader()
+        kept = reader.view(handle)
+        assert reader.detach() == [handle.segment]
+        del kept
+        assert reader.detach() == []
+
+
+def test_segments_held_too_long_are_reclaimed(arena):
+    arena.leak_timeout = 0
+    handle = arena.put(np.zeros((2, 2), np.uint8), label="forgotten")
+    assert arena.check_leaks() == [handle.segment]
+    assert arena.outstanding() == []
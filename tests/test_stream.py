@@ -0,0 +1,31 @@
+import io
+
+import cv2
+import numpy as np
+
+
+def test_bad_frame_is_reported_without_dropping_the_others(make_app, card, jpeg):
+    client = make_app(UPLOAD_MAX_PIXELS="1000000").test_client()
+    stream_id = client.post("/api/stream").get_json()["stream_id"]
+    frames = [
+        (io.BytesIO(jpeg(cv2.GaussianBlur(card, (21, 21), 0))), "blurred.jpg"),
+        (io.BytesIO(jpeg(np.zeros((1200, 1200, 3), np.uint8))), "huge.jpg"),
+        (io.BytesIO(b"not an image"), "broken.jpg"),
+    ]
+    response = client.post(f"/api/stream/{stream_id}/frames", data={"frames": frames})
+    assert response.status_code == 200
+    blurred, huge, broken = response.get_json()["frames"]
+    assert "blurry" in blurred["rejected"]
+    assert "error" in huge and "error" in broken
+
+    # Only decoded frames count towards the stream
+    sharp = {"frame": (io.BytesIO(jpeg(card)), "sharp.jpg")}
+    assert client.post(f"/api/stream/{stream_id}/frames", data=sharp).get_json()["frames"][0]["frame"] == 1
+
+
+def test_good_frame_finishes_the_stream(client, card, jpeg):
+    stream_id = client.post("/api/stream").get_json()["stream_id"]
+    frame = {"frame": (io.BytesIO(jpeg(card)), "card.jpg")}
+    body = client.post(f"/api/stream/{stream_id}/frames", data=frame).get_json()
+    assert body["done"] is True
+    assert body["result"]["result"]["Num1"]
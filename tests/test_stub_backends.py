@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from services.backends import (
+    STUB_LAYOUT,
+    STUB_TEXTS,
+    StubDetectionService,
+    StubOCRService,
+    create_detection_service,
+)
+
+
+def test_stub_boxes_follow_the_image_size(card):
+    boxes = StubDetectionService().detect(card)
+    h, w = card.shape[:2]
+    assert set(boxes) == set(STUB_LAYOUT)
+    for x1, y1, x2, y2 in boxes.values():
+        assert 0 <= x1 < x2 <= w and 0 <= y1 < y2 <= h
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("DETECTION_BACKEND", "onnx")
+    with pytest.raises(ValueError):
+        create_detection_service()
+
+
+def test_stub_ocr_reads_the_fixed_texts(card):
+    boxes = StubDetectionService().detect(card)
+    crops = {label: card[y1:y2, x1:x2] for label, (x1, y1, x2, y2) in boxes.items()}
+    confidences = {}
+    fields = StubOCRService().process_crops(crops, confidences)
+    assert fields["Num1"] == STUB_TEXTS["Num1"]
+    assert confidences["Num1"] > 0
+
+
+def test_upload_runs_end_to_end(client, card, jpeg):
+    response = client.post("/upload", data={"image": (io.BytesIO(jpeg(card)), "card.jpg")})
+    assert response.status_code == 200
+    result = response.get_json()["result"]
+    assert result["Num1"] == STUB_TEXTS["Num1"]
+    # The stub national ID is valid, so the birth date is derived from it
+    assert result["BD"]
+
+
+def test_detect_crop_ocr_flow(client, card, jpeg):
+    detected = client.post("/api/detect", data={"image": (io.BytesIO(jpeg(card)), "card.jpg")})
+    assert detected.status_code == 200
+    body = detected.get_json()
+    assert {"Add1", "Add2", "Name1", "Name2", "Num1", "Num2"} <= set(body["boxes"])
+    session_id = body["session_id"]
+
+    cropped = client.post("/api/crop", json={"session_id": session_id})
+    assert cropped.status_code == 200
+    crops = cropped.get_json()["crops"]
+    assert set(crops) <= set(body["boxes"]) and "Name1" in crops
+
+    preview = client.get(crops["Name1"])
+    assert preview.status_code == 200
+    assert preview.headers["Content-Type"].startswith("image/")
+    cached = client.get(crops["Name1"], headers={"If-None-Match": preview.headers["ETag"]})
+    assert cached.status_code == 304
+
+    recognized = client.post("/api/ocr", json={"session_id": session_id})
+    assert recognized.status_code == 200
+    assert client.post("/api/crop", json={"session_id": "missing"}).status_code == 404
@@ -0,0 +1,22 @@
+import sys
+
+from services.tracing import current_trace, start_trace
+
+
+def test_teardown_stops_the_profiler_of_an_abandoned_trace(make_app):
+    app = make_app(TRACING_ENABLED="1")
+    with app.test_request_context("/upload?trace=profile"):
+        trace = start_trace("upload", "profile")
+        assert sys.getprofile() is not None
+        # after_request never ran (e.g. an earlier hook raised)
+        app.do_teardown_request()
+        assert current_trace() is None
+    assert sys.getprofile() is None
+    assert trace.profile_text
+
+
+def test_inline_trace_is_returned_with_the_response(make_app):
+    client = make_app(TRACING_ENABLED="1").test_client()
+    response = client.get("/api/health?trace=1")
+    assert response.headers["X-Trace-Id"]
+    assert "X-Trace-File" not in response.headers